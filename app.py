@@ -7,6 +7,11 @@ from utils.auth_secure import hash_password
 
 # 🗄️ Database
 from utils.database import get_all_users, get_all_patients, get_all_rendez_vous
+from utils.querylog import install_query_log
+
+# ⏰ Background Jobs
+from utils.changefeed import ensure_changefeed
+from utils.jobs import start_scheduler
 
 # 🧩 UI Components
 from components import show_user_info
@@ -14,6 +19,18 @@ from components import show_user_info
 # ⚙️ Page Configuration
 st.set_page_config(page_title="Midwives Platform", page_icon="👩‍⚕️", layout="wide")
 
+# 🔍 Query log: every SQLite connection of the process is timed (once per process)
+install_query_log()
+
+# ⏰ Scheduler started once per process from the entry script, not only by the
+# pages that show jobs: nightly backup, reminders, outbox dispatch, snapshot
+# refresh and sketch rebuild depend on it. `python -m utils.jobs_cli worker`
+# may run alongside (jobs are claimed atomically).
+start_scheduler()
+
+# 📡 Change feed triggers installed at startup, before any write of this process
+ensure_changefeed()
+
 # 🔐 Authentication Flow
 require_login()
 show_auth_sidebar()
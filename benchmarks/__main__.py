@@ -0,0 +1,91 @@
+import argparse
+import sys
+
+from benchmarks.harness import (
+    DEFAULT_SCALES,
+    REPEAT,
+    THRESHOLD,
+    compare,
+    list_results,
+    load_cases,
+    load_result,
+    run_scale,
+)
+
+# 👇 Exécution :
+#   python -m benchmarks run [--scale 1k 100k] [--only dossier stats] [--repeat 7]
+#   python -m benchmarks compare --scale 1k [--baseline F] [--current F]
+#   python -m benchmarks list
+# Sans --baseline/--current, compare les deux derniers résultats de l'échelle ;
+# le code de sortie vaut 1 si un cas a régressé au-delà du seuil.
+
+
+# Code de sortie 1 si un cas ou un module du dépôt est en erreur
+def _run(args: argparse.Namespace) -> int:
+    failed = False
+    for scale in args.scale:
+        print(f"🚀 Échelle {scale}")
+        report = run_scale(scale, args.only, args.repeat, save=not args.no_save)
+        failed = failed or bool(report["module_errors"]) or any(
+            "error" in stats for stats in report["results"].values()
+        )
+    return 1 if failed else 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    paths = list_results(args.scale)
+    baseline = args.baseline or (paths[-2] if len(paths) >= 2 else None)
+    current = args.current or (paths[-1] if paths else None)
+    if not baseline or not current:
+        print(f"📭 Deux résultats enregistrés sont nécessaires ({args.scale}).")
+        return 2
+    before, after = load_result(baseline), load_result(current)
+    print(
+        f"📉 {before['environment']['commit']} → {after['environment']['commit']} "
+        f"({args.scale}, seuil {args.threshold:.0%})"
+    )
+    rows, regressions = compare(before, after, args.threshold)
+    for name, old, new, change in rows:
+        state = "❌" if name in regressions else ("✅" if change < 0 else "  ")
+        print(
+            f"{state} {name:<36} {old * 1000:9.3f} ms → {new * 1000:9.3f} ms "
+            f"({change:+.1%})"
+        )
+    if regressions:
+        print(f"❌ {len(regressions)} régression(s) : {', '.join(regressions)}")
+        return 1
+    print("✅ Aucune régression.")
+    return 0
+
+
+def _list(args: argparse.Namespace) -> int:
+    for name, case in load_cases().items():
+        scales = f" ({', '.join(case.scales)})" if case.scales else ""
+        print(f"⏱️  {name}{scales}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Benchmarks des chemins critiques"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="mesure et enregistre les résultats")
+    run.add_argument("--scale", nargs="+", default=DEFAULT_SCALES)
+    run.add_argument("--only", nargs="+", help="préfixes de noms de cas")
+    run.add_argument("--repeat", type=int, default=REPEAT)
+    run.add_argument("--no-save", action="store_true")
+    run.set_defaults(func=_run)
+
+    cmp = commands.add_parser("compare", help="compare deux résultats enregistrés")
+    cmp.add_argument("--scale", default=DEFAULT_SCALES[0])
+    cmp.add_argument("--baseline")
+    cmp.add_argument("--current")
+    cmp.add_argument("--threshold", type=float, default=THRESHOLD)
+    cmp.set_defaults(func=_compare)
+
+    commands.add_parser("list", help="cas disponibles").set_defaults(func=_list)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
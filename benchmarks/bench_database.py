@@ -0,0 +1,80 @@
+from datetime import timedelta
+from itertools import cycle
+
+from benchmarks.harness import Fixture, bench
+
+# 🗄️ Accès aux données : lectures génériques, dossier patient, messagerie.
+# Les imports sont faits dans chaque setup : un module absent n'ignore que
+# le cas concerné.
+
+
+def _month(fx: Fixture):
+    start = fx.today.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.isoformat(), end.isoformat()
+
+
+@bench("fetch_all.rendez_vous_month")
+def fetch_rendez_vous_month(fx: Fixture):
+    from utils.Database import fetch_all
+
+    start, end = _month(fx)
+    query = (
+        "SELECT * FROM rendez_vous WHERE date >= ? AND date < ? "
+        "ORDER BY date, heure"
+    )
+    return lambda: fetch_all(query, (start, end))
+
+
+@bench("fetch_all.demographics_full")
+def fetch_demographics_full(fx: Fixture):
+    from utils.Database import fetch_all
+
+    return lambda: fetch_all("SELECT * FROM demographics")
+
+
+@bench("fetch_all.prenatal_full")
+def fetch_prenatal_full(fx: Fixture):
+    from utils.Database import fetch_all
+
+    return lambda: fetch_all("SELECT * FROM prenatal_care")
+
+
+# 📂 Dossier relu en base à chaque appel (cache vidé) puis servi par le cache
+@bench("dossier.cold")
+def dossier_cold(fx: Fixture):
+    from utils import dossier
+
+    charts = cycle(fx.charts)
+
+    def run():
+        with dossier._cache_lock:
+            dossier._cache.clear()
+        return dossier.get_patient_dossier(next(charts))
+
+    return run
+
+
+@bench("dossier.warm")
+def dossier_warm(fx: Fixture):
+    from utils.dossier import get_patient_dossier
+
+    charts = cycle(fx.charts)
+    return lambda: get_patient_dossier(next(charts))
+
+
+# 💬 Boîte de réception des soignantes les plus sollicitées
+@bench("messages.inbox")
+def messages_inbox(fx: Fixture):
+    from utils.Notifications import get_private_messages
+
+    receivers = cycle(fx.staff)
+    return lambda: get_private_messages(next(receivers))
+
+
+@bench("messages.unseen_count")
+def messages_unseen_count(fx: Fixture):
+    from utils.Notifications import get_unseen_message_count
+
+    receivers = cycle(fx.staff)
+    return lambda: get_unseen_message_count(next(receivers))
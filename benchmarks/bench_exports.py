@@ -0,0 +1,89 @@
+import os
+from datetime import datetime, timedelta
+
+from benchmarks.bench_reports import dashboard_frame
+from benchmarks.harness import Fixture, bench
+
+# 📤 Exports : PDF, ICS, CSV et Excel. L'export Excel de la base complète
+# n'est mesuré qu'aux petites échelles (plusieurs secondes par appel au-delà).
+
+
+@bench("export.csv")
+def export_csv(fx: Fixture):
+    from utils.exports import dataframe_to_csv
+
+    df = dashboard_frame(fx)
+    return lambda: dataframe_to_csv(df)
+
+
+@bench("export.xlsx", scales=["1k", "100k"])
+def export_xlsx(fx: Fixture):
+    from utils.exports import dataframe_to_xlsx
+
+    df = dashboard_frame(fx)
+    return lambda: dataframe_to_xlsx(df)
+
+
+@bench("export.pdf_report")
+def export_pdf_report(fx: Fixture):
+    from utils.exports import generate_pdf
+
+    data = {
+        "Nom": "Marie Tremblay",
+        "Âge": 29,
+        "Service": "Consultation",
+        "Pôle": "Pôle 1",
+        "Date": fx.today,
+    }
+    return lambda: generate_pdf(data)
+
+
+# 📄 Rapport libre long : une ligne par patiente, plafonnée à 500
+@bench("export.create_pdf")
+def export_create_pdf(fx: Fixture):
+    from utils.exports import create_pdf
+
+    conn = fx.connect()
+    lines = [
+        f"{chart} - {community} - {status}"
+        for chart, community, status in conn.execute(
+            "SELECT chart_number, community_of_residence, status "
+            "FROM demographics LIMIT 500"
+        )
+    ]
+    conn.close()
+    content = "\n".join(lines)
+    return lambda: create_pdf("Rapport de Suivi", content)
+
+
+@bench("export.dossier_pdf")
+def export_dossier_pdf(fx: Fixture):
+    from utils.dossier import get_patient_dossier
+    from utils.exports import generate_dossier_pdf
+
+    dossier = get_patient_dossier(fx.charts[0])
+
+    def run():
+        os.remove(generate_dossier_pdf(dossier, fx.charts[0]))
+
+    return run
+
+
+# 📅 Rendez-vous d'un mois entier en ICS
+@bench("export.ics_month")
+def export_ics_month(fx: Fixture):
+    from utils.exports import build_ics
+
+    start = fx.today.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    conn = fx.connect()
+    events = [
+        (motif, datetime.fromisoformat(f"{day} {heure}"), 30, f"Patient: {nom}")
+        for nom, day, heure, motif in conn.execute(
+            "SELECT nom, date, heure, motif FROM rendez_vous "
+            "WHERE date >= ? AND date < ?",
+            (start.isoformat(), end.isoformat()),
+        )
+    ]
+    conn.close()
+    return lambda: build_ics(events)
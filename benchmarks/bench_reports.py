@@ -0,0 +1,106 @@
+from typing import Dict
+
+from benchmarks.harness import Fixture, bench
+
+# 📊 Agrégations du tableau de bord (midwives_Statistics.py). La table
+# patients de midwifery.db (name, age, service, pole, date) est reconstituée
+# à partir des données démographiques de la fixture.
+
+DASHBOARD_QUERY = """
+    SELECT
+        prenom || ' ' || nom AS name,
+        age,
+        weeks_at_first_appointment,
+        reason_for_referral AS service,
+        community_of_residence AS pole,
+        date_of_referral AS date
+    FROM demographics
+"""
+
+_frames: Dict[str, object] = {}
+
+
+# 🐼 DataFrame du tableau de bord, chargé une fois par fixture
+def dashboard_frame(fx: Fixture):
+    import pandas as pd
+
+    if fx.db_path not in _frames:
+        conn = fx.connect()
+        _frames[fx.db_path] = pd.read_sql_query(DASHBOARD_QUERY, conn)
+        conn.close()
+    return _frames[fx.db_path]
+
+
+@bench("stats.read_frame")
+def read_frame(fx: Fixture):
+    import pandas as pd
+
+    def run():
+        conn = fx.connect()
+        df = pd.read_sql_query(DASHBOARD_QUERY, conn)
+        conn.close()
+        return df
+
+    return run
+
+
+@bench("stats.describe")
+def describe(fx: Fixture):
+    from utils.stats import describe_with_median
+
+    df = dashboard_frame(fx)
+    return lambda: describe_with_median(df)
+
+
+@bench("stats.corr")
+def corr(fx: Fixture):
+    from utils.stats import correlation_matrix
+
+    df = dashboard_frame(fx)
+    return lambda: correlation_matrix(df)
+
+
+@bench("stats.monthly_counts")
+def monthly(fx: Fixture):
+    from utils.stats import monthly_counts
+
+    df = dashboard_frame(fx)
+    return lambda: monthly_counts(df, "date")
+
+
+# 📈 Panneau d'indicateurs de cohorte (utils/cohorts.py) : chargement depuis
+# la fixture, puis calcul seul par communauté × année × source de référence
+@bench("cohorts.load")
+def cohorts_load(fx: Fixture):
+    from utils.cohorts import load_cohort
+    from utils.storage import SQLiteBackend
+
+    backend = SQLiteBackend(fx.db_path)
+    return lambda: load_cohort(backend)
+
+
+@bench("cohorts.panel")
+def cohorts_panel(fx: Fixture):
+    from utils.cohorts import DEFAULT_BY, compute_panel, load_cohort
+    from utils.storage import SQLiteBackend
+
+    frame = load_cohort(SQLiteBackend(fx.db_path))
+    return lambda: compute_panel(frame, DEFAULT_BY)
+
+
+# 📉 Données de graphiques agrégées (utils/charts.py) : carte de chaleur
+# âge × semaines au 1er rendez-vous et nuage âge × pôle × service
+@bench("charts.heatmap")
+def charts_heatmap(fx: Fixture):
+    from utils.charts import heatmap_counts
+
+    df = dashboard_frame(fx)
+    return lambda: heatmap_counts(df, "weeks_at_first_appointment", "age")
+
+
+@bench("charts.scatter")
+def charts_scatter(fx: Fixture):
+    from utils.charts import scatter_points
+
+    df = dashboard_frame(fx)
+    return lambda: scatter_points(df, "age", "pole", "service")
@@ -0,0 +1,317 @@
+import importlib
+import json
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.synthetic import fixture_path, generate, parse_scale
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# 🧬 Fixtures générées avec une graine et une date fixes : d'un commit à
+# l'autre, les mesures portent exactement sur les mêmes données
+SEED = 42
+TODAY = date(2025, 6, 1)
+DEFAULT_SCALES = ["1k", "100k"]
+
+# ⏱️ Répétitions : REPEAT séries, chacune d'au moins MIN_ROUND secondes
+# (les appels très courts sont regroupés pour dépasser la résolution de
+# l'horloge) ; le temps retenu est la durée par appel
+REPEAT = 7
+MIN_ROUND = 0.02
+MAX_NUMBER = 10_000
+
+# 📉 Seuil de régression : médiane plus lente de 10 % que la référence
+THRESHOLD = 0.10
+
+# 📦 Modules de cas, importés dans cet ordre
+BENCH_MODULES = [
+    "benchmarks.bench_database",
+    "benchmarks.bench_reports",
+    "benchmarks.bench_exports",
+]
+
+# 🎯 Modules mesurés : importés avant la redirection vers la fixture, pour
+# que leur DB_PATH pointe sur elle dès le setup des cas
+TARGET_MODULES = [
+    "utils.Database",
+    "utils.dossier",
+    "utils.Notifications",
+    "utils.stats",
+    "utils.exports",
+]
+
+
+# 🗂️ Contexte passé à chaque cas : la fixture et quelques valeurs tirées
+@dataclass
+class Fixture:
+    scale: str
+    db_path: str
+    patients: int
+    today: date = TODAY
+    charts: List[str] = field(default_factory=list)
+    staff: List[str] = field(default_factory=list)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+
+# 🏷️ Un cas : setup(fixture) renvoie la fonction mesurée, sans argument
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[Fixture], Callable[[], Any]]
+    scales: Optional[Sequence[str]] = None
+
+
+CASES: Dict[str, Case] = {}
+SKIPPED_MODULES: Dict[str, str] = {}
+BROKEN_MODULES: Dict[str, str] = {}
+
+
+# 🏷️ Décorateur : @bench("fetch_all.rendez_vous_month", scales=["1k"])
+def bench(name: str, scales: Optional[Sequence[str]] = None) -> Callable:
+    def register(setup: Callable[[Fixture], Callable[[], Any]]) -> Callable:
+        CASES[name] = Case(name, setup, scales)
+        return setup
+
+    return register
+
+
+# 🔍 ImportError d'un paquet tiers absent (pandas, fpdf…) ? Un module du
+# dépôt introuvable ou cassé est une erreur, pas une dépendance manquante.
+def _missing_dependency(error: ImportError) -> bool:
+    top = (error.name or "").split(".")[0]
+    if not top:
+        return False
+    return not (
+        os.path.isdir(os.path.join(ROOT, top))
+        or os.path.exists(os.path.join(ROOT, f"{top}.py"))
+    )
+
+
+# 📥 Import des modules de cas ; une dépendance absente ne fait sauter que
+# les cas du module concerné, une erreur d'import du dépôt est signalée
+def load_cases() -> Dict[str, Case]:
+    for module in BENCH_MODULES + TARGET_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            if not _missing_dependency(e):
+                BROKEN_MODULES[module] = f"{type(e).__name__}: {e}"
+            elif module in BENCH_MODULES:
+                SKIPPED_MODULES[module] = str(e)
+            # module mesuré : le cas qui en dépend sera ignoré, avec la raison
+    return CASES
+
+
+# 🧬 Fixture d'une échelle, générée au premier usage. TODAY fait partie du
+# nom : une fixture de python -m utils.synthetic (datée du jour) n'est
+# jamais reprise.
+def ensure_fixture(scale: str) -> Fixture:
+    path = fixture_path(scale, SEED, TODAY)
+    if not os.path.exists(path):
+        print(f"🧬 Génération de la fixture {scale} → {path}")
+        try:
+            generate(path, parse_scale(scale), SEED, TODAY)
+        except BaseException:
+            # Fixture incomplète : sinon reprise telle quelle au lancement suivant
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+    conn = sqlite3.connect(path)
+    patients = conn.execute("SELECT COUNT(*) FROM demographics").fetchone()[0]
+    charts = [
+        row[0]
+        for row in conn.execute(
+            "SELECT chart_number FROM demographics ORDER BY random() LIMIT 50"
+        )
+    ]
+    # Les destinataires les plus sollicités d'abord : pire cas des boîtes
+    staff = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT receiver FROM private_messages
+            GROUP BY receiver ORDER BY COUNT(*) DESC LIMIT 10
+            """
+        )
+    ]
+    conn.close()
+    return Fixture(scale, path, patients, TODAY, sorted(charts), staff)
+
+
+# 🔀 Redirige les modules utils.* vers la fixture. Les drapeaux « _ready »
+# et les caches de modules sont remis à zéro : ils valent pour une base.
+def use_database(path: str) -> None:
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("utils.") or getattr(module, "DB_PATH", path) == path:
+            continue
+        module.DB_PATH = path
+        for attr, value in vars(module).items():
+            if attr.startswith("_") and attr.endswith("_ready") and value is True:
+                setattr(module, attr, False)
+        cache = getattr(module, "_cache", None)
+        if hasattr(cache, "clear"):
+            cache.clear()
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+# ⏱️ Mesure d'un cas : un appel d'échauffement, calibrage du nombre
+# d'appels par série, puis REPEAT séries
+def measure(func: Callable[[], Any], repeat: int = REPEAT) -> Dict[str, Any]:
+    func()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_ROUND or number >= MAX_NUMBER:
+            break
+        number *= 10
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "p95": percentile(timings, 0.95),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": len(timings),
+        "number": number,
+    }
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+# 🚀 Exécution d'une échelle ; le résultat est enregistré dans
+# results/<échelle>/<horodatage>-<commit>.json
+def run_scale(
+    scale: str,
+    names: Optional[Sequence[str]] = None,
+    repeat: int = REPEAT,
+    save: bool = True,
+) -> Dict[str, Any]:
+    cases = load_cases()
+    fx = ensure_fixture(scale)
+    use_database(fx.db_path)
+    results: Dict[str, Dict[str, Any]] = {}
+    for case in cases.values():
+        if names and not any(case.name.startswith(n) for n in names):
+            continue
+        if case.scales and scale not in case.scales:
+            continue
+        try:
+            results[case.name] = measure(case.setup(fx), repeat)
+        except ImportError as e:
+            if _missing_dependency(e):
+                results[case.name] = {"skipped": str(e)}
+            else:
+                results[case.name] = {"error": f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            results[case.name] = {"error": f"{type(e).__name__}: {e}"}
+        stats = results[case.name]
+        if "skipped" in stats:
+            print(f"⏭️  {case.name} : ignoré ({stats['skipped']})")
+        elif "error" in stats:
+            print(f"❌ {case.name} : {stats['error']}")
+        else:
+            print(
+                f"⏱️  {case.name:<36} médiane {stats['median'] * 1000:9.3f} ms"
+                f"  p95 {stats['p95'] * 1000:9.3f} ms  (×{stats['number']})"
+            )
+    for module, reason in SKIPPED_MODULES.items():
+        print(f"⏭️  {module} : ignoré ({reason})")
+    for module, reason in BROKEN_MODULES.items():
+        print(f"❌ {module} : {reason}")
+
+    report = {
+        "scale": scale,
+        "patients": fx.patients,
+        "seed": SEED,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "skipped_modules": dict(SKIPPED_MODULES),
+        "module_errors": dict(BROKEN_MODULES),
+        "results": results,
+    }
+    if save:
+        directory = os.path.join(RESULTS_DIR, scale)
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        commit = report["environment"]["commit"]
+        path = os.path.join(directory, f"{stamp}-{commit}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        report["path"] = path
+        print(f"💾 Résultats enregistrés : {path}")
+    return report
+
+
+# 📋 Résultats enregistrés d'une échelle, du plus ancien au plus récent
+def list_results(scale: str) -> List[str]:
+    directory = os.path.join(RESULTS_DIR, scale)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(".json")
+    )
+
+
+def load_result(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# 📉 Comparaison des médianes : (cas, référence, courant, écart relatif)
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = THRESHOLD
+) -> Tuple[List[Tuple[str, float, float, float]], List[str]]:
+    rows, regressions = [], []
+    for name, stats in sorted(current["results"].items()):
+        before = baseline["results"].get(name, {})
+        if "median" not in stats or "median" not in before:
+            continue
+        change = stats["median"] / before["median"] - 1 if before["median"] else 0.0
+        rows.append((name, before["median"], stats["median"], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
@@ -0,0 +1,365 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import (
+    RESULTS_DIR,
+    ROOT,
+    ensure_fixture,
+    environment,
+    percentile,
+)
+from utils.synthetic import SYNTHETIC_PASSWORD
+
+# 👥 Test de charge : N clinicien(ne)s simulé(e)s, chacun(e) dans son thread,
+# rejouent des sessions Streamlit sans navigateur (AppTest) sur une copie
+# de la fixture. Toutes les sessions partagent le processus et les fichiers
+# SQLite, comme en production.
+
+# 🎲 Répartition par défaut des scénarios (poids relatifs)
+DEFAULT_MIX = {"login": 1, "prenatal": 3, "messages": 3, "dashboard": 2}
+
+# ⏱️ Délai maximal d'un rerun, et pause entre deux scénarios d'une session
+RUN_TIMEOUT = 30.0
+THINK_TIME = 0.2
+
+# 🔒 Signature des conflits d'écriture SQLite
+LOCKED = ("database is locked", "database table is locked")
+
+PRENATAL_PAGE = os.path.join(ROOT, "pages", "03_Prenatal Care.py")
+
+
+# 🧪 Scripts des scénarios (exécutés par AppTest.from_function : chaque
+# fonction doit tout importer elle-même). Ils suivent les mêmes chemins
+# que les pages : connexion, messagerie, tableau de bord.
+def login_script():
+    import streamlit as st
+    from utils.auth_secure import login
+
+    username = st.text_input("Nom d'utilisateur")
+    password = st.text_input("Mot de passe", type="password")
+    if st.button("Se connecter"):
+        if login(username, password):
+            st.success("✅ Connecté")
+        else:
+            st.error("❌ Identifiants incorrects")
+
+
+def messages_script():
+    import streamlit as st
+    from utils.Notifications import (
+        get_private_messages,
+        get_unseen_message_count,
+        mark_messages_seen,
+        send_private_message,
+    )
+
+    me = st.session_state["username"]
+    st.metric("Messages non lus", get_unseen_message_count(me))
+    message = st.text_area("Message")
+    if st.button("📤 Envoyer le message") and message.strip():
+        send_private_message(me, st.session_state["peer"], message.strip())
+    for sender, text, timestamp in get_private_messages(me)[:50]:
+        st.write(f"🕒 {timestamp} — **{sender}** : {text}")
+    mark_messages_seen(me)
+
+
+def dashboard_script():
+    import sqlite3
+    from contextlib import closing
+
+    import pandas as pd
+    import streamlit as st
+    from benchmarks.bench_reports import DASHBOARD_QUERY
+    from utils.Notifications import get_message_stats
+    from utils.stats import describe_with_median, monthly_counts
+
+    with closing(sqlite3.connect("data.db")) as conn:
+        df = pd.read_sql_query(DASHBOARD_QUERY, conn)
+    st.dataframe(describe_with_median(df))
+    st.line_chart(monthly_counts(df, "date").set_index("date"))
+    st.write(get_message_stats())
+
+
+# 🧾 Résultat d'un scénario : durée et messages d'erreur affichés
+@dataclass
+class Sample:
+    scenario: str
+    seconds: float
+    failures: List[str] = field(default_factory=list)
+
+    @property
+    def locked(self) -> bool:
+        return any(any(s in f for s in LOCKED) for f in self.failures)
+
+
+def _failures(at) -> List[str]:
+    return [str(e.value) for e in at.exception] + [str(e.value) for e in at.error]
+
+
+# 👩‍⚕️ Une session simulée
+class Clinician:
+    def __init__(
+        self, username: str, peers: List[str], seed: int, timeout: float
+    ) -> None:
+        self.username = username
+        self.peers = [p for p in peers if p != username] or [username]
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+
+    def _app(self, source, **state):
+        from streamlit.testing.v1 import AppTest
+
+        if callable(source):
+            at = AppTest.from_function(source, default_timeout=self.timeout)
+        else:
+            at = AppTest.from_file(source, default_timeout=self.timeout)
+        at.session_state["username"] = self.username
+        at.session_state["role"] = "sage-femme"
+        for key, value in state.items():
+            at.session_state[key] = value
+        return at
+
+    def login(self):
+        at = self._app(login_script).run()
+        at.text_input[0].input(self.username)
+        at.text_input[1].input(SYNTHETIC_PASSWORD)
+        at.button[0].click().run()
+        failures = _failures(at)
+        if not failures and "user" not in at.session_state:
+            failures.append("connexion refusée")
+        return failures
+
+    def prenatal(self):
+        at = self._app(PRENATAL_PAGE).run()
+        chart = f"C{self.rng.randint(1, 9_999_999):07d}"
+        at.text_input[0].input(chart)
+        at.number_input[0].set_value(round(self.rng.uniform(18, 40), 1))
+        next(b for b in at.button if "Soumettre" in b.label).click().run()
+        return _failures(at)
+
+    def messages(self):
+        at = self._app(messages_script, peer=self.rng.choice(self.peers)).run()
+        at.text_area[0].input(f"Suivi {self.rng.randint(1, 10_000)}")
+        at.button[0].click().run()
+        return _failures(at)
+
+    def dashboard(self):
+        return _failures(self._app(dashboard_script).run())
+
+    def play(self, scenario: str) -> Sample:
+        started = time.perf_counter()
+        try:
+            failures = getattr(self, scenario)()
+        except Exception as e:
+            failures = [f"{type(e).__name__}: {e}"]
+        return Sample(scenario, time.perf_counter() - started, failures)
+
+
+# 🏗️ Copie de travail : data.db = fixture, users.db = comptes de la fixture
+# (mot de passe SYNTHETIC_PASSWORD). Renvoie les identifiants des soignantes.
+def prepare_workdir(scale: str, workdir: str) -> List[str]:
+    fx = ensure_fixture(scale)
+    os.makedirs(workdir, exist_ok=True)
+    source = sqlite3.connect(fx.db_path)
+    target = sqlite3.connect(os.path.join(workdir, "data.db"))
+    source.backup(target)
+    target.close()
+    source.close()
+
+    conn = sqlite3.connect(os.path.join(workdir, "users.db"))
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL
+        )
+    """
+    )
+    conn.execute("ATTACH DATABASE ? AS fixture", (fx.db_path,))
+    conn.execute(
+        "INSERT OR IGNORE INTO users (username, password_hash, role) "
+        "SELECT username, password_hash, role FROM fixture.users"
+    )
+    conn.commit()
+    staff = [
+        row[0]
+        for row in conn.execute(
+            "SELECT username FROM users WHERE role != 'patient' ORDER BY username"
+        )
+    ]
+    conn.close()
+    return staff
+
+
+def _summary(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(s.seconds for s in samples)
+    errors = [s for s in samples if s.failures]
+    locked = [s for s in errors if s.locked]
+    return {
+        "count": len(samples),
+        "errors": len(errors),
+        "locked": len(locked),
+        "error_rate": len(errors) / len(samples) if samples else 0.0,
+        "locked_rate": len(locked) / len(samples) if samples else 0.0,
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50) if latencies else 0.0,
+        "p95": percentile(latencies, 0.95) if latencies else 0.0,
+        "p99": percentile(latencies, 0.99) if latencies else 0.0,
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+# 🚀 Charge : chaque session enchaîne des scénarios tirés selon le mélange
+# jusqu'à la fin de la durée (ou du nombre d'itérations par session)
+def run_load(
+    users: int,
+    duration: float,
+    scale: str = "1k",
+    mix: Optional[Dict[str, int]] = None,
+    iterations: Optional[int] = None,
+    think: float = THINK_TIME,
+    timeout: float = RUN_TIMEOUT,
+    seed: int = 42,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    mix = mix or DEFAULT_MIX
+    workdir = workdir or tempfile.mkdtemp(prefix="load-")
+    staff = prepare_workdir(scale, workdir)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    previous = os.getcwd()
+    os.chdir(workdir)
+
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    scenarios, weights = zip(*mix.items())
+    stop_at = time.perf_counter() + duration
+
+    def session(index: int) -> None:
+        clinician = Clinician(staff[index % len(staff)], staff, seed + index, timeout)
+        played = 0
+        while time.perf_counter() < stop_at and (
+            iterations is None or played < iterations
+        ):
+            sample = clinician.play(clinician.rng.choices(scenarios, weights)[0])
+            with lock:
+                samples.append(sample)
+            played += 1
+            time.sleep(clinician.rng.uniform(0, 2 * think))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(users)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        os.chdir(previous)
+    elapsed = time.perf_counter() - started
+
+    by_scenario = {
+        name: _summary([s for s in samples if s.scenario == name], elapsed)
+        for name in scenarios
+    }
+    failures: Dict[str, int] = {}
+    for sample in samples:
+        for failure in sample.failures:
+            key = failure.splitlines()[0][:120]
+            failures[key] = failures.get(key, 0) + 1
+    return {
+        "users": users,
+        "duration": round(elapsed, 2),
+        "scale": scale,
+        "mix": mix,
+        "think": think,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "workdir": workdir,
+        "total": _summary(samples, elapsed),
+        "scenarios": by_scenario,
+        "failures": dict(sorted(failures.items(), key=lambda kv: -kv[1])[:20]),
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    total = report["total"]
+    print(
+        f"👥 {report['users']} session(s), {report['duration']} s : "
+        f"{total['count']} scénario(s), {total['throughput']:.1f}/s"
+    )
+    print(
+        f"   {'scénario':<10} {'n':>6} {'erreurs':>8} {'locked':>7} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    )
+    for name, stats in [*report["scenarios"].items(), ("total", total)]:
+        print(
+            f"   {name:<10} {stats['count']:>6} {stats['error_rate']:>8.1%} "
+            f"{stats['locked_rate']:>7.1%} {stats['p50'] * 1000:>9.0f} "
+            f"{stats['p95'] * 1000:>9.0f} {stats['p99'] * 1000:>9.0f} "
+            f"{stats['max'] * 1000:>9.0f}"
+        )
+    for failure, count in report["failures"].items():
+        print(f"❌ {count} × {failure}")
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Scénario inconnu : {name}")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+# 👇 Exécution directe :
+#   python -m benchmarks.load --users 20 --duration 60 [--scale 1k]
+#       [--mix login=1,prenatal=3,messages=3,dashboard=2] [--think 0.2]
+# Le rapport est enregistré dans benchmarks/results/load/.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load", description="Test de charge Streamlit"
+    )
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--iterations", type=int, help="scénarios par session")
+    parser.add_argument("--scale", default="1k")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--think", type=float, default=THINK_TIME)
+    parser.add_argument("--timeout", type=float, default=RUN_TIMEOUT)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir")
+    args = parser.parse_args()
+
+    report = run_load(
+        args.users,
+        args.duration,
+        args.scale,
+        args.mix,
+        args.iterations,
+        args.think,
+        args.timeout,
+        args.seed,
+        args.workdir,
+    )
+    _print_report(report)
+    directory = os.path.join(RESULTS_DIR, "load")
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    commit = report["environment"]["commit"]
+    path = os.path.join(directory, f"{stamp}-{commit}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport enregistré : {path}")
@@ -1,5 +1,7 @@
 import os
 
+from utils.backup import backup_database
+
 # Nom du fichier à conserver
 safe_file = "data.db"
 
@@ -9,8 +11,9 @@ db_files = [f for f in os.listdir() if f.endswith(".db") and f != safe_file]
 if not db_files:
     print("✅ Aucun fichier .db à supprimer. Tout est propre.")
 else:
-    print("🧹 Suppression des fichiers suivants :")
+    print("🧹 Suppression des fichiers suivants (sauvegardés dans backups/) :")
     for file in db_files:
         print(f"  - {file}")
+        backup_database(file, label="pre-clean")
         os.remove(file)
     print("✅ Nettoyage terminé. Seul data.db est conservé.")
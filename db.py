@@ -1,6 +1,9 @@
 import sqlite3
 import bcrypt
 
+from utils.rendez_vous import migrate_rendez_vous
+from utils.storage import get_backend
+
 DB_PATH = "data.db"
 
 
@@ -39,7 +42,7 @@ def init_db():
             chart_number TEXT,
             dob TEXT,
             date_of_referral TEXT,
-            age TEXT,
+            age INTEGER,
             community_of_residence TEXT,
             status TEXT,
             referred_by TEXT,
@@ -47,7 +50,7 @@ def init_db():
             successful_first_contact TEXT,
             eligible_to_midwifery_care TEXT,
             reason_for_non_eligibility TEXT,
-            weeks_at_first_appointment TEXT,
+            weeks_at_first_appointment INTEGER,
             reason_if_never_seen TEXT
         )
     """
@@ -109,27 +112,8 @@ def init_db():
     """
     )
 
-    # Table: rendez_vous
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS rendez_vous (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            chart_number TEXT,
-            appointment_date TEXT,
-            appointment_type TEXT,
-            appointment_detail TEXT,
-            duration_minutes INTEGER,
-            attended TEXT,
-            notes TEXT,
-            user_id INTEGER,
-            created_at TEXT,
-            modified_at TEXT,
-            modified_by INTEGER,
-            FOREIGN KEY(user_id) REFERENCES users(id),
-            FOREIGN KEY(modified_by) REFERENCES users(id)
-        )
-    """
-    )
+    # Table: rendez_vous (schéma unique, utils/rendez_vous.py)
+    migrate_rendez_vous(conn)
 
 
 # Supprimer les anciennes tables
@@ -273,36 +257,27 @@ print("✅ Base de données initialisée.")
 
 
 def mettre_a_jour_photo(user_id, chemin_photo):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET photo = ? WHERE id = ?", (chemin_photo, user_id))
-    conn.commit()
-    conn.close()
+    get_backend(DB_PATH).execute(
+        "UPDATE users SET photo = ? WHERE id = ?", (chemin_photo, user_id)
+    )
 
 
 def ajouter_utilisateur(nom, email, mot_de_passe, role="utilisateur"):
     mot_de_passe_hash = bcrypt.hashpw(mot_de_passe.encode(), bcrypt.gensalt())
-    conn = get_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute(
+        get_backend(DB_PATH).execute(
             "INSERT INTO users (nom, email, mot_de_passe, role) VALUES (?, ?, ?, ?)",
             (nom, email, mot_de_passe_hash, role),
         )
-        conn.commit()
         return True
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
 
 
 def verifier_utilisateur(email, mot_de_passe):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-    user = cursor.fetchone()
-    conn.close()
+    user = get_backend(DB_PATH).fetch_one(
+        "SELECT * FROM users WHERE email = ?", (email,)
+    )
     if user and bcrypt.checkpw(mot_de_passe.encode(), user[3]):
         return user
     return None
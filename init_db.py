@@ -1,5 +1,8 @@
 import sqlite3
 
+from utils.changefeed import install_changefeed
+from utils.rendez_vous import migrate_rendez_vous
+
 DB_PATH = "data.db"
 
 
@@ -25,18 +28,8 @@ def init_db():
     """
     )
 
-    # Table: rendez_vous
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS rendez_vous (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nom TEXT,
-            date TEXT,
-            heure TEXT,
-            motif TEXT
-        )
-    """
-    )
+    # Table: rendez_vous (schéma unique, utils/rendez_vous.py)
+    migrate_rendez_vous(conn)
 
     # Table: demographics
     cursor.execute(
@@ -160,6 +153,10 @@ def init_db():
     conn.commit()
     conn.close()
 
+    # 📡 Journal des changements branché dès la création des tables : aucune
+    # écriture n'échappe au flux, même avant le premier consommateur
+    install_changefeed()
+
 
 # 👇 Exécution directe
 if __name__ == "__main__":
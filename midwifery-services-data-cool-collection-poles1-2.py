@@ -5,11 +5,21 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime, date
-import io
-from fpdf import FPDF
 import bcrypt
 import plotly.express as px
-import numpy as np
+
+from utils.charts import heatmap_counts, histogram_bins
+from utils.cohorts import build_frame, compute_panel
+from utils.exports import XLSX_MIME, create_pdf, dataframe_to_csv, dataframe_to_xlsx
+from utils.form_engine import Field, FormSchema, Step, nav_buttons, run_form
+from utils.sketches import (
+    distinct_count,
+    ensure_sketches,
+    observe,
+    quantiles,
+    year_to_date,
+)
+from utils.validation import ValidationError, validate_for_insert
 
 
 # --- Correction pour le DeprecationWarning ---
@@ -23,10 +33,13 @@ def register_adapters():
 
 
 # --- Fonctions de base de données ---
+DB_PATH = "suivi_midwifery_nouvelle.db"
+
+
 def get_db_connection():
     """Fonction pour établir la connexion à la base de données SQLite."""
     # Le nom de la base de données est inchangé pour cette mise à jour
-    conn = sqlite3.connect("suivi_midwifery_nouvelle.db")
+    conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row  # Permet d'accéder aux colonnes par leur nom
     return conn
 
@@ -45,7 +58,7 @@ def init_all_dbs():
             chart_number TEXT,
             dob TEXT,
             date_of_referral TEXT,
-            age TEXT,
+            age INTEGER,
             community_of_residence TEXT,
             status TEXT,
             referred_by TEXT,
@@ -53,7 +66,7 @@ def init_all_dbs():
             successful_first_contact TEXT,
             eligible_to_midwifery_care TEXT,
             reason_for_non_eligibility TEXT,
-            weeks_at_first_appointment TEXT,
+            weeks_at_first_appointment INTEGER,
             reason_if_never_seen TEXT
         )
     """
@@ -98,7 +111,7 @@ def init_all_dbs():
             other_transfer_reason TEXT,
             transfer_to TEXT,
             care_ended TEXT,
-            patient_age TEXT,
+            patient_age INTEGER,
             birthplace TEXT,
             detailed_appointment_type TEXT
         )
@@ -220,9 +233,31 @@ def insert_demographics_data(
     reason_for_non_eligibility,
     weeks_at_first_appointment,
     reason_if_never_seen,
+    conn=None,
 ):
-    """Insère les données démographiques dans la base de données."""
-    conn = get_db_connection()
+    """Insère les données démographiques dans la base de données.
+
+    Si `conn` est fourni, l'écriture fait partie de la transaction de
+    l'appelant (pas de commit ici).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    # Types normalisés à l'écriture : les rapports n'ont plus à convertir
+    typed = validate_for_insert(
+        conn,
+        "demographics",
+        {
+            "chart_number": chart_number,
+            "dob": dob,
+            "date_of_referral": date_of_referral,
+            "age": age,
+            "weeks_at_first_appointment": weeks_at_first_appointment,
+        },
+        own_conn,
+    )
+    dob, date_of_referral = typed["dob"], typed["date_of_referral"]
+    age, weeks_at_first_appointment = typed["age"], typed["weeks_at_first_appointment"]
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -258,8 +293,21 @@ def insert_demographics_data(
             reason_if_never_seen,
         ),
     )
-    conn.commit()
-    conn.close()
+    # Esquisses du mois (quantiles, distincts) dans la même transaction
+    observe(
+        conn,
+        "demographics",
+        {
+            "chart_number": chart_number,
+            "date_of_referral": date_of_referral,
+            "age": age,
+            "community_of_residence": community_of_residence,
+            "weeks_at_first_appointment": weeks_at_first_appointment,
+        },
+    )
+    if own_conn:
+        conn.commit()
+        conn.close()
 
 
 def get_demographics_data():
@@ -311,9 +359,30 @@ def insert_prenatal_care_data(
     patient_age,
     birthplace,
     detailed_appointment_type,
+    conn=None,
 ):
-    """Insère les données de soins prénatals dans la base de données."""
-    conn = get_db_connection()
+    """Insère les données de soins prénatals dans la base de données.
+
+    Si `conn` est fourni, l'écriture fait partie de la transaction de
+    l'appelant (pas de commit ici).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    typed = validate_for_insert(
+        conn,
+        "prenatal_care",
+        {
+            "chart_number": chart_number,
+            "date_collection": date_collection,
+            "edd_date": edd_date,
+            "bmi": bmi,
+            "patient_age": patient_age,
+        },
+        own_conn,
+    )
+    date_collection, edd_date = typed["date_collection"], typed["edd_date"]
+    bmi, patient_age = typed["bmi"], typed["patient_age"]
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -367,8 +436,9 @@ def insert_prenatal_care_data(
             detailed_appointment_type,
         ),
     )
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
 
 
 def get_prenatal_care_data():
@@ -393,6 +463,18 @@ def insert_rendez_vous(
 ):
     """Insère un nouveau rendez-vous dans la base de données."""
     conn = get_db_connection()
+    typed = validate_for_insert(
+        conn,
+        "rendez_vous",
+        {
+            "chart_number": chart_number,
+            "appointment_date": appointment_date,
+            "duration_minutes": duration_minutes,
+        },
+        own_conn=True,
+    )
+    appointment_date = typed["appointment_date"]
+    duration_minutes = typed["duration_minutes"]
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -529,538 +611,257 @@ def page_accueil():
         col3.metric("Entrées de rendez-vous", len(df_rendez_vous))
 
 
-def page_demographics():
-    st.title("👥 Données Démographiques")
-    st.markdown("---")
-    with st.form(key="demographics_form", clear_on_submit=True):
-        st.subheader("Entrée de nouvelles données démographiques")
-
-        # Variables des menus déroulants
-        community_options = [
-            "Waskaganish",
-            "Chisasibi",
-            "Eastmain",
-            "Mistissini",
-            "Nemaska",
-            "Oujé-Bougoumou",
-            "Waswanipi",
-            "Wemindji",
-            "Whapmagoostui",
-            "Other",
-        ]
-        status_options = ["Indigenous-Cree", "Indigenous-nonCree", "Non-Indigenous"]
-        referred_by_options = [
-            "Self-referral",
-            "Midwife trainee",
-            "Birth assistant",
-            "PCCR",
-            "Nurse",
-            "Doctor",
-            "Midwife",
-            "Other",
-        ]
-        reason_for_referral_options = [
-            "Information request",
-            "Complete Midwifery Care",
-            "Prenatal Care",
-            "Shared Care",
-            "Birth Preparation",
-            "Postpartum",
-            "Postpartum home doula care",
-            "Breastfeeding support",
-            "Perinatal loss support",
-            "Pap smear",
-            "STBBIs screening",
-            "Pregnancy interruption",
-            "Birth control",
-            "Other",
-        ]
-        contact_options = ["Yes", "No", "Never reached", "N/A"]
-        eligible_options = ["Yes", "No", "N/A"]
-        weeks_options = [
-            "<12 weeks",
-            "12 to 20 weeks",
-            ">20 weeks",
-            "Postpartum",
-            "Non-pregnant",
-            "Never seen",
-            "N/A",
-        ]
-        never_seen_options = [
-            "Early pregnancy loss",
-            "Termination of pregnancy",
-            "Never came to appointments",
-            "Declines Midwifery care",
-            "Moved elsewhere",
-            "Unknown",
-            "N/A",
-        ]
-
-        # Champs du formulaire
-        chart_number = st.text_input("Numéro de dossier")
-        dob = st.date_input("Date de naissance du client (DOB) YYYY-MM-DD", value=None)
-        date_of_referral = st.date_input("Date de référence YYYY-MM-DD", value=None)
-        age = st.text_input("Âge (YY)")
-
-        community_of_residence = st.selectbox(
-            "Communauté de résidence", options=[""] + community_options
-        )
-        status = st.selectbox("Statut", options=[""] + status_options)
-        referred_by = st.selectbox("Référence par", options=[""] + referred_by_options)
-        reason_for_referral = st.selectbox(
-            "Raison de la référence", options=[""] + reason_for_referral_options
-        )
-        successful_first_contact = st.selectbox(
-            "Premier contact réussi", options=[""] + contact_options
-        )
-        eligible_to_midwifery_care = st.selectbox(
-            "Éligible aux soins de sage-femme ?", options=[""] + eligible_options
-        )
-        reason_for_non_eligibility = st.text_area(
-            "Raison de la non-éligibilité (texte libre)"
-        )
-        weeks_at_first_appointment = st.selectbox(
-            "Nombre de semaines au 1er rendez-vous", options=[""] + weeks_options
-        )
-        reason_if_never_seen = st.selectbox(
-            "Raison si jamais vu", options=[""] + never_seen_options
-        )
-
-        submitted = st.form_submit_button("Soumettre")
-
-        if submitted:
-            # Conversion des dates en chaînes de caractères
-            dob_str = dob if dob else None
-            date_of_referral_str = date_of_referral if date_of_referral else None
-
-            insert_demographics_data(
-                chart_number,
-                dob_str,
-                date_of_referral_str,
-                age,
-                community_of_residence,
-                status,
-                referred_by,
-                reason_for_referral,
-                successful_first_contact,
-                eligible_to_midwifery_care,
-                reason_for_non_eligibility,
-                weeks_at_first_appointment,
-                reason_if_never_seen,
-            )
-            st.success("✅ Formulaire soumis et enregistré avec succès !")
-            st.rerun()
-
-    st.markdown("---")
-    st.subheader("Historique des données démographiques")
-    df_demographics = get_demographics_data()
-    if not df_demographics.empty:
-        st.dataframe(df_demographics)
-    else:
-        st.info("Aucune donnée démographique n'a encore été enregistrée.")
-
-
-def page_prenatal_care():
-    st.title("🤰 Soins Prénatals")
-    st.write("Veuillez saisir les informations de la patiente.")
-
-    champs = [
-        "chart_number",
-        "date_collection",
-        "gpa",
-        "edd_date",
-        "tobacco_use",
-        "substance_use",
-        "bmi",
-        "ce_cle_status",
-        "racism",
-        "domestic_violence",
-        "housing",
-        "pregnancy_loss",
-        "previous_c_section",
-        "previous_vbac",
-        "high_risk_pe",
-        "gdm",
-        "anemia",
-        "stbbis",
-        "trainee_involved",
-        "referral_worker",
-        "prenatal_consultation",
-        "reason1",
-        "made_with1",
-        "reason2",
-        "made_with2",
-        "reason3",
-        "made_with3",
-        "notes",
-        "telehealth",
-        "shared_care",
-        "transfer_care",
-        "other_transfer_reason",
-        "transfer_to",
-        "care_ended",
-        "patient_age",
-        "birthplace",
-        "detailed_appointment_type",
-    ]
-    for champ in champs:
-        if champ not in st.session_state:
-            st.session_state[champ] = None
-
-    with st.form("prenatal_care_form", clear_on_submit=True):
-        st.subheader("Informations de base")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.session_state.chart_number = st.text_input(
-                "Numéro de dossier", value=st.session_state.chart_number or ""
-            )
-        with col2:
-            st.session_state.date_collection = st.date_input(
-                "Date de la collecte",
-                value=st.session_state.date_collection or date.today(),
-            )
-        with col3:
-            st.session_state.gpa = st.text_input(
-                "GPA (texte libre)", value=st.session_state.gpa or ""
-            )
-
-        col4, col5, col6, col7 = st.columns(4)
-        with col4:
-            st.session_state.edd_date = st.date_input(
-                "Date prévue d'accouchement (EDD)",
-                value=st.session_state.edd_date or date.today(),
-            )
-        with col5:
-            st.session_state.tobacco_use = st.selectbox(
-                "Consommation de tabac",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.tobacco_use
-                    else ["", "Oui", "Non"].index(st.session_state.tobacco_use)
+# 🧾 Options des menus déroulants (démographie)
+COMMUNITY_OPTIONS = [
+    "Waskaganish",
+    "Chisasibi",
+    "Eastmain",
+    "Mistissini",
+    "Nemaska",
+    "Oujé-Bougoumou",
+    "Waswanipi",
+    "Wemindji",
+    "Whapmagoostui",
+    "Other",
+]
+STATUS_OPTIONS = ["Indigenous-Cree", "Indigenous-nonCree", "Non-Indigenous"]
+REFERRED_BY_OPTIONS = [
+    "Self-referral",
+    "Midwife trainee",
+    "Birth assistant",
+    "PCCR",
+    "Nurse",
+    "Doctor",
+    "Midwife",
+    "Other",
+]
+REASON_FOR_REFERRAL_OPTIONS = [
+    "Information request",
+    "Complete Midwifery Care",
+    "Prenatal Care",
+    "Shared Care",
+    "Birth Preparation",
+    "Postpartum",
+    "Postpartum home doula care",
+    "Breastfeeding support",
+    "Perinatal loss support",
+    "Pap smear",
+    "STBBIs screening",
+    "Pregnancy interruption",
+    "Birth control",
+    "Other",
+]
+CONTACT_OPTIONS = ["Yes", "No", "Never reached", "N/A"]
+ELIGIBLE_OPTIONS = ["Yes", "No", "N/A"]
+NEVER_SEEN_OPTIONS = [
+    "Early pregnancy loss",
+    "Termination of pregnancy",
+    "Never came to appointments",
+    "Declines Midwifery care",
+    "Moved elsewhere",
+    "Unknown",
+    "N/A",
+]
+OUI_NON = ["", "Oui", "Non"]
+
+
+def oui_non(name, label):
+    return Field(name, label, "select", options=OUI_NON)
+
+
+def save_demographics(conn, values):
+    insert_demographics_data(**values, conn=conn)
+
+
+def save_prenatal_care(conn, values):
+    insert_prenatal_care_data(**values, conn=conn)
+
+
+# 📋 Formulaires déclaratifs : une étape affichée à la fois, une seule
+# transaction à la soumission finale.
+DEMOGRAPHICS_FORM = FormSchema(
+    form_id="demographics",
+    connect=get_db_connection,
+    on_submit=save_demographics,
+    steps=(
+        Step(
+            "Identification",
+            (
+                Field("chart_number", "Numéro de dossier", required=True),
+                Field("dob", "Date de naissance du client (DOB) YYYY-MM-DD", "date"),
+                Field("date_of_referral", "Date de référence YYYY-MM-DD", "date"),
+                Field("age", "Âge (YY)"),
+                Field(
+                    "community_of_residence",
+                    "Communauté de résidence",
+                    "select",
+                    options=[""] + COMMUNITY_OPTIONS,
                 ),
-            )
-        with col6:
-            st.session_state.substance_use = st.selectbox(
-                "Consommation de substances pendant la grossesse",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.substance_use
-                    else ["", "Oui", "Non"].index(st.session_state.substance_use)
-                ),
-            )
-        with col7:
-            st.session_state.bmi = st.number_input(
-                "IMC",
-                min_value=0.0,
-                step=0.1,
-                value=float(st.session_state.bmi) if st.session_state.bmi else 0.0,
-            )
-
-        st.subheader("Antécédents et Risques")
-        col8, col9, col10 = st.columns(3)
-        with col8:
-            st.session_state.ce_cle_status = st.selectbox(
-                "Statut CE CLE",
-                ["", "Positif", "Négatif"],
-                index=(
-                    0
-                    if not st.session_state.ce_cle_status
-                    else ["", "Positif", "Négatif"].index(
-                        st.session_state.ce_cle_status
-                    )
+                Field("status", "Statut", "select", options=[""] + STATUS_OPTIONS),
+            ),
+            columns=2,
+        ),
+        Step(
+            "Référence et suivi",
+            (
+                Field(
+                    "referred_by",
+                    "Référence par",
+                    "select",
+                    options=[""] + REFERRED_BY_OPTIONS,
                 ),
-            )
-        with col9:
-            st.session_state.racism = st.selectbox(
-                "Expérience de racisme",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.racism
-                    else ["", "Oui", "Non"].index(st.session_state.racism)
+                Field(
+                    "reason_for_referral",
+                    "Raison de la référence",
+                    "select",
+                    options=[""] + REASON_FOR_REFERRAL_OPTIONS,
                 ),
-            )
-        with col10:
-            st.session_state.domestic_violence = st.selectbox(
-                "Violence domestique",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.domestic_violence
-                    else ["", "Oui", "Non"].index(st.session_state.domestic_violence)
+                Field(
+                    "successful_first_contact",
+                    "Premier contact réussi",
+                    "select",
+                    options=[""] + CONTACT_OPTIONS,
                 ),
-            )
-
-        col11, col12, col13 = st.columns(3)
-        with col11:
-            st.session_state.housing = st.selectbox(
-                "Défis de logement",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.housing
-                    else ["", "Oui", "Non"].index(st.session_state.housing)
+                Field(
+                    "eligible_to_midwifery_care",
+                    "Éligible aux soins de sage-femme ?",
+                    "select",
+                    options=[""] + ELIGIBLE_OPTIONS,
                 ),
-            )
-        with col12:
-            st.session_state.pregnancy_loss = st.selectbox(
-                "Perte de grossesse",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.pregnancy_loss
-                    else ["", "Oui", "Non"].index(st.session_state.pregnancy_loss)
+                Field(
+                    "reason_for_non_eligibility",
+                    "Raison de la non-éligibilité (texte libre)",
+                    "textarea",
                 ),
-            )
-        with col13:
-            st.session_state.previous_c_section = st.selectbox(
-                "Césarienne antérieure",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.previous_c_section
-                    else ["", "Oui", "Non"].index(st.session_state.previous_c_section)
+                Field(
+                    "weeks_at_first_appointment",
+                    "Semaines de grossesse au 1er rendez-vous (vide si sans objet)",
                 ),
-            )
-
-        col14, col15, col16, col17 = st.columns(4)
-        with col14:
-            st.session_state.previous_vbac = st.selectbox(
-                "VBAC antérieur",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.previous_vbac
-                    else ["", "Oui", "Non"].index(st.session_state.previous_vbac)
+                Field(
+                    "reason_if_never_seen",
+                    "Raison si jamais vu",
+                    "select",
+                    options=[""] + NEVER_SEEN_OPTIONS,
                 ),
-            )
-        with col15:
-            st.session_state.high_risk_pe = st.selectbox(
-                "Risque élevé de pré-éclampsie",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.high_risk_pe
-                    else ["", "Oui", "Non"].index(st.session_state.high_risk_pe)
+            ),
+        ),
+    ),
+)
+
+PRENATAL_CARE_FORM = FormSchema(
+    form_id="prenatal_care",
+    connect=get_db_connection,
+    on_submit=save_prenatal_care,
+    submit_label="📤 Soumettre le formulaire de soins prénatals",
+    steps=(
+        Step(
+            "Informations de base",
+            (
+                Field("chart_number", "Numéro de dossier", required=True),
+                Field(
+                    "date_collection",
+                    "Date de la collecte",
+                    "date",
+                    default=date.today,
                 ),
-            )
-        with col16:
-            st.session_state.gdm = st.selectbox(
-                "Diabète gestationnel (GDM)",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.gdm
-                    else ["", "Oui", "Non"].index(st.session_state.gdm)
+                Field("gpa", "GPA (texte libre)"),
+                Field(
+                    "edd_date",
+                    "Date prévue d'accouchement (EDD)",
+                    "date",
+                    default=date.today,
                 ),
-            )
-        with col17:
-            st.session_state.anemia = st.selectbox(
-                "Anémie en grossesse",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.anemia
-                    else ["", "Oui", "Non"].index(st.session_state.anemia)
+                oui_non("tobacco_use", "Consommation de tabac"),
+                oui_non(
+                    "substance_use", "Consommation de substances pendant la grossesse"
                 ),
-            )
-        st.session_state.stbbis = st.selectbox(
-            "IST en grossesse",
-            ["", "Oui", "Non"],
-            index=(
-                0
-                if not st.session_state.stbbis
-                else ["", "Oui", "Non"].index(st.session_state.stbbis)
+                Field("bmi", "IMC", "float", min_value=0.0, step=0.1),
             ),
-        )
-
-        st.subheader("Consultations et Références")
-        col18, col19 = st.columns(2)
-        with col18:
-            st.session_state.trainee_involved = st.selectbox(
-                "Stagiaire impliqué",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.trainee_involved
-                    else ["", "Oui", "Non"].index(st.session_state.trainee_involved)
-                ),
-            )
-        with col19:
-            st.session_state.referral_worker = st.selectbox(
-                "Référence à un autre professionnel",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.referral_worker
-                    else ["", "Oui", "Non"].index(st.session_state.referral_worker)
-                ),
-            )
-
-        st.markdown("---")
-        col20, col21, col22 = st.columns(3)
-        with col20:
-            st.session_state.prenatal_consultation = st.selectbox(
-                "Consultation médicale prénatale ?",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.prenatal_consultation
-                    else ["", "Oui", "Non"].index(
-                        st.session_state.prenatal_consultation
-                    )
+            columns=3,
+        ),
+        Step(
+            "Antécédents et Risques",
+            (
+                Field(
+                    "ce_cle_status",
+                    "Statut CE CLE",
+                    "select",
+                    options=["", "Positif", "Négatif"],
                 ),
-            )
-
-        st.subheader("Raison de la consultation (si applicable)")
-        col23, col24 = st.columns(2)
-        with col23:
-            st.session_state.reason1 = st.text_input(
-                "Raison 1", value=st.session_state.reason1 or ""
-            )
-        with col24:
-            st.session_state.made_with1 = st.text_input(
-                "Effectuée avec 1", value=st.session_state.made_with1 or ""
-            )
-
-        col25, col26 = st.columns(2)
-        with col25:
-            st.session_state.reason2 = st.text_input(
-                "Raison 2", value=st.session_state.reason2 or ""
-            )
-        with col26:
-            st.session_state.made_with2 = st.text_input(
-                "Effectuée avec 2", value=st.session_state.made_with2 or ""
-            )
+                oui_non("racism", "Expérience de racisme"),
+                oui_non("domestic_violence", "Violence domestique"),
+                oui_non("housing", "Défis de logement"),
+                oui_non("pregnancy_loss", "Perte de grossesse"),
+                oui_non("previous_c_section", "Césarienne antérieure"),
+                oui_non("previous_vbac", "VBAC antérieur"),
+                oui_non("high_risk_pe", "Risque élevé de pré-éclampsie"),
+                oui_non("gdm", "Diabète gestationnel (GDM)"),
+                oui_non("anemia", "Anémie en grossesse"),
+                oui_non("stbbis", "IST en grossesse"),
+            ),
+            columns=3,
+        ),
+        Step(
+            "Consultations et Références",
+            (
+                oui_non("trainee_involved", "Stagiaire impliqué"),
+                oui_non("referral_worker", "Référence à un autre professionnel"),
+                oui_non("prenatal_consultation", "Consultation médicale prénatale ?"),
+                Field("reason1", "Raison 1"),
+                Field("made_with1", "Effectuée avec 1"),
+                Field("reason2", "Raison 2"),
+                Field("made_with2", "Effectuée avec 2"),
+                Field("reason3", "Raison 3"),
+                Field("made_with3", "Effectuée avec 3"),
+            ),
+            columns=3,
+        ),
+        Step(
+            "Notes et Fin de Soins",
+            (
+                Field("notes", "Notes", "textarea"),
+                oui_non("telehealth", "Télésanté"),
+                oui_non("shared_care", "Soins partagés"),
+                oui_non("transfer_care", "Transfert de soins"),
+                Field("other_transfer_reason", "Autre raison de transfert"),
+                Field("transfer_to", "Transféré à"),
+                oui_non("care_ended", "Soins terminés"),
+            ),
+        ),
+        Step(
+            "Informations supplémentaires",
+            (
+                Field("patient_age", "Âge de la patiente"),
+                Field("birthplace", "Lieu de naissance"),
+                Field("detailed_appointment_type", "Type de rendez-vous détaillé"),
+            ),
+            columns=3,
+        ),
+    ),
+)
 
-        col27, col28 = st.columns(2)
-        with col27:
-            st.session_state.reason3 = st.text_input(
-                "Raison 3", value=st.session_state.reason3 or ""
-            )
-        with col28:
-            st.session_state.made_with3 = st.text_input(
-                "Effectuée avec 3", value=st.session_state.made_with3 or ""
-            )
 
-        st.subheader("Notes et Fin de Soins")
-        st.session_state.notes = st.text_area(
-            "Notes", value=st.session_state.notes or ""
-        )
+def page_demographics():
+    st.title("👥 Données Démographiques")
+    st.markdown("---")
+    st.subheader("Entrée de nouvelles données démographiques")
+    if run_form(DEMOGRAPHICS_FORM):
+        st.success("✅ Formulaire soumis et enregistré avec succès !")
 
-        col29, col30, col31, col32, col33, col34 = st.columns(6)
-        with col29:
-            st.session_state.telehealth = st.selectbox(
-                "Télésanté",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.telehealth
-                    else ["", "Oui", "Non"].index(st.session_state.telehealth)
-                ),
-            )
-        with col30:
-            st.session_state.shared_care = st.selectbox(
-                "Soins partagés",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.shared_care
-                    else ["", "Oui", "Non"].index(st.session_state.shared_care)
-                ),
-            )
-        with col31:
-            st.session_state.transfer_care = st.selectbox(
-                "Transfert de soins",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.transfer_care
-                    else ["", "Oui", "Non"].index(st.session_state.transfer_care)
-                ),
-            )
-        with col32:
-            st.session_state.other_transfer_reason = st.text_input(
-                "Autre raison de transfert",
-                value=st.session_state.other_transfer_reason or "",
-            )
-        with col33:
-            st.session_state.transfer_to = st.text_input(
-                "Transféré à", value=st.session_state.transfer_to or ""
-            )
-        with col34:
-            st.session_state.care_ended = st.selectbox(
-                "Soins terminés",
-                ["", "Oui", "Non"],
-                index=(
-                    0
-                    if not st.session_state.care_ended
-                    else ["", "Oui", "Non"].index(st.session_state.care_ended)
-                ),
-            )
+    st.markdown("---")
+    st.subheader("Historique des données démographiques")
+    df_demographics = get_demographics_data()
+    if not df_demographics.empty:
+        st.dataframe(df_demographics)
+    else:
+        st.info("Aucune donnée démographique n'a encore été enregistrée.")
 
-        # Nouveaux champs
-        st.subheader("Informations supplémentaires")
-        col35, col36, col37 = st.columns(3)
-        with col35:
-            st.session_state.patient_age = st.text_input(
-                "Âge de la patiente", value=st.session_state.patient_age or ""
-            )
-        with col36:
-            st.session_state.birthplace = st.text_input(
-                "Lieu de naissance", value=st.session_state.birthplace or ""
-            )
-        with col37:
-            st.session_state.detailed_appointment_type = st.text_input(
-                "Type de rendez-vous détaillé",
-                value=st.session_state.detailed_appointment_type or "",
-            )
 
-        submitted = st.form_submit_button("Soumettre le formulaire de soins prénatals")
-        if submitted:
-            insert_prenatal_care_data(
-                st.session_state.chart_number,
-                st.session_state.date_collection,
-                st.session_state.gpa,
-                st.session_state.edd_date,
-                st.session_state.tobacco_use,
-                st.session_state.substance_use,
-                st.session_state.bmi,
-                st.session_state.ce_cle_status,
-                st.session_state.racism,
-                st.session_state.domestic_violence,
-                st.session_state.housing,
-                st.session_state.pregnancy_loss,
-                st.session_state.previous_c_section,
-                st.session_state.previous_vbac,
-                st.session_state.high_risk_pe,
-                st.session_state.gdm,
-                st.session_state.anemia,
-                st.session_state.stbbis,
-                st.session_state.trainee_involved,
-                st.session_state.referral_worker,
-                st.session_state.prenatal_consultation,
-                st.session_state.reason1,
-                st.session_state.made_with1,
-                st.session_state.reason2,
-                st.session_state.made_with2,
-                st.session_state.reason3,
-                st.session_state.made_with3,
-                st.session_state.notes,
-                st.session_state.telehealth,
-                st.session_state.shared_care,
-                st.session_state.transfer_care,
-                st.session_state.other_transfer_reason,
-                st.session_state.transfer_to,
-                st.session_state.care_ended,
-                st.session_state.patient_age,
-                st.session_state.birthplace,
-                st.session_state.detailed_appointment_type,
-            )
-            st.success("✅ Formulaire soumis et enregistré avec succès !")
-            st.rerun()
+def page_prenatal_care():
+    st.title("🤰 Soins Prénatals")
+    st.write("Veuillez saisir les informations de la patiente.")
+    if run_form(PRENATAL_CARE_FORM):
+        st.success("✅ Formulaire soumis et enregistré avec succès !")
 
     st.markdown("---")
     st.subheader("Historique des données de soins prénatals")
@@ -1108,17 +909,21 @@ def page_rendez_vous():
             appointment_date_str = appointment_date if appointment_date else None
 
             if chart_number and appointment_date_str and appointment_type:
-                insert_rendez_vous(
-                    chart_number,
-                    appointment_date_str,
-                    appointment_type,
-                    appointment_detail,
-                    duration_minutes,
-                    attended,
-                    notes,
-                )
-                st.success("✅ Rendez-vous enregistré avec succès !")
-                st.rerun()
+                try:
+                    insert_rendez_vous(
+                        chart_number,
+                        appointment_date_str,
+                        appointment_type,
+                        appointment_detail,
+                        duration_minutes,
+                        attended,
+                        notes,
+                    )
+                except ValidationError as e:
+                    st.error(f"❌ Rendez-vous refusé (mis en quarantaine) : {e}")
+                else:
+                    st.success("✅ Rendez-vous enregistré avec succès !")
+                    st.rerun()
             else:
                 st.error(
                     "Veuillez remplir au moins le numéro de dossier, la date et le type de rendez-vous."
@@ -1248,71 +1053,17 @@ def navigation_buttons():
     page_names = list(PAGES.keys())
     current_index = page_names.index(st.session_state.current_page)
 
-    col1, col2 = st.columns(2)
-    with col1:
-        # Bouton "Précédent", désactivé sur la première page
-        if st.button("⬅️ Précédent", disabled=(current_index == 0)):
-            st.session_state.current_page = page_names[current_index - 1]
-            st.rerun()
-    with col2:
-        # Bouton "Suivant", désactivé sur la dernière page
-        if st.button("Suivant ➡️", disabled=(current_index == len(page_names) - 1)):
-            st.session_state.current_page = page_names[current_index + 1]
-            st.rerun()
+    move = nav_buttons(current_index, len(page_names), key="page_nav")
+    if move:
+        st.session_state.current_page = page_names[current_index + move]
+        st.rerun()
 
 
 # =====================================================================
-# ---- FONCTIONS DE RAPPORTS FPDF AVEC LE CORRECTIF ----
+# ---- PAGE RAPPORTS (PDF, CSV et Excel : utils/exports.py) ----
 # =====================================================================
 
 
-class PDF(FPDF):
-    """
-    Classe personnalisée pour FPDF, ajoutant un en-tête et un pied de page
-    pour une mise en forme cohérente.
-    """
-
-    def __init__(self, title, orientation="P", unit="mm", format="A4"):
-        super().__init__(orientation, unit, format)
-        self.title = title
-
-    def header(self):
-        # Logo ou autre image de l'en-tête
-        # self.image('logo.png', 10, 8, 33)
-        # Police Arial gras 15
-        self.set_font("Arial", "B", 15)
-        # Décalage vers la droite
-        self.cell(80)
-        # Titre
-        self.cell(30, 10, self.title, 0, 1, "C")
-        # Saut de ligne
-        self.ln(20)
-
-    def footer(self):
-        # Positionnement à 1.5 cm du bas
-        self.set_y(-15)
-        # Police Arial italique 8
-        self.set_font("Arial", "I", 8)
-        # Numéro de page
-        self.cell(0, 10, f"Page {self.page_no()}/{{nb}}", 0, 0, "C")
-
-
-def create_pdf(title, content):
-    """
-    Génère un PDF avec le titre et le contenu spécifiés en utilisant une approche
-    qui contourne l'erreur de type.
-    """
-    pdf = PDF(title)
-    pdf.alias_nb_pages()
-    pdf.add_page()
-    pdf.set_font("Times", size=12)
-    pdf.multi_cell(0, 10, content)
-
-    # Utilise 'S' pour obtenir la sortie sous forme de chaîne de caractères
-    # puis encode la chaîne en bytes pour Streamlit.
-    return pdf.output(dest="S").encode("latin-1")
-
-
 def page_rapports():
     """
     Fonction de la page "Rapports" avec un exemple de génération de PDF et un graphique.
@@ -1330,13 +1081,18 @@ def page_rapports():
     # Ajout d'un graphique de démonstration
     if not df_demographics.empty:
         st.subheader("Distribution des âges")
-        # Utilisation de Plotly pour une visualisation interactive
+        # Utilisation de Plotly pour une visualisation interactive ; classes
+        # comptées ici (utils/charts.py), seules les barres partent au navigateur
         try:
-            fig = px.histogram(
-                df_demographics,
-                x="age",
+            age_bins = histogram_bins(df_demographics.get("age"), bins=20)
+            fig = px.bar(
+                age_bins,
+                x="center",
+                y="count",
+                labels={"center": "Âge", "count": "Nombre de patientes"},
                 title="Distribution des âges des patientes",
             )
+            fig.update_layout(bargap=0.05)
             st.plotly_chart(fig)
         except Exception as e:
             st.warning(f"Impossible de générer le graphique d'âge : {e}")
@@ -1369,25 +1125,19 @@ def page_rapports():
     st.markdown("**Télécharger les données démographiques :**")
     if not df_demographics.empty:
         # Bouton de téléchargement CSV
-        csv_buffer = df_demographics.to_csv(index=False, encoding="utf-8-sig")
         st.download_button(
             label="Télécharger en .csv",
-            data=csv_buffer,
+            data=dataframe_to_csv(df_demographics, "utf-8-sig"),
             file_name="donnees_demographiques.csv",
             mime="text/csv",
         )
 
         # Bouton de téléchargement Excel (.xlsx)
-        xlsx_buffer = io.BytesIO()
-        with pd.ExcelWriter(xlsx_buffer, engine="xlsxwriter") as writer:
-            df_demographics.to_excel(
-                writer, index=False, sheet_name="Données Démographiques"
-            )
         st.download_button(
             label="Télécharger en .xlsx",
-            data=xlsx_buffer.getvalue(),
+            data=dataframe_to_xlsx(df_demographics, "Données Démographiques"),
             file_name="donnees_demographiques.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=XLSX_MIME,
         )
 
         # Analyse et visualisation
@@ -1397,35 +1147,38 @@ def page_rapports():
         # Exemple d'analyse avec Pandas et Numpy
         st.markdown("**Analyse descriptive simple**")
         st.write(f"Nombre total de patients : {len(df_demographics)}")
-        if (
-            "age" in df_demographics.columns
-            and pd.to_numeric(df_demographics["age"], errors="coerce").notna().any()
-        ):
-            df_demographics["age"] = pd.to_numeric(
-                df_demographics["age"], errors="coerce"
-            )
-            df_demographics.dropna(subset=["age"], inplace=True)
-            mean_age = np.mean(df_demographics["age"])
-            st.write(f"Âge moyen des patients : {mean_age:.2f} ans")
-            st.write(
-                f"Âge médian des patients : {df_demographics['age'].median():.2f} ans"
-            )
-            st.write(
-                f"Âge le plus fréquent (mode) : {df_demographics['age'].mode()[0]:.2f} ans"
-            )
-            st.write(f"Écart-type des âges : {df_demographics['age'].std():.2f} ans")
-            st.write(f"Variance des âges : {df_demographics['age'].var():.2f}")
-            st.write(
-                f"Quartile 25% (Q1) des âges : {df_demographics['age'].quantile(0.25):.2f} ans"
-            )
-            st.write(
-                f"Quartile 75% (Q3) des âges : {df_demographics['age'].quantile(0.75):.2f} ans"
-            )
+        # Statistiques de l'âge en une passe (utils/cohorts.py) ; le panneau
+        # complet par communauté, année et source est sur la page Indicateurs
+        panel = compute_panel(build_frame(df_demographics), by=())
+        ages = panel.set_index("indicator").loc["age"]
+        if ages["n"] > 0:
+            st.write(f"Âge moyen des patients : {ages['mean']:.2f} ans")
+            st.write(f"Âge médian des patients : {ages['median']:.2f} ans")
+            st.write(f"Âge le plus fréquent (mode) : {ages['mode']:.2f} ans")
+            st.write(f"Écart-type des âges : {ages['std']:.2f} ans")
+            st.write(f"Variance des âges : {ages['var']:.2f}")
+            st.write(f"Quartile 25% (Q1) des âges : {ages['q1']:.2f} ans")
+            st.write(f"Quartile 75% (Q3) des âges : {ages['q3']:.2f} ans")
         else:
             st.warning(
                 "La colonne 'age' ne contient pas de données numériques valides."
             )
 
+        # Depuis le 1er janvier : fusion des esquisses mensuelles tenues à
+        # l'insertion (utils/sketches.py), sans relire la table
+        ytd_start, ytd_end = year_to_date()
+        ytd_ages = quantiles("age", start=ytd_start, end=ytd_end, db_path=DB_PATH)
+        st.markdown(f"**Depuis le 1er janvier ({ytd_start} → {ytd_end})**")
+        if not pd.isna(ytd_ages[0.5]):
+            st.write(
+                f"Âge médian : {ytd_ages[0.5]:.0f} ans "
+                f"(Q1 {ytd_ages[0.25]:.0f}, Q3 {ytd_ages[0.75]:.0f})"
+            )
+        patients = distinct_count("patients", ytd_start, ytd_end, DB_PATH)
+        communities = distinct_count("communities", ytd_start, ytd_end, DB_PATH)
+        st.write(f"Patientes distinctes : ≈ {patients}")
+        st.write(f"Communautés distinctes : ≈ {communities}")
+
         if "community_of_residence" in df_demographics.columns:
             st.write(
                 f"Communauté de résidence la plus fréquente : {df_demographics['community_of_residence'].mode()[0]}"
@@ -1435,12 +1188,8 @@ def page_rapports():
             "age" in df_demographics.columns
             and "weeks_at_first_appointment" in df_demographics.columns
         ):
-            # Calcul de la corrélation
+            # Calcul de la corrélation (colonnes INTEGER)
             try:
-                # S'assurer que les colonnes sont numériques
-                df_demographics["age"] = pd.to_numeric(
-                    df_demographics["age"], errors="coerce"
-                )
                 correlation = (
                     df_demographics[["age", "weeks_at_first_appointment"]]
                     .corr()
@@ -1458,12 +1207,17 @@ def page_rapports():
 
         # Visualisation avec Matplotlib
         st.markdown("**Visualisation avec Matplotlib (Histogramme)**")
-        if (
-            "age" in df_demographics.columns
-            and not df_demographics["age"].isnull().all()
-        ):
+        age_bins = histogram_bins(df_demographics.get("age"), bins=10)
+        if not age_bins.empty:
             fig, ax = plt.subplots()
-            ax.hist(df_demographics["age"], bins=10, color="skyblue", edgecolor="black")
+            ax.bar(
+                age_bins["left"],
+                age_bins["count"],
+                width=age_bins["right"] - age_bins["left"],
+                align="edge",
+                color="skyblue",
+                edgecolor="black",
+            )
             ax.set_title("Distribution des âges")
             ax.set_xlabel("Âge")
             ax.set_ylabel("Nombre de patients")
@@ -1476,22 +1230,15 @@ def page_rapports():
         # Visualisation avec Plotly (Heatmap)
         st.markdown("---")
         st.markdown("**Visualisation avec Plotly (Carte de chaleur)**")
-        if (
-            "age" in df_demographics.columns
+        # Effectifs âge × semaines comptés ici (utils/charts.py) : au plus
+        # 60 × 60 cases, quel que soit le nombre de patientes
+        heatmap_data = (
+            heatmap_counts(df_demographics, x="weeks_at_first_appointment", y="age")
+            if "age" in df_demographics.columns
             and "weeks_at_first_appointment" in df_demographics.columns
-            and not df_demographics[["age", "weeks_at_first_appointment"]]
-            .isnull()
-            .any()
-            .any()
-        ):
-            # Création du DataFrame pour la heatmap
-            heatmap_data = df_demographics.pivot_table(
-                index="age",
-                columns="weeks_at_first_appointment",
-                aggfunc="size",
-                fill_value=0,
-            )
-
+            else pd.DataFrame()
+        )
+        if not heatmap_data.empty:
             fig = px.imshow(
                 heatmap_data,
                 labels=dict(
@@ -1577,4 +1324,5 @@ def main():
 if __name__ == "__main__":
     register_adapters()  # Appel de la fonction de correction avant toute opération sur la BD
     init_all_dbs()
+    ensure_sketches(DB_PATH)  # avant toute observation des insertions
     main()
@@ -7,10 +7,27 @@ import matplotlib.pyplot as plt
 import plotly.express as px
 import numpy as np
 from datetime import datetime
-from fpdf import FPDF
 import bcrypt
-import io
 from utils import load_data, filter_data
+from utils.charts import (
+    category_counts,
+    downsample_series,
+    histogram_bins,
+    payload_detail,
+    scatter_points,
+)
+from utils.exports import XLSX_MIME, dataframe_to_csv, dataframe_to_xlsx, generate_pdf
+from utils.perf import begin_page, overlay_visible, render_overlay, span
+from utils.sketches import (
+    distinct_count,
+    ensure_sketches,
+    observe,
+    quantiles,
+    year_to_date,
+)
+from utils.stats import correlation_matrix, describe_with_median, monthly_counts
+from utils.storage import get_backend
+from utils.writer import WritePending, write, write_transaction
 
 # ------------------ CONFIG ------------------
 st.set_page_config(page_title="Sage-Femme | Collecte", layout="wide")
@@ -20,6 +37,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded",
 )
+begin_page("midwives_Statistics")
 
 with st.sidebar:
     st.image(
@@ -52,31 +70,38 @@ filtered_df = filter_data(df, region, date_range, service)
 st.dataframe(filtered_df)
 
 # ------------------ DATABASE ------------------
-conn = sqlite3.connect("midwifery.db", check_same_thread=False)
+# Lectures sur une connexion propre à chaque rerun (le script est réexécuté
+# dans le thread de la session) ; écritures confiées à l'écrivain unique de
+# midwifery.db (utils/writer.py), qui les valide par lots
+MIDWIFERY_DB = "midwifery.db"
+conn = sqlite3.connect(MIDWIFERY_DB, timeout=30)
 cursor = conn.cursor()
 
-cursor.execute(
-    """
-CREATE TABLE IF NOT EXISTS users (
-    username TEXT PRIMARY KEY,
-    password BLOB
-)
-"""
-)
 
-cursor.execute(
+def create_tables(conn):
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        password BLOB
+    )
     """
-CREATE TABLE IF NOT EXISTS patients (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    age INTEGER,
-    service TEXT,
-    pole TEXT,
-    date TEXT
-)
-"""
-)
-conn.commit()
+    )
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS patients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        age INTEGER,
+        service TEXT,
+        pole TEXT,
+        date TEXT
+    )
+    """
+    )
+
+
+write_transaction(create_tables, MIDWIFERY_DB)
 
 
 # ------------------ AUTH ------------------
@@ -91,10 +116,11 @@ def check_password(password, hashed):
 def register_user(username, password):
     hashed = hash_password(password)
     try:
-        cursor.execute(
-            "INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed)
+        write(
+            "INSERT INTO users (username, password) VALUES (?, ?)",
+            (username, hashed),
+            MIDWIFERY_DB,
         )
-        conn.commit()
         return True
     except sqlite3.IntegrityError:
         return False
@@ -108,17 +134,6 @@ def authenticate(username, password):
     return False
 
 
-# ------------------ PDF EXPORT ------------------
-def generate_pdf(data_dict):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="Rapport Sage-Femme", ln=True, align="C")
-    for key, value in data_dict.items():
-        pdf.cell(200, 10, txt=f"{key}: {value}", ln=True)
-    return pdf.output(dest="S").encode("latin-1")
-
-
 # ------------------ SESSION ------------------
 if "page" not in st.session_state:
     st.session_state.page = "login"
@@ -147,10 +162,15 @@ def login_page():
     new_user = st.text_input("Nouvel utilisateur")
     new_pass = st.text_input("Mot de passe", type="password", key="new_pass")
     if st.button("Créer un compte"):
-        if register_user(new_user, new_pass):
-            st.success("Compte créé. Vous pouvez vous connecter.")
+        try:
+            created = register_user(new_user, new_pass)
+        except WritePending:
+            st.info("⏳ Création du compte en attente : réessayez de vous connecter.")
         else:
-            st.error("Ce nom d'utilisateur existe déjà.")
+            if created:
+                st.success("Compte créé. Vous pouvez vous connecter.")
+            else:
+                st.error("Ce nom d'utilisateur existe déjà.")
 
 
 def form_page():
@@ -164,12 +184,30 @@ def form_page():
     date_entry = st.date_input("Date", value=datetime.today())
 
     if st.button("Enregistrer"):
-        cursor.execute(
-            "INSERT INTO patients (name, age, service, pole, date) VALUES (?, ?, ?, ?, ?)",
-            (name, age, service, pole, date_entry.strftime("%Y-%m-%d")),
-        )
-        conn.commit()
-        st.success("Données enregistrées.")
+        row = {
+            "name": name,
+            "age": age,
+            "service": service,
+            "pole": pole,
+            "date": date_entry.strftime("%Y-%m-%d"),
+        }
+
+        # Ligne et esquisses du mois validées dans la même transaction
+        def save(conn):
+            conn.execute(
+                "INSERT INTO patients (name, age, service, pole, date)"
+                " VALUES (:name, :age, :service, :pole, :date)",
+                row,
+            )
+            observe(conn, "patients", row)
+
+        # Esquisses construites avant la première observation
+        ensure_sketches(MIDWIFERY_DB)
+        try:
+            write_transaction(save, MIDWIFERY_DB)
+            st.success("Données enregistrées.")
+        except WritePending:
+            st.info("⏳ Enregistrement en attente : il sera validé sous peu.")
 
     st.markdown("---")
     st.subheader("📄 Export PDF")
@@ -188,75 +226,121 @@ def form_page():
     st.subheader("📊 Statistiques avancées")
 
 
-df = pd.read_sql_query("SELECT * FROM patients", conn)
+# Statistiques lues sur la copie analytique de midwifery.db (rafraîchie par
+# la tâche planifiée ou en arrière-plan) ; seul le total vient de la base,
+# pour qu'une saisie y figure aussitôt
+replica = get_backend(MIDWIFERY_DB, readonly=True)
+with span("read_patients", "db"):
+    df = replica.fetch_frame("SELECT * FROM patients")
+    total = get_backend(MIDWIFERY_DB).fetch_frame(
+        "SELECT COUNT(*) AS n FROM patients"
+    )["n"].iloc[0]
+as_of = replica.as_of()
+if as_of:
+    st.caption(f"🕒 Données au {datetime.fromtimestamp(as_of):%d/%m/%Y %H:%M}")
 
 if not df.empty:
     st.markdown("### 📌 Statistiques descriptives")
-    stats = df.describe().T
-    stats["median"] = df.median()
-    stats["missing_values"] = df.isnull().sum()
+    stats = describe_with_median(df)
     st.dataframe(stats)
 
     st.markdown("### 📌 Corrélations")
-    corr_matrix = df.corr(numeric_only=True)
-    fig_corr, ax = plt.subplots()
-    sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", ax=ax)
-    st.pyplot(fig_corr)
+    corr_matrix = correlation_matrix(df)
+    with span("heatmap_corr", "chart"):
+        fig_corr, ax = plt.subplots()
+        sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", ax=ax)
+        st.pyplot(fig_corr)
 
     st.markdown("### 📌 Répartition par service et pôle")
-    fig1 = px.histogram(df, x="service", color="pole", barmode="group")
-    st.plotly_chart(fig1, use_container_width=True)
+    # Graphiques construits sur des données agrégées (utils/charts.py) :
+    # effectifs, classes et points fusionnés plutôt que toutes les lignes
+    with span("histogram_service", "chart"):
+        counts = category_counts(df, "service", "pole")
+        fig1 = px.bar(counts, x="service", y="count", color="pole", barmode="group")
+        st.plotly_chart(fig1, use_container_width=True)
 
     st.markdown("### 📌 Distribution des âges")
-    fig2, ax2 = plt.subplots()
-    sns.histplot(df["age"], kde=True, bins=10, ax=ax2)
-    st.pyplot(fig2)
+    with span("histplot_age", "chart"):
+        age_bins = histogram_bins(df["age"], bins=10)
+        fig2, ax2 = plt.subplots()
+        if not age_bins.empty:
+            sns.histplot(
+                x=age_bins["center"],
+                weights=age_bins["count"],
+                bins=[*age_bins["left"], age_bins["right"].iloc[-1]],
+                kde=True,
+                ax=ax2,
+            )
+        st.pyplot(fig2)
 
     st.markdown("### 📌 Boxplot des âges par service")
-    fig3, ax3 = plt.subplots()
-    sns.boxplot(x="service", y="age", data=df, ax=ax3)
-    st.pyplot(fig3)
+    with span("boxplot_age", "chart"):
+        fig3, ax3 = plt.subplots()
+        sns.boxplot(x="service", y="age", data=df, ax=ax3)
+        st.pyplot(fig3)
 
     st.markdown("### 📌 Nuage de points âge vs pôle")
-    fig4 = px.scatter(df, x="age", y="pole", color="service", title="Âge vs Pôle")
-    st.plotly_chart(fig4, use_container_width=True)
+    with span("scatter_age_pole", "chart") as chart:
+        points = scatter_points(df, "age", "pole", "service")
+        fig4 = px.scatter(
+            points,
+            x="age",
+            y="pole",
+            color="service",
+            size="count",
+            title="Âge vs Pôle",
+        )
+        if overlay_visible():
+            chart.detail = payload_detail(fig4)
+        st.plotly_chart(fig4, use_container_width=True)
 else:
     st.info("Aucune donnée disponible pour les statistiques.")
 
 st.markdown("### 📤 Export des données")
 
-csv = df.to_csv(index=False).encode("utf-8")
-excel_buffer = io.BytesIO()
-with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
-    df.to_excel(writer, index=False, sheet_name="Données")
-    writer.save()
+csv = dataframe_to_csv(df)
+xlsx = dataframe_to_xlsx(df)
 
 st.download_button(
     "📄 Télécharger CSV", data=csv, file_name="donnees.csv", mime="text/csv"
 )
 st.download_button(
     "📊 Télécharger Excel",
-    data=excel_buffer.getvalue(),
+    data=xlsx,
     file_name="donnees.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    mime=XLSX_MIME,
 )
 
 st.markdown("### 📊 Tableau de bord interactif")
 
-col1, col2, col3 = st.columns(3)
+# Médiane et services distincts de l'année : fusion des esquisses mensuelles
+# (utils/sketches.py), sans relire la table. Lues sur la même copie
+# analytique que les lignes ci-dessus.
+ytd_start, ytd_end = year_to_date()
+with span("sketches_ytd", "db"):
+    ytd_median = quantiles(
+        "patient_age", (0.5,), ytd_start, ytd_end, MIDWIFERY_DB, readonly=True
+    )
+    ytd_services = distinct_count(
+        "services", ytd_start, ytd_end, MIDWIFERY_DB, readonly=True
+    )
+
+col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("Nombre total de patientes", len(df))
+    st.metric("Nombre total de patientes", int(total))
 with col2:
     st.metric("Âge moyen", round(df["age"].mean(), 1))
 with col3:
-    st.metric("Services uniques", df["service"].nunique())
+    median = ytd_median[0.5]
+    st.metric("Âge médian (année)", "—" if pd.isna(median) else median)
+with col4:
+    st.metric("Services uniques (année)", ytd_services)
 
 st.markdown("### 📅 Évolution temporelle")
-df["date"] = pd.to_datetime(df["date"])
-df_time = df.groupby(df["date"].dt.to_period("M")).size().reset_index(name="Nombre")
-df_time["date"] = df_time["date"].astype(str)
-fig_time = px.line(df_time, x="date", y="Nombre", markers=True)
-st.plotly_chart(fig_time, use_container_width=True)
+df_time = downsample_series(monthly_counts(df, "date"), "date", "Nombre")
+with span("line_monthly", "chart"):
+    fig_time = px.line(df_time, x="date", y="Nombre", markers=True)
+    st.plotly_chart(fig_time, use_container_width=True)
 # ------------------ ROUTER ------------------
 if st.session_state.page == "login":
     login_page()
@@ -265,3 +349,9 @@ elif st.session_state.page == "form":
         form_page()
     else:
         go_to("login")
+
+# 🔌 Fin du rerun
+conn.close()
+
+# ⏱️ Overlay de performance (administrateurs)
+render_overlay()
@@ -3,6 +3,7 @@ from datetime import date
 import pandas as pd
 from utils.database import insert_data_demographics, fetch_history_demographics
 from utils.navigation import navigation_buttons, reset_all_forms
+from utils.patient_matching import find_candidates
 
 st.set_page_config(page_title="Données démographiques", layout="wide")
 
@@ -30,7 +31,7 @@ with st.form(key="demographics_form", clear_on_submit=True):
     submitted = st.form_submit_button("Soumettre")
 
     if submitted:
-        insert_data_demographics(
+        entry = (
             chart_number,
             nom,
             prenom,
@@ -39,9 +40,47 @@ with st.form(key="demographics_form", clear_on_submit=True):
             adresse,
             telephone,
         )
-        reset_all_forms()
-        st.success("✅ Données enregistrées avec succès.")
-        st.rerun()
+        # 🔍 Recherche de doublons avant l'insertion
+        candidates = find_candidates(nom, prenom, entry[3], chart_number=chart_number)
+        if candidates:
+            st.session_state.pending_demographics = entry
+            st.session_state.pending_candidates = candidates
+        else:
+            insert_data_demographics(*entry)
+            reset_all_forms()
+            st.success("✅ Données enregistrées avec succès.")
+            st.rerun()
+
+# ⚠️ Doublons potentiels à confirmer
+if st.session_state.get("pending_demographics"):
+    st.warning("⚠️ Cette patiente ressemble à des dossiers déjà enregistrés :")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Score": round(score, 2),
+                    "Numéro de dossier": patient["chart_number"],
+                    "Nom": patient["nom"],
+                    "Prénom": patient["prenom"],
+                    "Date de naissance": patient["dob"],
+                }
+                for score, patient in st.session_state.pending_candidates
+            ]
+        ),
+        use_container_width=True,
+    )
+    col_confirm, col_cancel = st.columns(2)
+    with col_confirm:
+        if st.button("✅ Enregistrer quand même"):
+            insert_data_demographics(*st.session_state.pending_demographics)
+            reset_all_forms()
+            st.success("✅ Données enregistrées avec succès.")
+            st.rerun()
+    with col_cancel:
+        if st.button("❌ Annuler la saisie"):
+            st.session_state.pop("pending_demographics", None)
+            st.session_state.pop("pending_candidates", None)
+            st.rerun()
 
 # 📋 Historique des données
 st.markdown("---")
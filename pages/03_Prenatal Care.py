@@ -3,6 +3,7 @@ import sqlite3
 import pandas as pd
 import streamlit as st
 from datetime import date
+from utils.validation import ValidationError, validate_for_insert
 
 # ⚙️ Configuration
 st.set_page_config(page_title="👥 Soins Prénatals", page_icon="👥", layout="wide")
@@ -42,8 +43,24 @@ def create_prenatal_care_table():
     conn.close()
 
 
+PRENATAL_COLUMNS = [
+    "chart_number", "date_collection", "gpa", "edd_date",
+    "tobacco_use", "substance_use", "bmi", "ce_cle_status", "racism",
+    "domestic_violence", "housing", "pregnancy_loss", "previous_c_section",
+    "previous_vbac", "high_risk_pe", "gdm", "anemia", "stbbis", "trainee_involved",
+    "referral_worker", "prenatal_consultation", "reason1", "made_with1",
+    "reason2", "made_with2", "reason3", "made_with3", "notes", "telehealth",
+    "shared_care", "transfer_care", "other_transfer_reason", "transfer_to",
+    "care_ended",
+]  # fmt: skip
+
+
 def insert_prenatal_care_data(*args):
     conn = get_db_connection()
+    # Dates ISO et IMC REAL validés ici ; un refus part en quarantaine
+    record = validate_for_insert(
+        conn, "prenatal_care", dict(zip(PRENATAL_COLUMNS, args)), own_conn=True
+    )
     conn.execute(
         """INSERT INTO prenatal_care (
         chart_number, date_collection, gpa, edd_date,
@@ -54,7 +71,7 @@ def insert_prenatal_care_data(*args):
         reason2, made_with2, reason3, made_with3, notes, telehealth,
         shared_care, transfer_care, other_transfer_reason, transfer_to, care_ended
     ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-        args,
+        [record[column] for column in PRENATAL_COLUMNS],
     )
     conn.commit()
     conn.close()
@@ -179,44 +196,48 @@ with st.form("prenatal_care_form", clear_on_submit=True):
         if not chart_number:
             st.warning("Veuillez entrer un numéro de dossier.")
         else:
-            insert_prenatal_care_data(
-                chart_number,
-                str(date_collection),
-                gpa,
-                str(edd_date),
-                tobacco_use,
-                substance_use,
-                bmi,
-                ce_cle_status,
-                racism,
-                domestic_violence,
-                housing,
-                pregnancy_loss,
-                previous_c_section,
-                previous_vbac,
-                high_risk_pe,
-                gdm,
-                anemia,
-                stbbis,
-                trainee_involved,
-                referral_worker,
-                prenatal_consultation,
-                reason1,
-                made_with1,
-                reason2,
-                made_with2,
-                reason3,
-                made_with3,
-                notes,
-                telehealth,
-                shared_care,
-                transfer_care,
-                other_transfer_reason,
-                transfer_to,
-                care_ended,
-            )
-            st.success("✅ Formulaire soumis et enregistré avec succès !")
-            st.rerun()
+            try:
+                insert_prenatal_care_data(
+                    chart_number,
+                    str(date_collection),
+                    gpa,
+                    str(edd_date),
+                    tobacco_use,
+                    substance_use,
+                    bmi,
+                    ce_cle_status,
+                    racism,
+                    domestic_violence,
+                    housing,
+                    pregnancy_loss,
+                    previous_c_section,
+                    previous_vbac,
+                    high_risk_pe,
+                    gdm,
+                    anemia,
+                    stbbis,
+                    trainee_involved,
+                    referral_worker,
+                    prenatal_consultation,
+                    reason1,
+                    made_with1,
+                    reason2,
+                    made_with2,
+                    reason3,
+                    made_with3,
+                    notes,
+                    telehealth,
+                    shared_care,
+                    transfer_care,
+                    other_transfer_reason,
+                    transfer_to,
+                    care_ended,
+                )
+            except ValidationError as e:
+                st.error(f"❌ Saisie refusée (mise en quarantaine) : {e}")
+            else:
+                st.success("✅ Formulaire soumis et enregistré avec succès !")
+                st.rerun()
 
 # 📋 Historique
 st.markdown("---")
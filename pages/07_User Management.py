@@ -4,8 +4,7 @@ import sqlite3
 import bcrypt
 import random
 import string
-import smtplib
-from email.mime.text import MIMEText
+from utils.outbox import send_now
 
 
 # ------------------ Fonctions utilitaires ------------------
@@ -14,20 +13,13 @@ def generate_temp_password(length=10):
 
 
 def send_email(recipient_email, temp_password):
-    sender_email = "ton.email@gmail.com"
-    sender_password = "ton_mot_de_passe_app"  # Mot de passe d'application sécurisé
     subject = "🔐 Nouveau mot de passe temporaire"
     body = f"Bonjour,\n\nVoici votre mot de passe temporaire : {temp_password}\n\nVeuillez le changer après connexion."
 
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = sender_email
-    msg["To"] = recipient_email
-
+    # 📤 Envoi immédiat : le mot de passe n'est jamais écrit dans la boîte
+    # d'envoi (ni donc dans les sauvegardes), et n'attend pas le planificateur
     try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, recipient_email, msg.as_string())
+        send_now("email", recipient_email, body, subject)
         return True
     except Exception as e:
         st.error(f"Erreur lors de l'envoi : {e}")
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from utils.charts import histogram_bins
 from utils.database import get_all_patients, get_all_rendez_vous
 
 
@@ -9,8 +10,9 @@ def page_statistiques_patients():
     st.title("📊 Statistiques des patients")
 
     # 🔄 Chargement des données
-    patients = get_all_patients()
-    rdv = get_all_rendez_vous()
+    # Copie analytique : les lectures lourdes ne gênent pas la saisie
+    patients = get_all_patients(readonly=True)
+    rdv = get_all_rendez_vous(readonly=True)
 
     if not patients:
         st.warning("⚠️ Aucun patient enregistré.")
@@ -21,9 +23,16 @@ def page_statistiques_patients():
 
     # 📈 Répartition par âge
     st.subheader("📈 Répartition des âges")
-    fig_age = px.histogram(
-        df_patients, x="Âge", nbins=10, title="Distribution des âges"
+    # Classes comptées côté serveur (utils/charts.py)
+    age_bins = histogram_bins(df_patients["Âge"], bins=10)
+    fig_age = px.bar(
+        age_bins,
+        x="center",
+        y="count",
+        labels={"center": "Âge", "count": "Nombre"},
+        title="Distribution des âges",
     )
+    fig_age.update_layout(bargap=0.05)
     st.plotly_chart(fig_age, use_container_width=True)
 
     # 🚻 Répartition par sexe
@@ -5,9 +5,8 @@ from utils.notifications import (
     send_private_message,
     mark_messages_seen,
 )
-import smtplib
-from email.message import EmailMessage
-from twilio.rest import Client
+from utils.outbox import queue_email, queue_sms
+from utils.search import search
 
 # 🔐 Contrôle d'accès
 if st.session_state.get("role") not in ["admin", "doctor", "nurse", "sage-femme"]:
@@ -27,9 +26,24 @@ def page_boite_reception():
     senders = sorted(set(msg["sender"] for msg in messages))
     selected_sender = st.selectbox("Filtrer par expéditeur", ["Tous"] + senders)
     selected_date = st.date_input("Filtrer par date", value=None)
+    search_text = st.text_input("Rechercher dans les messages")
+
+    # 🔎 Recherche plein texte (index FTS5) au lieu d'un parcours en Python
+    matching_ids = None
+    if search_text.strip():
+        hits = search(
+            search_text,
+            username,
+            st.session_state.get("role"),
+            kinds=["message"],
+            limit=500,
+        )
+        matching_ids = {hit["ref_id"] for hit in hits if hit["recipient"] == username}
 
     filtered = []
     for msg in messages:
+        if matching_ids is not None and msg["id"] not in matching_ids:
+            continue
         if selected_sender != "Tous" and msg["sender"] != selected_sender:
             continue
         if selected_date and msg["timestamp"][:10] != selected_date.strftime(
@@ -69,20 +83,11 @@ def page_boite_reception():
 
 
 # ------------------ Notifications (optionnelles) ------------------
+# Mises en file dans la boîte d'envoi : la tâche dispatch_outbox les envoie
+# par lots, hors du rendu de la page.
 def send_sms_notification(to_number, message):
-    client = Client("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN")
-    client.messages.create(
-        body=message, from_="+1234567890", to=to_number  # ton numéro Twilio
-    )
+    return queue_sms(to_number, message)
 
 
 def send_email_notification(to_email, subject, body):
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = "ton_email@example.com"
-    msg["To"] = to_email
-    msg.set_content(body)
-
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-        smtp.login("ton_email@example.com", "mot_de_passe_app")
-        smtp.send_message(msg)
+    return queue_email(to_email, subject, body)
@@ -1,97 +1,49 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from utils.database import get_all_rendez_vous
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from ics import Calendar, Event
-import tempfile
-from datetime import datetime, timedelta
-import os
+from utils.calendar_view import (
+    VIEWS,
+    build_calendar_figure,
+    ensure_calendar_index,
+    fetch_window_counts,
+    fetch_window_rendez_vous,
+    get_window,
+)
+from utils.calendar_sync import authorize_google_calendar, is_authorized
+from utils.exports import build_ics, write_temp_file
+from utils.jobs import enqueue_unique, get_latest_job, start_scheduler
+import json
+from datetime import datetime
 
 # 🔐 Contrôle d'accès
 if st.session_state.get("role") not in ["admin", "doctor", "nurse", "sage-femme"]:
     st.warning("⛔ Accès restreint aux professionnels autorisés.")
     st.stop()
 
-SCOPES = ["https://www.googleapis.com/auth/calendar.events"]
-
-
-def get_google_calendar_service():
-    creds = None
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    if not creds or not creds.valid:
-        flow = InstalledAppFlow.from_client_secrets_file("client_id.json", SCOPES)
-        creds = flow.run_local_server(port=0)
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
-    return build("calendar", "v3", credentials=creds)
-
-
-def event_exists(service, rdv):
-    query = rdv["Motif"]
-    date = rdv["Datetime"].isoformat()
-    events_result = (
-        service.events()
-        .list(
-            calendarId="primary",
-            timeMin=date,
-            timeMax=(rdv["Datetime"] + timedelta(minutes=30)).isoformat(),
-            q=query,
-            singleEvents=True,
-        )
-        .execute()
-    )
-    return len(events_result.get("items", [])) > 0
-
-
-def auto_sync_rdv(df):
-    service = get_google_calendar_service()
-    synced = 0
-    for _, rdv in df.iterrows():
-        if not event_exists(service, rdv):
-            event = {
-                "summary": rdv["Motif"],
-                "description": f"Patient: {rdv['Nom']}",
-                "start": {
-                    "dateTime": rdv["Datetime"].isoformat(),
-                    "timeZone": "America/Toronto",
-                },
-                "end": {
-                    "dateTime": (rdv["Datetime"] + timedelta(minutes=30)).isoformat(),
-                    "timeZone": "America/Toronto",
-                },
-            }
-            service.events().insert(calendarId="primary", body=event).execute()
-            synced += 1
-    return synced
-
 
 def generate_ics(df):
-    calendar = Calendar()
-    for _, rdv in df.iterrows():
-        event = Event()
-        event.name = rdv["Motif"]
-        event.begin = rdv["Datetime"]
-        event.duration = timedelta(minutes=30)
-        event.description = f"Patient: {rdv['Nom']}"
-        calendar.events.add(event)
-
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".ics")
-    with open(temp_file.name, "w") as f:
-        f.writelines(calendar)
-    return temp_file.name
+    events = (
+        (motif, begin, 30, f"Patient: {nom}")
+        for motif, begin, nom in zip(df["Motif"], df["Datetime"], df["Nom"])
+    )
+    return write_temp_file(build_ics(events), ".ics")
 
 
 def page_calendrier_rendez_vous():
     st.set_page_config(page_title="Calendrier des rendez-vous", page_icon="📅")
     st.title("📅 Calendrier des rendez-vous")
 
-    rdv_list = get_all_rendez_vous()
+    # 🗓️ Fenêtre visible
+    ensure_calendar_index()
+    col_view, col_anchor = st.columns(2)
+    with col_view:
+        view = st.radio("Affichage", VIEWS, index=1, horizontal=True)
+    with col_anchor:
+        anchor = st.date_input("Afficher autour du", value=datetime.today().date())
+    window_start, window_end = get_window(anchor, view)
+
+    rdv_list = fetch_window_rendez_vous(window_start, window_end)
     if not rdv_list:
-        st.info("📭 Aucun rendez-vous enregistré.")
+        st.info("📭 Aucun rendez-vous sur cette période.")
         return
 
     df = pd.DataFrame(rdv_list, columns=["Nom", "Date", "Heure", "Motif"])
@@ -104,37 +56,60 @@ def page_calendrier_rendez_vous():
     st.subheader("🔍 Filtrer les rendez-vous")
     noms = sorted(df["Nom"].unique())
     selected_nom = st.selectbox("Filtrer par nom", ["Tous"] + noms)
-    selected_date = st.date_input("Filtrer par date", value=None)
 
     df_filtered = df.copy()
     if selected_nom != "Tous":
         df_filtered = df_filtered[df_filtered["Nom"] == selected_nom]
-    if selected_date:
-        df_filtered = df_filtered[df_filtered["Datetime"].dt.date == selected_date]
 
     if df_filtered.empty:
         st.info("Aucun rendez-vous correspondant aux filtres.")
         return
 
     # 📊 Vue calendrier
-    fig = px.timeline(
-        df_filtered,
-        x_start="Datetime",
-        x_end="Datetime",
-        y="Nom",
-        color="Nom",
-        hover_data=["Motif"],
-        title="Vue calendrier des rendez-vous",
-    )
-    fig.update_yaxes(autorange="reversed")
-    fig.update_layout(height=600)
+    if selected_nom == "Tous":
+        counts = fetch_window_counts(window_start, window_end)
+    else:
+        grouped = df_filtered.groupby(
+            [
+                df_filtered["Datetime"].dt.strftime("%Y-%m-%d"),
+                df_filtered["Datetime"].dt.hour,
+            ]
+        ).size()
+        counts = [(day, hour, count) for (day, hour), count in grouped.items()]
+    fig = build_calendar_figure(window_start, window_end, counts)
+    fig.update_layout(title="Vue calendrier des rendez-vous", height=600)
     st.plotly_chart(fig, use_container_width=True)
 
-    # 🔄 Synchronisation automatique
-    synced_count = auto_sync_rdv(df_filtered)
-    st.success(
-        f"✅ {synced_count} rendez-vous synchronisés automatiquement avec Google Calendar."
-    )
+    # 🔄 Synchronisation Google Calendar en tâche de fond, à la demande
+    # (une tâche par clic, pas une par rerun)
+    sync_payload = {
+        "start": window_start.isoformat(),
+        "end": window_end.isoformat(),
+        "nom": None if selected_nom == "Tous" else selected_nom,
+    }
+    last_sync = get_latest_job("calendar_sync")
+    if not is_authorized():
+        if st.button("🔑 Autoriser Google Calendar"):
+            authorize_google_calendar()
+            st.rerun()
+    elif st.button("🔄 Synchroniser avec Google Calendar"):
+        start_scheduler()
+        enqueue_unique(
+            "calendar_sync",
+            sync_payload,
+            created_by=st.session_state.get("username"),
+        )
+        st.rerun()
+    if last_sync is not None and last_sync["status"] == "done":
+        result = json.loads(last_sync["result"])
+        st.success(
+            f"✅ {result['synced']} rendez-vous synchronisés avec Google Calendar "
+            "lors de la dernière synchronisation."
+        )
+    elif last_sync is not None and last_sync["status"] == "failed":
+        st.warning("⚠️ La dernière synchronisation Google Calendar a échoué.")
+    elif last_sync is not None:
+        st.info("🔄 Synchronisation Google Calendar en cours en arrière-plan…")
 
     # 📥 Export ICS
     if st.button("📅 Exporter les rendez-vous en ICS"):
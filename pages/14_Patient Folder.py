@@ -1,9 +1,9 @@
 import streamlit as st
-from utils.database import get_patient_dossier
-from fpdf import FPDF
-from ics import Calendar, Event
-import tempfile
-from datetime import datetime, timedelta
+import html
+from dataclasses import asdict, fields
+from utils.dossier import get_patient_dossier
+from utils.exports import build_ics, generate_dossier_pdf, write_temp_file
+from datetime import datetime
 import pandas as pd
 from utils.auth import require_login, show_auth_sidebar
 from utils.database import get_all_patients, save_patients
@@ -16,72 +16,53 @@ if st.session_state.get("role") not in ["admin", "doctor", "nurse", "sage-femme"
     st.stop()
 
 
-def generate_pdf(dossier, patient_id):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(
-        200, 10, txt=f"Dossier médical du patient #{patient_id}", ln=True, align="C"
-    )
-
-    pdf.ln(10)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(200, 10, txt="📋 Informations démographiques", ln=True)
-    pdf.set_font("Arial", size=10)
-    for key, value in dossier["demographics"].items():
-        pdf.cell(200, 8, txt=f"{key}: {value}", ln=True)
-
-    pdf.ln(5)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(200, 10, txt="🤰 Soins prénatals", ln=True)
-    pdf.set_font("Arial", size=10)
-    for item in dossier["prenatal"]:
-        pdf.cell(200, 8, txt=str(item), ln=True)
-
-    pdf.ln(5)
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(200, 10, txt="📅 Rendez-vous", ln=True)
-    pdf.set_font("Arial", size=10)
-    for rdv in dossier["rdv"]:
-        pdf.cell(200, 8, txt=str(rdv), ln=True)
-
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    pdf.output(temp_file.name)
-    return temp_file.name
-
-
-def generate_ics(rdv_list):
-    calendar = Calendar()
+def generate_ics(rdv_list, chart_number):
+    events = []
     for rdv in rdv_list:
-        event = Event()
-        event.name = rdv.get("motif", "Consultation")
-        date_str = rdv.get("date", "")
-        time_str = rdv.get("heure", "00:00")
         try:
-            dt = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-            event.begin = dt
-            event.duration = timedelta(minutes=30)
-            event.description = f"Patient: {rdv.get('nom', 'Inconnu')}"
-            calendar.events.add(event)
-        except Exception:
+            begin = datetime.fromisoformat(str(rdv.appointment_date))
+        except ValueError:
             continue
-
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".ics")
-    with open(temp_file.name, "w") as f:
-        f.writelines(calendar)
-    return temp_file.name
+        events.append(
+            (
+                rdv.appointment_type or "Consultation",
+                begin,
+                rdv.duration_minutes or 30,
+                f"Dossier: {chart_number}",
+            )
+        )
+    return write_temp_file(build_ics(events), ".ics")
+
+
+# 📋 Tableau HTML échappé à partir d'une liste d'enregistrements
+def records_to_html(records):
+    if not records:
+        return "<p>Aucune donnée.</p>"
+    columns = [f.name for f in fields(records[0])]
+    head = "".join(f"<th>{html.escape(col)}</th>" for col in columns)
+    body = "".join(
+        "<tr>"
+        + "".join(
+            f"<td>{html.escape(str(getattr(record, col) or ''))}</td>"
+            for col in columns
+        )
+        + "</tr>"
+        for record in records
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
 
 
 def render_printable_view(dossier):
     st.markdown("### 🖨️ Vue imprimable")
+    demographics = [dossier.demographics] if dossier.demographics else []
     html_content = f"""
     <div>
         <h3>Informations démographiques</h3>
-        <pre>{dossier['demographics']}</pre>
+        {records_to_html(demographics)}
         <h3>Soins prénatals</h3>
-        <pre>{dossier['prenatal']}</pre>
+        {records_to_html(dossier.prenatal)}
         <h3>Rendez-vous</h3>
-        <pre>{dossier['rdv']}</pre>
+        {records_to_html(dossier.rendez_vous)}
         <button onclick="window.print()">🖨️ Imprimer cette page</button>
     </div>
     """
@@ -98,26 +79,32 @@ def page_dossier_patient():
         dossier = get_patient_dossier(patient_id)
         if dossier:
             st.subheader("📋 Informations démographiques")
-            if dossier["demographics"]:
-                st.json(dossier["demographics"])
+            if dossier.demographics:
+                st.json(asdict(dossier.demographics))
             else:
                 st.info("Aucune donnée démographique disponible.")
 
             st.subheader("🤰 Soins prénatals")
-            if dossier["prenatal"]:
-                st.dataframe(dossier["prenatal"], use_container_width=True)
+            if dossier.prenatal:
+                st.dataframe(
+                    [asdict(item) for item in dossier.prenatal],
+                    use_container_width=True,
+                )
             else:
                 st.info("Aucun soin prénatal enregistré.")
 
             st.subheader("📅 Rendez-vous")
-            if dossier["rdv"]:
-                st.dataframe(dossier["rdv"], use_container_width=True)
+            if dossier.rendez_vous:
+                st.dataframe(
+                    [asdict(rdv) for rdv in dossier.rendez_vous],
+                    use_container_width=True,
+                )
             else:
                 st.info("Aucun rendez-vous enregistré.")
 
             # 📄 Export PDF
             if st.button("📄 Exporter en PDF"):
-                pdf_path = generate_pdf(dossier, patient_id)
+                pdf_path = generate_dossier_pdf(dossier, patient_id)
                 with open(pdf_path, "rb") as f:
                     st.download_button(
                         label="📥 Télécharger le PDF",
@@ -127,8 +114,10 @@ def page_dossier_patient():
                     )
 
             # 📅 Export ICS
-            if dossier["rdv"] and st.button("📅 Exporter les rendez-vous en ICS"):
-                ics_path = generate_ics(dossier["rdv"])
+            if dossier.rendez_vous and st.button(
+                "📅 Exporter les rendez-vous en ICS"
+            ):
+                ics_path = generate_ics(dossier.rendez_vous, patient_id)
                 with open(ics_path, "rb") as f:
                     st.download_button(
                         label="📥 Télécharger le fichier ICS",
@@ -0,0 +1,47 @@
+import streamlit as st
+from utils.search import KIND_LABELS, rebuild_search_index, search
+
+st.set_page_config(page_title="Recherche globale", page_icon="🔎", layout="wide")
+
+# 🔐 Contrôle d'accès
+username = st.session_state.get("username")
+role = st.session_state.get("role")
+if not username:
+    st.warning("🔒 Vous devez être connecté pour accéder à cette page.")
+    st.stop()
+
+st.title("🔎 Recherche globale")
+st.caption("Patientes, notes cliniques et messages privés.")
+
+# 🔍 Barre de recherche
+col_query, col_kinds = st.columns([3, 2])
+with col_query:
+    query = st.text_input("Rechercher", placeholder="Nom, dossier, note, message…")
+with col_kinds:
+    selected_kinds = st.multiselect(
+        "Types de résultats",
+        list(KIND_LABELS.keys()),
+        format_func=lambda kind: KIND_LABELS[kind],
+    )
+
+if query.strip():
+    results = search(query, username, role, kinds=selected_kinds or None)
+    st.markdown(f"**{len(results)} résultat(s)**")
+    for row in results:
+        label = KIND_LABELS.get(row["kind"], row["kind"])
+        if row["kind"] == "message":
+            header = f"{label} — {row['author']} → {row['recipient']}"
+        else:
+            header = f"{label} — dossier {row['chart_number'] or '—'}"
+        with st.container(border=True):
+            st.markdown(f"**{header}**")
+            st.markdown(row["snippet"] or row["title"])
+else:
+    st.info("Saisissez un ou plusieurs mots pour lancer la recherche.")
+
+# 🛠️ Maintenance de l'index
+if role == "admin":
+    st.markdown("---")
+    if st.button("🔄 Reconstruire l'index de recherche"):
+        total = rebuild_search_index()
+        st.success(f"✅ Index reconstruit : {total} entrée(s).")
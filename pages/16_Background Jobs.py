@@ -0,0 +1,253 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from utils.jobs import (
+    enqueue,
+    get_recent_jobs,
+    get_schedules,
+    retry_job,
+    set_schedule,
+    start_scheduler,
+)
+from utils.backup import list_backups
+from utils.outbox import get_outbox_counts
+from utils.perf import get_page_metrics
+from utils.querylog import get_full_scans, get_slow_queries
+from utils.writer import get_writer_stats
+
+st.set_page_config(page_title="Tâches de fond", page_icon="🧵", layout="wide")
+
+# 🔐 Contrôle d'accès
+if st.session_state.get("role") != "admin":
+    st.warning("⛔ Accès réservé aux administrateurs.")
+    st.stop()
+
+username = st.session_state.get("username")
+scheduler = start_scheduler()
+
+st.title("🧵 Tâches de fond")
+st.caption(f"Planificateur {scheduler.name} — {scheduler.workers} worker(s).")
+
+
+def format_time(timestamp):
+    if not timestamp:
+        return ""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ▶️ Lancement manuel
+st.subheader("▶️ Lancer une tâche")
+col_analyze, col_vacuum, col_refresh = st.columns(3)
+with col_analyze:
+    if st.button("📈 ANALYZE"):
+        st.success(f"Tâche n°{enqueue('analyze', created_by=username)} en file.")
+with col_vacuum:
+    if st.button("🧹 VACUUM"):
+        st.success(f"Tâche n°{enqueue('vacuum', created_by=username)} en file.")
+with col_refresh:
+    if st.button("🔄 Rafraîchir les index"):
+        job_id = enqueue("refresh_indexes", created_by=username)
+        st.success(f"Tâche n°{job_id} en file.")
+
+with st.form("export_form"):
+    col_table, col_format = st.columns(2)
+    with col_table:
+        table = st.text_input("Table à exporter", value="demographics")
+    with col_format:
+        fmt = st.selectbox("Format", ["csv", "xlsx"])
+    if st.form_submit_button("📤 Exporter"):
+        job_id = enqueue(
+            "export_table", {"table": table, "format": fmt}, created_by=username
+        )
+        st.success(f"Export n°{job_id} en file (fichier dans exports/).")
+
+# 📤 Boîte d'envoi (e-mails et SMS)
+st.markdown("---")
+st.subheader("📤 Boîte d'envoi")
+counts = get_outbox_counts()
+col_pending, col_sent, col_failed = st.columns(3)
+col_pending.metric("En attente", counts.get("pending", 0) + counts.get("sending", 0))
+col_sent.metric("Envoyés", counts.get("sent", 0))
+col_failed.metric("Abandonnés", counts.get("failed", 0))
+if st.button("🚚 Envoyer maintenant"):
+    job_id = enqueue("dispatch_outbox", created_by=username)
+    st.success(f"Tâche n°{job_id} en file.")
+
+# 💾 Sauvegardes
+st.markdown("---")
+st.subheader("💾 Sauvegardes")
+if st.button("💾 Sauvegarder maintenant"):
+    st.success(f"Sauvegarde n°{enqueue('backup', created_by=username)} en file.")
+backups = list_backups()
+if backups:
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Archive": m["archive"],
+                    "Créée": format_time(m["created_at"]),
+                    "Taille (Ko)": round(m["size"] / 1024),
+                    "Compressée (Ko)": round(m["compressed_size"] / 1024),
+                    "Durées (s)": ", ".join(
+                        f"{step} {seconds}" for step, seconds in m["timings"].items()
+                    ),
+                }
+                for m in backups
+            ]
+        ),
+        use_container_width=True,
+    )
+    st.caption("Restauration : python -m utils.backup restore backups/<archive>")
+
+# ⏱️ Performance des pages (p50/p95 des 7 derniers jours)
+st.markdown("---")
+st.subheader("⏱️ Performance des pages")
+metrics = get_page_metrics()
+if metrics:
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Page": row["page"],
+                    "Span": row["name"],
+                    "Famille": row["kind"],
+                    "Reruns": row["count"],
+                    "p50 (ms)": round(row["p50_ms"], 1),
+                    "p95 (ms)": round(row["p95_ms"], 1),
+                }
+                for row in metrics
+            ]
+        ),
+        use_container_width=True,
+    )
+else:
+    st.info("Aucune mesure agrégée (tâche aggregate_perf toutes les 15 minutes).")
+
+# 🔍 Requêtes SQL : parcours complets de table (candidates à un index) et
+# dernières requêtes lentes, avec leur plan d'exécution
+st.markdown("---")
+st.subheader("🔍 Requêtes SQL")
+scans = get_full_scans()
+if scans:
+    st.caption("Parcours complets de table, par temps cumulé")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Table(s)": row["full_scan"],
+                    "Appels": row["calls"],
+                    "Total (ms)": round(row["total_ms"], 1),
+                    "Moyenne (ms)": round(row["mean_ms"], 2),
+                    "Max (ms)": round(row["max_ms"], 1),
+                    "Requête": row["sql"],
+                }
+                for row in scans
+            ]
+        ),
+        use_container_width=True,
+    )
+slow = get_slow_queries(20)
+if slow:
+    st.caption("Dernières requêtes lentes")
+    for row in slow:
+        with st.expander(
+            f"🐢 {row['duration_ms']:.0f} ms — {format_time(row['ts'])} — "
+            f"{row['sql'][:80]}"
+        ):
+            st.code(row["sql"], language="sql")
+            if row["plan"]:
+                st.code(row["plan"], language=None)
+if not scans and not slow:
+    st.info("Aucun parcours complet ni requête lente enregistrés.")
+
+# ✍️ Écrivains SQLite de ce processus : écritures en attente et commits de groupe
+writers = get_writer_stats()
+if writers:
+    st.caption("Écrivains SQLite (commit de groupe)")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Base": row["db_path"],
+                    "En attente": row["pending"],
+                    "Écritures": row["writes"],
+                    "Commits": row["batches"],
+                    "Plus gros lot": row["largest_batch"],
+                    "Dernier commit (ms)": row["last_commit_ms"],
+                }
+                for row in writers
+            ]
+        ),
+        use_container_width=True,
+    )
+
+# 📅 Planifications
+st.markdown("---")
+st.subheader("📅 Planifications")
+schedules = get_schedules()
+if schedules:
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Nom": row["name"],
+                    "Tâche": row["kind"],
+                    "Cron": row["cron"],
+                    "Active": bool(row["enabled"]),
+                    "Prochaine exécution": format_time(row["next_run"]),
+                }
+                for row in schedules
+            ]
+        ),
+        use_container_width=True,
+    )
+
+with st.expander("✏️ Ajouter ou modifier une planification"):
+    with st.form("schedule_form"):
+        name = st.text_input("Nom")
+        kind = st.text_input("Type de tâche", value="analyze")
+        cron = st.text_input("Cron (minute heure jour mois jour-semaine)", "0 3 * * *")
+        enabled = st.checkbox("Active", value=True)
+        if st.form_submit_button("💾 Enregistrer") and name:
+            try:
+                set_schedule(name, kind, cron, enabled=enabled)
+                st.success("✅ Planification enregistrée.")
+            except ValueError as e:
+                st.error(f"❌ {e}")
+
+# 📋 Historique
+st.markdown("---")
+st.subheader("📋 Dernières tâches")
+status = st.selectbox(
+    "Statut", ["Tous", "pending", "running", "done", "failed"], key="job_status"
+)
+jobs = get_recent_jobs(200, None if status == "Tous" else status)
+if jobs:
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "N°": row["id"],
+                    "Tâche": row["kind"],
+                    "Statut": row["status"],
+                    "Essais": f"{row['attempts']}/{row['max_attempts']}",
+                    "Planification": row["schedule_name"] or "",
+                    "Créée": format_time(row["created_at"]),
+                    "Terminée": format_time(row["finished_at"]),
+                    "Résultat": row["result"] or "",
+                    "Erreur": (row["last_error"] or "").strip().split("\n")[-1],
+                }
+                for row in jobs
+            ]
+        ),
+        use_container_width=True,
+    )
+    failed = [row["id"] for row in jobs if row["status"] == "failed"]
+    if failed:
+        to_retry = st.selectbox("Relancer une tâche en échec", failed)
+        if st.button("🔁 Relancer"):
+            retry_job(to_retry)
+            st.rerun()
+else:
+    st.info("Aucune tâche.")
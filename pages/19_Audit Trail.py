@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, time, timedelta
+
+import pandas as pd
+import streamlit as st
+from utils.audit import get_audit_actors, get_audit_entries
+
+st.set_page_config(page_title="Journal d'audit", page_icon="🕵️", layout="wide")
+
+# 🔐 Contrôle d'accès
+if st.session_state.get("role") != "admin":
+    st.warning("⛔ Accès réservé aux administrateurs.")
+    st.stop()
+
+st.title("🕵️ Journal d'audit")
+st.caption("Qui a modifié quoi, et quand. Le journal est en ajout seul.")
+
+# 🔎 Filtres : par patiente (numéro de dossier) ou par utilisateur
+mode = st.radio("Rechercher par", ["Patiente", "Utilisateur"], horizontal=True)
+chart_number = actor = None
+if mode == "Patiente":
+    chart_number = st.text_input("Numéro de dossier").strip() or None
+else:
+    actors = get_audit_actors()
+    actor = st.selectbox("Utilisateur", actors) if actors else None
+
+col_table, col_start, col_end = st.columns(3)
+with col_table:
+    table = st.selectbox(
+        "Table",
+        ["Toutes", "demographics", "prenatal_care", "rendez_vous", "users"],
+    )
+with col_start:
+    start = st.date_input("Du", value=datetime.now().date() - timedelta(days=30))
+with col_end:
+    end = st.date_input("Au", value=datetime.now().date())
+
+if mode == "Patiente" and not chart_number:
+    st.info("Saisissez un numéro de dossier.")
+    st.stop()
+
+entries = get_audit_entries(
+    chart_number=chart_number,
+    actor=actor,
+    table=None if table == "Toutes" else table,
+    since=datetime.combine(start, time.min).timestamp(),
+    until=datetime.combine(end + timedelta(days=1), time.min).timestamp(),
+)
+
+# 📋 Entrées, de la plus récente à la plus ancienne
+if entries:
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Date": datetime.fromtimestamp(row["ts"]).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                    "Auteur": row["actor"] or "",
+                    "Action": row["action"],
+                    "Table": row["table_name"],
+                    "Ligne": row["row_id"] or "",
+                    "Dossier": row["chart_number"] or "",
+                    "Modifications": ", ".join(
+                        f"{column} : {old} → {new}"
+                        for column, (old, new) in json.loads(row["diff"]).items()
+                    ),
+                }
+                for row in entries
+            ]
+        ),
+        use_container_width=True,
+    )
+    st.caption(f"{len(entries)} entrée(s) (500 au plus).")
+else:
+    st.info("Aucune modification enregistrée pour ces critères.")
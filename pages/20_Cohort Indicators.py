@@ -0,0 +1,113 @@
+from datetime import datetime
+
+import plotly.express as px
+import streamlit as st
+from utils.cohorts import DB_PATH, DEFAULT_BY, DIMENSIONS, INDICATORS, get_panel
+from utils.exports import dataframe_to_csv
+from utils.perf import begin_page, render_overlay, span
+from utils.storage import get_backend
+
+st.set_page_config(page_title="Indicateurs de cohorte", page_icon="📈", layout="wide")
+
+# 🔐 Contrôle d'accès
+if st.session_state.get("role") not in ["admin", "doctor", "nurse", "sage-femme"]:
+    st.warning("⛔ Accès restreint aux professionnels autorisés.")
+    st.stop()
+
+begin_page("Indicateurs de cohorte")
+st.title("📈 Indicateurs de cohorte")
+st.caption(
+    "Une ligne par référence, avec le dernier suivi prénatal de la patiente. "
+    "Les réponses inconnues sont exclues des dénominateurs."
+)
+
+as_of = get_backend(DB_PATH, readonly=True).as_of()
+if as_of:
+    st.caption(f"🕒 Données au {datetime.fromtimestamp(as_of):%d/%m/%Y %H:%M}")
+
+# 🧭 Regroupement et indicateur
+col_by, col_indicator = st.columns([2, 1])
+with col_by:
+    by = st.multiselect(
+        "Regrouper par",
+        list(DIMENSIONS),
+        default=list(DEFAULT_BY),
+        format_func=DIMENSIONS.get,
+    )
+with col_indicator:
+    indicator = st.selectbox(
+        "Indicateur", INDICATORS, format_func=lambda indicator: indicator.label
+    )
+
+with span("cohort_panel", "pandas", ", ".join(by)):
+    panel = get_panel(by)
+
+if panel.empty:
+    st.info("Aucune donnée disponible pour les indicateurs.")
+    render_overlay()
+    st.stop()
+
+# 🔎 Filtres sur les valeurs des axes retenus
+rows = panel[panel["indicator"] == indicator.name]
+filters = st.columns(len(by)) if by else []
+for column, dimension in zip(filters, by):
+    with column:
+        values = sorted(rows[dimension].unique())
+        chosen = st.multiselect(DIMENSIONS[dimension], values)
+        if chosen:
+            rows = rows[rows[dimension].isin(chosen)]
+
+# 📋 Tableau de l'indicateur
+if indicator.kind == "rate":
+    columns = {
+        "patients": "Références",
+        "n": "Réponses connues",
+        "events": "Oui",
+        "rate": "Taux (%)",
+    }
+    table = rows[by + list(columns)].rename(columns=columns)
+    table["Taux (%)"] = (table["Taux (%)"] * 100).round(1)
+    value, value_label = "rate", "Taux"
+else:
+    columns = {
+        "n": "N",
+        "mean": "Moyenne",
+        "std": "Écart-type",
+        "min": "Min",
+        "q1": "Q1",
+        "median": "Médiane",
+        "q3": "Q3",
+        "max": "Max",
+        "mode": "Mode",
+    }
+    table = rows[by + list(columns)].rename(columns=columns).round(2)
+    value, value_label = "mean", "Moyenne"
+st.dataframe(
+    table.rename(columns=DIMENSIONS), use_container_width=True, hide_index=True
+)
+
+# 📊 Graphique : premier axe en abscisse, deuxième en couleur
+if by and not rows.empty:
+    with span("cohort_chart", "chart"):
+        fig = px.bar(
+            rows,
+            x=by[0],
+            y=value,
+            color=by[1] if len(by) > 1 else None,
+            barmode="group",
+            labels={value: value_label, **DIMENSIONS},
+            title=indicator.label,
+        )
+        if indicator.kind == "rate":
+            fig.update_yaxes(tickformat=".0%")
+        st.plotly_chart(fig, use_container_width=True)
+
+# 📥 Export du panneau complet (tous les indicateurs)
+st.download_button(
+    "📥 Exporter le panneau (CSV)",
+    data=dataframe_to_csv(panel, "utf-8-sig"),
+    file_name="indicateurs_cohorte.csv",
+    mime="text/csv",
+)
+
+render_overlay()
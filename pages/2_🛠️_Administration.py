@@ -10,6 +10,7 @@ from utils.auth_secure import (
     show_user_info,
     require_role,
 )
+from utils.audit import record
 
 # ⚙️ Setup
 st.set_page_config(page_title="🛠️ Administration", page_icon="🛠️")
@@ -40,6 +41,7 @@ with st.form("create_user_form"):
         else:
             success = create_user(new_username, new_password, new_role)
             if success:
+                record("insert", "users", new_username, None, {"role": new_role})
                 st.success(
                     f"Utilisateur **{new_username}** créé avec le rôle **{new_role}**."
                 )
@@ -78,6 +80,7 @@ for username, role in users:
                 "UPDATE users SET role = ? WHERE username = ?", (new_role, username)
             )
             conn.commit()
+            record("role_change", "users", username, {"role": role}, {"role": new_role})
             st.success(f"Rôle mis à jour pour **{username}** → `{new_role}`")
 
         confirm_delete = st.checkbox(
@@ -87,6 +90,7 @@ for username, role in users:
             if st.button(f"🗑️ Supprimer {username}", key=f"delete_{username}"):
                 c.execute("DELETE FROM users WHERE username = ?", (username,))
                 conn.commit()
+                record("delete", "users", username, {"role": role}, None)
                 st.warning(f"Utilisateur **{username}** supprimé.")
 
 conn.close()
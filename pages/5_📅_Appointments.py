@@ -1,7 +1,6 @@
 import streamlit as st
 from datetime import date as today_date
 import pandas as pd
-import plotly.express as px
 
 from utils.navigation import go_to_page
 from utils.database import (
@@ -11,8 +10,20 @@ from utils.database import (
     export_rendez_vous_to_excel,
 )
 from utils.pdf_generator import generate_rdv_pdf
+from utils.perf import begin_page, render_overlay
+from utils.recurrence import create_series
+from utils.reminders import get_today_reminders, refresh_today
+from utils.calendar_view import (
+    VIEWS,
+    build_calendar_figure,
+    ensure_calendar_index,
+    fetch_window_counts,
+    fetch_window_rendez_vous,
+    get_window,
+)
 
 st.set_page_config(page_title="Rendez-vous", layout="wide")
+begin_page("Appointments")
 
 # 🔐 Contrôle d'accès
 if st.session_state.get("role") not in ["admin", "doctor", "sage-femme"]:
@@ -38,6 +49,7 @@ with st.form("form_rdv", clear_on_submit=True):
 
     if submitted:
         save_rendez_vous(nom, date, heure, motif)
+        refresh_today()
         pdf_file = generate_rdv_pdf(nom, date, heure, motif)
         st.success(f"✅ Rendez-vous enregistré pour {nom} le {date} à {heure}.")
         with open(pdf_file, "rb") as f:
@@ -46,6 +58,35 @@ with st.form("form_rdv", clear_on_submit=True):
             )
         st.rerun()
 
+# 🔁 Suivi prénatal récurrent
+st.subheader("🔁 Série de suivi prénatal")
+st.caption(
+    "Rythme calculé à partir de la DPA (prenatal_care) : toutes les 4 semaines "
+    "jusqu'à 28 SA, toutes les 2 semaines jusqu'à 36 SA, puis chaque semaine."
+)
+with st.form("form_rdv_serie", clear_on_submit=True):
+    serie_chart = st.text_input("Numéro de dossier")
+    serie_nom = st.text_input("Nom du patient", key="serie_nom")
+    serie_debut = st.date_input("Premier rendez-vous", key="serie_debut")
+    serie_heure = st.time_input("Heure habituelle", key="serie_heure")
+    serie_motif = st.text_input("Motif", value="Suivi prénatal")
+
+    serie_submitted = st.form_submit_button("🔁 Créer la série")
+
+    if serie_submitted:
+        series_id = create_series(
+            serie_chart,
+            serie_nom,
+            serie_debut,
+            serie_heure.strftime("%H:%M:%S"),
+            serie_motif,
+            clinician=st.session_state.get("username"),
+        )
+        if series_id:
+            st.success(f"✅ Série créée pour {serie_nom}.")
+        else:
+            st.error("❌ Aucune DPA trouvée pour ce numéro de dossier.")
+
 # 🔍 Recherche et filtre
 st.markdown("---")
 st.subheader("🔎 Rechercher et filtrer les rendez-vous")
@@ -72,6 +113,7 @@ if filtered_list:
                 f"🗑 Supprimer ce rendez-vous", key=f"delete_{nom}_{date}_{heure}"
             ):
                 delete_rendez_vous(nom, date, heure)
+                refresh_today()
                 st.success("Rendez-vous supprimé.")
                 st.rerun()
 else:
@@ -81,10 +123,10 @@ else:
 st.markdown("---")
 st.subheader("🔔 Rappels pour aujourd’hui")
 
-today_rdv = [rdv for rdv in rendez_vous_list if str(rdv[1]) == str(today_date.today())]
+# Liste précalculée par la tâche « appointment_reminders »
+today_rdv = get_today_reminders()
 if today_rdv:
-    for rdv in today_rdv:
-        nom, date, heure, motif = rdv
+    for heure, nom, motif in today_rdv:
         st.info(f"🕒 {heure} — {nom} : {motif}")
 else:
     st.write("Aucun rendez-vous prévu aujourd’hui.")
@@ -102,26 +144,32 @@ if st.button("📤 Générer le fichier Excel"):
 st.markdown("---")
 st.subheader("📆 Vue calendrier des rendez-vous")
 
-if rendez_vous_list:
-    df_rdv = pd.DataFrame(rendez_vous_list, columns=["Nom", "Date", "Heure", "Motif"])
-    df_rdv["Datetime"] = pd.to_datetime(
-        df_rdv["Date"].astype(str) + " " + df_rdv["Heure"].astype(str)
-    )
-
-    fig = px.timeline(
-        df_rdv,
-        x_start="Datetime",
-        x_end="Datetime",
-        y="Nom",
-        color="Nom",
-        hover_data=["Motif"],
-    )
-    fig.update_yaxes(autorange="reversed")
+ensure_calendar_index()
+col_view, col_anchor = st.columns(2)
+with col_view:
+    view = st.radio("Affichage", VIEWS, index=1, horizontal=True)
+with col_anchor:
+    anchor = st.date_input("Afficher autour du", value=today_date.today())
+
+window_start, window_end = get_window(anchor, view)
+window_counts = fetch_window_counts(window_start, window_end)
+
+if window_counts:
+    fig = build_calendar_figure(window_start, window_end, window_counts)
     st.plotly_chart(fig, use_container_width=True)
+    with st.expander("📋 Détail des rendez-vous de la période"):
+        df_rdv = pd.DataFrame(
+            fetch_window_rendez_vous(window_start, window_end),
+            columns=["Nom", "Date", "Heure", "Motif"],
+        )
+        st.dataframe(df_rdv, use_container_width=True)
 else:
-    st.info("Aucun rendez-vous à afficher dans le calendrier.")
+    st.info("Aucun rendez-vous à afficher pour cette période.")
 
 # 🧭 Navigation
 st.markdown("---")
 if st.button("⬅ Retour à l'accueil"):
     go_to_page("01_accueil")
+
+# ⏱️ Overlay de performance (administrateurs)
+render_overlay()
@@ -7,6 +7,12 @@ import plotly.express as px
 import io
 from fpdf import FPDF
 import sqlite3
+from utils.charts import (
+    category_counts,
+    downsample_series,
+    histogram_bins,
+    scatter_points,
+)
 
 # 🔐 Contrôle d'accès
 if st.session_state.get("role") not in ["admin", "doctor", "sage-femme"]:
@@ -42,7 +48,9 @@ with tab2:
 st.title("📊 Rapports & Statistiques")
 
 # ------------------ Connexion à la base ------------------
-conn = sqlite3.connect("midwifery.db", check_same_thread=False)
+# Lecture seule, connexion propre au rerun : les écritures de midwifery.db
+# passent par l'écrivain unique (utils/writer.py)
+conn = sqlite3.connect("midwifery.db", timeout=30)
 
 
 # ------------------ PDF EXPORT ------------------
@@ -72,6 +80,7 @@ if st.button("📥 Télécharger le rapport PDF"):
 
 # ------------------ Chargement des données ------------------
 df = pd.read_sql_query("SELECT * FROM patients", conn)
+conn.close()
 
 if df.empty:
     st.info("Aucune donnée disponible pour les statistiques.")
@@ -93,13 +102,23 @@ else:
 
     # 📊 Répartition par service et pôle
     st.markdown("### 🏥 Répartition par service et pôle")
-    fig1 = px.histogram(df, x="service", color="pole", barmode="group")
+    # Effectifs agrégés ici (utils/charts.py) : pas de lignes brutes envoyées
+    counts = category_counts(df, "service", "pole")
+    fig1 = px.bar(counts, x="service", y="count", color="pole", barmode="group")
     st.plotly_chart(fig1, use_container_width=True)
 
     # 📊 Distribution des âges
     st.markdown("### 🎂 Distribution des âges")
+    age_bins = histogram_bins(df["age"], bins=10)
     fig2, ax2 = plt.subplots()
-    sns.histplot(df["age"], kde=True, bins=10, ax=ax2)
+    if not age_bins.empty:
+        sns.histplot(
+            x=age_bins["center"],
+            weights=age_bins["count"],
+            bins=[*age_bins["left"], age_bins["right"].iloc[-1]],
+            kde=True,
+            ax=ax2,
+        )
     st.pyplot(fig2)
 
     # 📊 Boxplot des âges par service
@@ -110,7 +129,11 @@ else:
 
     # 📊 Nuage de points âge vs pôle
     st.markdown("### ☁️ Nuage de points âge vs pôle")
-    fig4 = px.scatter(df, x="age", y="pole", color="service", title="Âge vs Pôle")
+    # Points identiques fusionnés, taille = effectif
+    points = scatter_points(df, "age", "pole", "service")
+    fig4 = px.scatter(
+        points, x="age", y="pole", color="service", size="count", title="Âge vs Pôle"
+    )
     st.plotly_chart(fig4, use_container_width=True)
 
     # 📤 Export des données
@@ -152,6 +175,7 @@ else:
         .reset_index(name="Nombre")
     )
     df_time["date"] = df_time["date"].astype(str)
+    df_time = downsample_series(df_time, "date", "Nombre")
     fig_time = px.line(df_time, x="date", y="Nombre", markers=True)
     st.plotly_chart(fig_time, use_container_width=True)
 
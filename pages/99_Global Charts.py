@@ -1,18 +1,20 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
+from datetime import datetime
+
+from utils.storage import get_backend
 
 st.set_page_config(page_title="Tables globales", layout="wide")
 st.title("🗂️ Vue globale des tables")
 
 
-# Connexion à la base
+# Lecture sur la copie analytique (utils/storage.py) : les parcours complets
+# de table ne bloquent pas la saisie
+replica = get_backend("data.db", readonly=True)
+
+
 def get_table(table_name):
     try:
-        conn = sqlite3.connect("data.db")
-        df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-        conn.close()
-        return df
+        return replica.fetch_frame(f"SELECT * FROM {table_name}")
     except Exception as e:
         return None, str(e)
 
@@ -35,6 +37,10 @@ tables = {
     "Notes cliniques": "notes_cliniques",
 }
 
+as_of = replica.as_of()
+if as_of:
+    st.caption(f"🕒 Données au {datetime.fromtimestamp(as_of):%d/%m/%Y %H:%M}")
+
 # Onglets dynamiques
 tabs = st.tabs(list(tables.keys()))
 
@@ -1,5 +1,6 @@
 import streamlit as st
 import bcrypt
+from utils.audit import record
 from utils.database import update_password, get_db_connection
 
 
@@ -26,6 +27,7 @@ def page_mot_de_passe_oublie():
             if user:
                 hashed_pw = bcrypt.hashpw(new_password_reset.encode(), bcrypt.gensalt())
                 update_password(reset_username, hashed_pw)
+                record("password_reset", "users", reset_username, actor=reset_username)
                 st.success("✅ Mot de passe mis à jour avec succès.")
                 st.session_state.page = "login"
                 st.rerun()
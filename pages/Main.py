@@ -1,6 +1,8 @@
 # main.py
 import streamlit as st
-import subprocess
+import json
+
+from utils.jobs import enqueue, get_job, start_scheduler
 
 st.set_page_config(page_title="Gestion des pages", layout="centered")
 
@@ -11,22 +13,36 @@ mode = st.radio(
     ["Analyse simple", "Simulation (dry-run)", "Correction automatique"],
 )
 
-if st.button("🚀 Lancer l'analyse"):
-    st.info("Exécution en cours...")
-
-    command = ["python", "manage_pages.py"]
-    if mode == "Simulation (dry-run)":
-        command.append("--dry-run")
-    elif mode == "Correction automatique":
-        command.append("--auto-fix")
+MODE_FLAGS = {
+    "Analyse simple": None,
+    "Simulation (dry-run)": "--dry-run",
+    "Correction automatique": "--auto-fix",
+}
 
-    result = subprocess.run(command, capture_output=True, text=True)
-
-    st.code(result.stdout, language="bash")
-
-    if result.stderr:
+# 🧵 L'analyse tourne dans le planificateur de tâches, pas dans la requête
+start_scheduler()
+if st.button("🚀 Lancer l'analyse"):
+    st.session_state["manage_pages_job"] = enqueue(
+        "manage_pages",
+        {"mode": MODE_FLAGS[mode]},
+        max_attempts=1,
+        created_by=st.session_state.get("username"),
+    )
+
+job_id = st.session_state.get("manage_pages_job")
+if job_id:
+    job = get_job(job_id)
+    if job["status"] in ("pending", "running"):
+        st.info(f"⏳ Analyse n°{job_id} en cours… (rafraîchir pour voir le résultat)")
+    elif job["status"] == "done":
+        result = json.loads(job["result"])
+        st.code(result["stdout"], language="bash")
+        if result["stderr"]:
+            st.error("⚠️ Une erreur est survenue :")
+            st.code(result["stderr"], language="bash")
+    else:
         st.error("⚠️ Une erreur est survenue :")
-        st.code(result.stderr, language="bash")
+        st.code(job["last_error"], language="bash")
 from utils.navigation import PAGES, navigation_buttons
 from utils.notifications import (
     get_notifications,
@@ -82,22 +98,36 @@ mode = st.radio(
     ["Analyse simple", "Simulation (dry-run)", "Correction automatique"],
 )
 
-if st.button("🚀 Lancer l'analyse"):
-    st.info("Exécution en cours...")
-
-    command = ["python", "manage_pages.py"]
-    if mode == "Simulation (dry-run)":
-        command.append("--dry-run")
-    elif mode == "Correction automatique":
-        command.append("--auto-fix")
-
-    result = subprocess.run(command, capture_output=True, text=True)
+MODE_FLAGS = {
+    "Analyse simple": None,
+    "Simulation (dry-run)": "--dry-run",
+    "Correction automatique": "--auto-fix",
+}
 
-    st.code(result.stdout, language="bash")
-
-    if result.stderr:
+# 🧵 L'analyse tourne dans le planificateur de tâches, pas dans la requête
+start_scheduler()
+if st.button("🚀 Lancer l'analyse"):
+    st.session_state["manage_pages_job"] = enqueue(
+        "manage_pages",
+        {"mode": MODE_FLAGS[mode]},
+        max_attempts=1,
+        created_by=st.session_state.get("username"),
+    )
+
+job_id = st.session_state.get("manage_pages_job")
+if job_id:
+    job = get_job(job_id)
+    if job["status"] in ("pending", "running"):
+        st.info(f"⏳ Analyse n°{job_id} en cours… (rafraîchir pour voir le résultat)")
+    elif job["status"] == "done":
+        result = json.loads(job["result"])
+        st.code(result["stdout"], language="bash")
+        if result["stderr"]:
+            st.error("⚠️ Une erreur est survenue :")
+            st.code(result["stderr"], language="bash")
+    else:
         st.error("⚠️ Une erreur est survenue :")
-        st.code(result.stderr, language="bash")
+        st.code(job["last_error"], language="bash")
 
 import os
 
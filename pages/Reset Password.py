@@ -2,6 +2,8 @@ import streamlit as st
 import sqlite3
 import bcrypt
 
+from utils.audit import record
+
 DB_PATH = "data.db"  # adjust if your database is elsewhere
 
 st.set_page_config(page_title="🔑 Forgot Password", page_icon="🔑")
@@ -33,6 +35,7 @@ if st.button("Reset Password"):
             )
             conn.commit()
             conn.close()
+            record("password_reset", "users", email, actor=email)
             st.success("✅ Password successfully reset.")
         else:
             st.error("❌ No midwife account found with that email.")
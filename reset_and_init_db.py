@@ -1,5 +1,9 @@
+import os
 import sqlite3
 
+from utils.backup import backup_database
+from utils.changefeed import install_changefeed
+
 DB_PATH = "data.db"
 
 
@@ -8,6 +12,9 @@ def get_db_connection():
 
 
 def reset_db():
+    # 💾 Copie de sécurité avant suppression des tables
+    if os.path.exists(DB_PATH):
+        backup_database(DB_PATH, label="pre-reset")
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -178,6 +185,9 @@ def init_db():
 
     conn.commit()
     conn.close()
+
+    # 📡 Tables recréées : leurs triggers du journal des changements aussi
+    install_changefeed()
     print("✅ Base de données réinitialisée et recréée.")
 
 
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# 📁 Racine du dépôt importable (utils, benchmarks…) quel que soit le
+# répertoire de lancement de pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,92 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from utils import jobs
+from utils.jobs import next_cron_time, parse_cron
+
+
+# 🕒 Analyse des expressions cron
+def test_parse_cron_lists_ranges_and_steps():
+    minutes, hours, days, months, weekdays = parse_cron("*/15 8-10 1,15 * 1-5")
+    assert minutes == {0, 15, 30, 45}
+    assert hours == {8, 9, 10}
+    assert days == {1, 15}
+    assert months == set(range(1, 13))
+    assert weekdays == {1, 2, 3, 4, 5}
+
+
+def test_parse_cron_rejects_wrong_field_count():
+    with pytest.raises(ValueError):
+        parse_cron("0 2 * *")
+
+
+def test_next_cron_time_is_strictly_after():
+    after = datetime(2026, 3, 10, 2, 0, 30)
+    assert next_cron_time("0 2 * * *", after) == datetime(2026, 3, 11, 2, 0)
+    assert next_cron_time("*/15 * * * *", after) == datetime(2026, 3, 10, 2, 15)
+
+
+def test_next_cron_time_rolls_over_month_and_year():
+    after = datetime(2026, 12, 31, 23, 59)
+    assert next_cron_time("30 6 1 * *", after) == datetime(2027, 1, 1, 6, 30)
+
+
+# Jour du mois ET jour de semaine restreints : l'un OU l'autre suffit
+def test_next_cron_time_day_of_month_or_weekday():
+    # 10/03/2026 est un mardi : le lundi 16 précède le 20
+    after = datetime(2026, 3, 10, 12, 0)
+    assert next_cron_time("0 9 20 * 1", after) == datetime(2026, 3, 16, 9, 0)
+    after = datetime(2026, 3, 17, 12, 0)
+    assert next_cron_time("0 9 20 * 1", after) == datetime(2026, 3, 20, 9, 0)
+
+
+# Un seul des deux champs restreint : seul celui-là compte
+def test_next_cron_time_single_day_restriction():
+    after = datetime(2026, 3, 10, 12, 0)
+    assert next_cron_time("0 9 * * 1", after) == datetime(2026, 3, 16, 9, 0)
+    assert next_cron_time("0 9 20 * *", after) == datetime(2026, 3, 20, 9, 0)
+
+
+# 🔒 Réservation des tâches (BEGIN IMMEDIATE)
+@pytest.fixture
+def job_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(jobs, "_tables_ready", False)
+    jobs.ensure_job_tables()
+    return tmp_path
+
+
+def test_claim_next_job_order_and_status(job_db):
+    low = jobs.enqueue("a", priority=0)
+    high = jobs.enqueue("b", priority=5)
+    jobs.enqueue("c", run_at=4102444800)  # pas encore échue
+    claimed = jobs.claim_next_job("w#0")
+    assert claimed["id"] == high
+    row = jobs.get_job(high)
+    assert row["status"] == "running"
+    assert row["worker"] == "w#0"
+    assert row["attempts"] == 1
+    assert jobs.claim_next_job("w#0")["id"] == low
+    assert jobs.claim_next_job("w#0") is None
+
+
+def test_claim_next_job_each_job_once_across_threads(job_db):
+    ids = {jobs.enqueue("n", {"i": i}) for i in range(40)}
+    claimed, lock = [], threading.Lock()
+
+    def worker(index):
+        while True:
+            job = jobs.claim_next_job(f"w#{index}")
+            if job is None:
+                return
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(ids)
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+
+import pytest
+
+from utils import storage
+from utils.storage import Backend, SnapshotBackend, SQLiteBackend, to_postgres
+
+
+# 🔁 Traduction SQLite → PostgreSQL
+def test_to_postgres_placeholders_and_percent():
+    assert (
+        to_postgres("SELECT * FROM t WHERE a = ? AND b LIKE '%x?' AND c % 2 = ?;")
+        == "SELECT * FROM t WHERE a = %s AND b LIKE '%%x?' AND c %% 2 = %s"
+    )
+
+
+def test_to_postgres_ddl_rules():
+    query = to_postgres(
+        "CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "created_at DATETIME, payload BLOB)"
+    )
+    assert query == (
+        "CREATE TABLE t (id SERIAL PRIMARY KEY, created_at TIMESTAMP, payload BYTEA)"
+    )
+
+
+def test_to_postgres_rowid_outside_strings_only():
+    assert (
+        to_postgres("SELECT rowid, 'rowid' FROM t WHERE rowid IN (?)")
+        == "SELECT id, 'rowid' FROM t WHERE id IN (%s)"
+    )
+
+
+def test_to_postgres_insert_or_ignore():
+    assert (
+        to_postgres("INSERT OR IGNORE INTO t (a) VALUES (?)")
+        == "INSERT INTO t (a) VALUES (%s) ON CONFLICT DO NOTHING"
+    )
+
+
+def test_to_postgres_table_info():
+    query = to_postgres("PRAGMA table_info(Users)")
+    assert "information_schema.columns" in query
+    assert "table_name = 'users'" in query
+
+
+# 🚨 Erreurs psycopg2 relevées en sqlite3.*
+@pytest.mark.parametrize(
+    "raised, expected",
+    [
+        ("IntegrityError", sqlite3.IntegrityError),
+        ("OperationalError", sqlite3.OperationalError),
+        ("ProgrammingError", sqlite3.OperationalError),
+        ("DataError", sqlite3.DatabaseError),
+    ],
+)
+def test_sqlite_errors_mapping(raised, expected):
+    psycopg2 = pytest.importorskip("psycopg2")
+    with pytest.raises(expected) as info:
+        with storage._sqlite_errors():
+            raise getattr(psycopg2, raised)("boom ")
+    assert str(info.value) == "boom"
+    assert isinstance(info.value.__cause__, getattr(psycopg2, raised))
+
+
+# 🧩 Interface : un backend incomplet ne peut pas être instancié
+def test_backend_is_abstract():
+    class ReadOnly(Backend):
+        def fetch_all(self, query, params=(), named=False):
+            return []
+
+    with pytest.raises(TypeError):
+        Backend()
+    with pytest.raises(TypeError):
+        ReadOnly()
+
+
+# 🪶 Backend SQLite (écritures par l'écrivain unique)
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "test.db"))
+    backend.execute(
+        "CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, label TEXT UNIQUE)"
+    )
+    return backend
+
+
+def test_sqlite_backend_round_trip(backend):
+    result = backend.execute("INSERT INTO t (label) VALUES (?)", ("a",))
+    assert result.lastrowid == 1 and result.rowcount == 1
+    backend.execute_many(
+        "INSERT OR IGNORE INTO t (label) VALUES (?)", [("a",), ("b",), ("c",)]
+    )
+    assert backend.fetch_all("SELECT label FROM t ORDER BY id") == [
+        ("a",),
+        ("b",),
+        ("c",),
+    ]
+    row = backend.fetch_one("SELECT COUNT(*) AS n FROM t", named=True)
+    assert row["n"] == 3
+    assert backend.fetch_one("SELECT label FROM t WHERE label = ?", ("z",)) is None
+
+
+def test_sqlite_backend_integrity_error(backend):
+    backend.execute("INSERT INTO t (label) VALUES (?)", ("a",))
+    with pytest.raises(sqlite3.IntegrityError):
+        backend.execute("INSERT INTO t (label) VALUES (?)", ("a",))
+
+
+def test_sqlite_backend_transaction_rolls_back(backend):
+    backend.execute("INSERT INTO t (label) VALUES (?)", ("a",))
+
+    def rename(conn):
+        conn.execute("UPDATE t SET label = ? WHERE label = ?", ("b", "a"))
+        raise RuntimeError("annulation")
+
+    with pytest.raises(RuntimeError):
+        backend.transaction(rename)
+    assert backend.fetch_all("SELECT label FROM t") == [("a",)]
+    assert backend.transaction(
+        lambda conn: conn.execute("UPDATE t SET label = 'b'").rowcount
+    ) == 1
+    assert backend.fetch_all("SELECT label FROM t") == [("b",)]
+
+
+def test_snapshot_backend_refuses_writes(tmp_path):
+    replica = SnapshotBackend(str(tmp_path / "test.db"))
+    with pytest.raises(sqlite3.OperationalError):
+        replica.execute("DELETE FROM t")
+    with pytest.raises(sqlite3.OperationalError):
+        replica.transaction(lambda conn: None)
+
+
+def test_get_backend_one_per_file_and_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "sqlite")
+    path = str(tmp_path / "test.db")
+    assert storage.get_backend(path) is storage.get_backend(path)
+    assert isinstance(storage.get_backend(path, readonly=True), SnapshotBackend)
+
+
+# 🐘 Aller-retour PostgreSQL, seulement si une instance est configurée
+@pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL"), reason="DATABASE_URL non défini"
+)
+def test_postgres_round_trip(tmp_path, monkeypatch):
+    pytest.importorskip("psycopg2")
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "postgres")
+    monkeypatch.setattr(storage, "DATABASE_URL", os.environ["DATABASE_URL"])
+    try:
+        steps = storage.check(str(tmp_path / "storage_test.db"))
+    finally:
+        storage.close_backends()
+    assert len(steps) == 6
@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils.writer import (
+    WritePending,
+    WriteQueue,
+    WriteResult,
+    get_writer,
+    write,
+    write_transaction,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, label TEXT UNIQUE)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def writer(db_path):
+    writer = WriteQueue(db_path)
+    yield writer
+    writer.close()
+
+
+def _labels(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT label FROM t ORDER BY id").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+# 🚧 Écriture qui retient l'écrivain tant que gate n'est pas ouverte
+def _blocking(gate: threading.Event, started: threading.Event):
+    def work(conn):
+        started.set()
+        gate.wait(10)
+
+    return work
+
+
+# 🧾 Chaque appelant reçoit le résultat de sa propre écriture
+def test_futures_return_write_results(writer, db_path):
+    first = writer.execute("INSERT INTO t (label) VALUES (?)", ("a",))
+    many = writer.executemany("INSERT INTO t (label) VALUES (?)", [("b",), ("c",)])
+    assert first.result(5) == WriteResult(1, 1)
+    assert many.result(5).rowcount == 2
+    assert writer.transaction(lambda conn: "ok").result(5) == "ok"
+    assert _labels(db_path) == ["a", "b", "c"]
+
+
+# 📦 Écritures déposées pendant un lot : validées ensemble au lot suivant
+def test_group_commit(writer, db_path):
+    gate, started = threading.Event(), threading.Event()
+    blocker = writer.transaction(_blocking(gate, started))
+    assert started.wait(5)
+    futures = [
+        writer.execute("INSERT INTO t (label) VALUES (?)", (f"r{i}",))
+        for i in range(10)
+    ]
+    gate.set()
+    blocker.result(5)
+    for future in futures:
+        future.result(5)
+    assert writer.batches == 2
+    assert writer.largest_batch == 10
+    assert writer.writes == 11
+    assert len(_labels(db_path)) == 10
+
+
+# ↩️ Une écriture refusée est annulée seule (SAVEPOINT), le lot est validé
+def test_failed_item_rolls_back_alone(writer, db_path):
+    gate, started = threading.Event(), threading.Event()
+    writer.transaction(_blocking(gate, started))
+    assert started.wait(5)
+
+    def partial_then_fail(conn):
+        conn.execute("INSERT INTO t (label) VALUES ('partial')")
+        conn.execute("INSERT INTO t (label) VALUES ('dup')")
+
+    before = writer.execute("INSERT INTO t (label) VALUES ('dup')")
+    failing = writer.transaction(partial_then_fail)
+    after = writer.execute("INSERT INTO t (label) VALUES ('after')")
+    gate.set()
+    before.result(5)
+    after.result(5)
+    with pytest.raises(sqlite3.IntegrityError):
+        failing.result(5)
+    assert _labels(db_path) == ["dup", "after"]
+
+
+# 🔁 Transaction appelée depuis l'écrivain : exécutée sur place, sans attente
+def test_nested_transaction_runs_inline(writer, db_path):
+    def outer(conn):
+        conn.execute("INSERT INTO t (label) VALUES ('outer')")
+        return writer.execute("INSERT INTO t (label) VALUES ('inner')").result(0)
+
+    assert writer.transaction(outer).result(5).rowcount == 1
+    assert _labels(db_path) == ["outer", "inner"]
+
+
+# ⏳ Délai dépassé : WritePending porte le Future, l'écriture aboutit ensuite
+def test_timeout_raises_write_pending(db_path):
+    gate, started = threading.Event(), threading.Event()
+    get_writer(db_path).transaction(_blocking(gate, started))
+    assert started.wait(5)
+    with pytest.raises(WritePending) as info:
+        write("INSERT INTO t (label) VALUES ('late')", (), db_path, timeout=0.05)
+    assert isinstance(info.value, TimeoutError)
+    assert not info.value.future.done()
+    gate.set()
+    assert info.value.future.result(5).rowcount == 1
+    assert write_transaction(lambda conn: 1, db_path) == 1
+    assert _labels(db_path) == ["late"]
+    get_writer(db_path).close()
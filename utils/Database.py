@@ -1,6 +1,11 @@
 import sqlite3
-from typing import List, Tuple, Any, Optional
-import utils.database
+from typing import List, Tuple, Any, Dict, Optional
+
+from utils.audit import audited_execute, record_entries
+from utils.perf import span
+from utils.storage import get_backend
+from utils.validation import ValidationError, clean_record, quarantine
+from utils.writer import WritePending
 
 DB_PATH = "data.db"
 
@@ -14,57 +19,91 @@ def get_db_connection() -> sqlite3.Connection:
         raise
 
 
-# 📋 Lecture générique
-def fetch_all(query: str, params: Tuple = ()) -> List[Tuple[Any]]:
+# 📋 Lecture générique (backend choisi par utils/storage.py). readonly=True
+# pour les tableaux de bord : lecture sur la copie analytique, sans
+# concurrence avec la saisie
+def fetch_all(
+    query: str, params: Tuple = (), readonly: bool = False
+) -> List[Tuple[Any]]:
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        with span("fetch_all", "db", " ".join(query.split())):
+            return get_backend(DB_PATH, readonly).fetch_all(query, params)
     except sqlite3.Error as e:
         print(f"Erreur lors de la lecture : {e}")
         return []
 
 
-# ➕ Insertion générique
+# ✍️ Écritures : True si validée, False en cas d'erreur. Une écriture encore
+# dans la file de l'écrivain après le délai d'attente lève WritePending
+# (utils/writer.py) : elle sera validée plus tard, à l'appelant de le dire.
+
+# ➕ Insertion générique : requête telle quelle, sans validation (les
+# helpers typés ci-dessous passent par _insert_record)
 def insert_data(query: str, params: Tuple) -> bool:
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        conn.close()
+        get_backend(DB_PATH).execute(query, params)
         return True
     except sqlite3.Error as e:
         print(f"Erreur lors de l'insertion : {e}")
         return False
 
 
-# ✏️ Mise à jour générique
-def update_data(query: str, params: Tuple) -> bool:
+# 🧽 Insertion d'un enregistrement d'une table connue : valeurs normalisées
+# par les règles de utils/validation.py, refus mis en quarantaine
+def _insert_record(table: str, record: Dict[str, Any]) -> bool:
+    try:
+        record = clean_record(table, record)
+    except ValidationError as e:
+        print(f"Insertion refusée : {e}")
+        try:
+            get_backend(DB_PATH).transaction(lambda conn: quarantine(conn, e))
+        except (WritePending, sqlite3.Error) as error:
+            print(f"Quarantaine non enregistrée : {error}")
+        return False
+    columns = ", ".join(record)
+    placeholders = ", ".join("?" for _ in record)
+    return insert_data(
+        f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+        tuple(record.values()),
+    )
+
+
+# 🧾 Écriture journalisée en attente : entrées d'audit versées à sa validation
+def _record_when_done(pending: WritePending) -> None:
+    def done(future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            record_entries(future.result())
+
+    pending.future.add_done_callback(done)
+
+
+# ✏️ Mise à jour générique (journalisée dans audit_log)
+def update_data(query: str, params: Tuple, actor: Optional[str] = None) -> bool:
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        conn.close()
+        entries = get_backend(DB_PATH).transaction(
+            lambda conn: audited_execute(conn.cursor(), query, params, actor)
+        )
+        record_entries(entries)
         return True
+    except WritePending as e:
+        _record_when_done(e)
+        raise
     except sqlite3.Error as e:
         print(f"Erreur lors de la mise à jour : {e}")
         return False
 
 
-# ❌ Suppression générique
-def delete_data(query: str, params: Tuple) -> bool:
+# ❌ Suppression générique (journalisée dans audit_log)
+def delete_data(query: str, params: Tuple, actor: Optional[str] = None) -> bool:
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        conn.close()
+        entries = get_backend(DB_PATH).transaction(
+            lambda conn: audited_execute(conn.cursor(), query, params, actor)
+        )
+        record_entries(entries)
         return True
+    except WritePending as e:
+        _record_when_done(e)
+        raise
     except sqlite3.Error as e:
         print(f"Erreur lors de la suppression : {e}")
         return False
@@ -76,7 +115,7 @@ def get_all_users() -> List[Tuple[Any]]:
 
 
 def add_user(name: str, email: str) -> bool:
-    return insert_data("INSERT INTO users (name, email) VALUES (?, ?)", (name, email))
+    return _insert_record("users", {"name": name, "email": email})
 
 
 def update_user_email(user_id: int, new_email: str) -> bool:
@@ -88,14 +127,12 @@ def delete_user(user_id: int) -> bool:
 
 
 # 🧑‍⚕️ Patients
-def get_all_patients() -> List[Tuple[Any]]:
-    return fetch_all("SELECT * FROM patients")
+def get_all_patients(readonly: bool = False) -> List[Tuple[Any]]:
+    return fetch_all("SELECT * FROM patients", readonly=readonly)
 
 
 def add_patient(name: str, birthdate: str) -> bool:
-    return insert_data(
-        "INSERT INTO patients (name, birthdate) VALUES (?, ?)", (name, birthdate)
-    )
+    return _insert_record("patients", {"name": name, "birthdate": birthdate})
 
 
 def update_patient_name(patient_id: int, new_name: str) -> bool:
@@ -109,14 +146,13 @@ def delete_patient(patient_id: int) -> bool:
 
 
 # 📅 Rendez-vous
-def get_all_rendez_vous() -> List[Tuple[Any]]:
-    return fetch_all("SELECT * FROM rendez_vous")
+def get_all_rendez_vous(readonly: bool = False) -> List[Tuple[Any]]:
+    return fetch_all("SELECT * FROM rendez_vous", readonly=readonly)
 
 
 def add_rendez_vous(patient_id: int, date: str, notes: Optional[str]) -> bool:
-    return insert_data(
-        "INSERT INTO rendez_vous (patient_id, date, notes) VALUES (?, ?, ?)",
-        (patient_id, date, notes),
+    return _insert_record(
+        "rendez_vous", {"patient_id": patient_id, "date": date, "notes": notes}
     )
 
 
@@ -1,5 +1,8 @@
 import streamlit as st
 
+from utils.form_engine import nav_buttons
+
+
 def go_to_page(page_name: str):
     st.session_state["page"] = page_name
     st.rerun()
@@ -21,15 +24,10 @@ def navigation_buttons():
     page_names = list(PAGES.keys())
     current_index = page_names.index(st.session_state.current_page)
 
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("⬅️ Précédent", disabled=(current_index == 0)):
-            st.session_state.current_page = page_names[current_index - 1]
-            st.rerun()
-    with col2:
-        if st.button("Suivant ➡️", disabled=(current_index == len(page_names) - 1)):
-            st.session_state.current_page = page_names[current_index + 1]
-            st.rerun()
+    move = nav_buttons(current_index, len(page_names), key="page_nav")
+    if move:
+        st.session_state.current_page = page_names[current_index + move]
+        st.rerun()
 
 import os
 
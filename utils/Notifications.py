@@ -1,14 +1,25 @@
 import sqlite3
 
+from utils.storage import get_backend
+
+DB_PATH = "data.db"
+
 
 def get_db_connection():
-    conn = sqlite3.connect("data.db")
+    conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+# 🗄️ Lectures et écritures via le backend configuré (utils/storage.py) : en
+# SQLite, les écritures passent par l'écrivain unique de data.db
 def add_notification(username, message):
-    conn = get_db_connection()
+    get_backend(DB_PATH).transaction(
+        lambda conn: _add_notification(conn, username, message)
+    )
+
+
+def _add_notification(conn, username, message):
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -24,32 +35,27 @@ def add_notification(username, message):
         "INSERT INTO notifications (username, message) VALUES (?, ?)",
         (username, message),
     )
-    conn.commit()
-    conn.close()
 
 
 def get_notifications(username):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    return get_backend(DB_PATH).fetch_all(
         "SELECT id, message FROM notifications WHERE username = ? AND seen = 0",
         (username,),
+        named=True,
     )
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
 
 
 def mark_notifications_seen(username):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE notifications SET seen = 1 WHERE username = ?", (username,))
-    conn.commit()
-    conn.close()
+    get_backend(DB_PATH).execute(
+        "UPDATE notifications SET seen = 1 WHERE username = ?", (username,)
+    )
 
 
 def create_private_message_table():
-    conn = get_db_connection()
+    get_backend(DB_PATH).transaction(_create_private_message_table)
+
+
+def _create_private_message_table(conn):
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -59,85 +65,77 @@ def create_private_message_table():
             receiver TEXT,
             message TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            seen INTEGER DEFAULT 0
+            seen INTEGER DEFAULT 0,
+            file_name TEXT,
+            file_data BLOB,
+            thread_id INTEGER
         )
     """
     )
-    conn.commit()
-    conn.close()
+    # Colonnes des pièces jointes et fils de discussion (anciennes bases)
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(private_messages)")]
+    for column, sql_type in [
+        ("file_name", "TEXT"),
+        ("file_data", "BLOB"),
+        ("thread_id", "INTEGER"),
+    ]:
+        if column not in columns:
+            cursor.execute(
+                f"ALTER TABLE private_messages ADD COLUMN {column} {sql_type}"
+            )
 
 
 def send_private_message(sender, receiver, message):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    get_backend(DB_PATH).execute(
         "INSERT INTO private_messages (sender, receiver, message) VALUES (?, ?, ?)",
         (sender, receiver, message),
     )
-    conn.commit()
-    conn.close()
 
 
 def get_private_messages(username):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    return get_backend(DB_PATH).fetch_all(
         """
-        SELECT sender, message, timestamp FROM private_messages
+        SELECT id, thread_id, sender, message, timestamp, file_name, file_data
+        FROM private_messages
         WHERE receiver = ? ORDER BY timestamp DESC
     """,
         (username,),
-
-ALTER TABLE private_messages ADD COLUMN file_name TEXT;
-ALTER TABLE private_messages ADD COLUMN file_data BLOB;
-ALTER TABLE private_messages ADD COLUMN thread_id INTEGER;
+        named=True,
     )
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
 
 
 def get_unseen_message_count(username):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    return get_backend(DB_PATH).fetch_one(
         "SELECT COUNT(*) FROM private_messages WHERE receiver = ? AND seen = 0",
         (username,),
-    )
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+    )[0]
 
 
 def mark_messages_seen(username):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    get_backend(DB_PATH).execute(
         "UPDATE private_messages SET seen = 1 WHERE receiver = ?", (username,)
     )
-    conn.commit()
-    conn.close()
 
 
+# 📊 Tableau de bord : lu sur la copie analytique
 def get_message_stats():
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    backend = get_backend(DB_PATH, readonly=True)
 
-    cursor.execute("SELECT COUNT(*) FROM private_messages")
-    total = cursor.fetchone()[0]
+    total = backend.fetch_one("SELECT COUNT(*) FROM private_messages")[0]
 
-    cursor.execute("SELECT COUNT(DISTINCT thread_id) FROM private_messages")
-    threads = cursor.fetchone()[0]
+    threads = backend.fetch_one(
+        "SELECT COUNT(DISTINCT thread_id) FROM private_messages"
+    )[0]
 
-    cursor.execute("SELECT COUNT(*) FROM private_messages WHERE file_name IS NOT NULL")
-    attachments = cursor.fetchone()[0]
+    attachments = backend.fetch_one(
+        "SELECT COUNT(*) FROM private_messages WHERE file_name IS NOT NULL"
+    )[0]
 
-    cursor.execute("""
+    rows = backend.fetch_all("""
         SELECT users.role, COUNT(*) FROM private_messages
         JOIN users ON private_messages.sender = users.username
         GROUP BY users.role
     """)
-    by_role = {row[0]: row[1] for row in cursor.fetchall()}
+    by_role = {row[0]: row[1] for row in rows}
 
-    conn.close()
     return {"total": total, "threads": threads, "attachments": attachments, "by_role": by_role}
\ No newline at end of file
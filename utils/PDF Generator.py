@@ -1,6 +1,9 @@
 from fpdf import FPDF
 
+from utils.perf import timed
 
+
+@timed(kind="export")
 def generate_rdv_pdf(nom, date, heure, motif):
     pdf = FPDF()
     pdf.add_page()
@@ -0,0 +1,398 @@
+import atexit
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.writer import write_many, write_transaction
+
+DB_PATH = "data.db"
+
+# 📝 Journal d'écriture anticipée : chaque entrée y est ajoutée (une ligne
+# JSON) avant d'être versée dans la base par lots. Un fichier par processus
+# (audit_spool.<pid>.jsonl) : aucun processus ne vide celui d'un autre. Les
+# fichiers des processus disparus sont rejoués au démarrage.
+SPOOL_PREFIX = "audit_spool"
+
+# ⏱️ Versement par lots : toutes les secondes ou dès 200 entrées en attente
+FLUSH_SECONDS = 1.0
+BATCH_SIZE = 200
+
+# 🙈 Colonnes dont la valeur n'est jamais copiée dans le journal
+MASKED_COLUMNS = {"password", "hashed_password", "mot_de_passe"}
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🏗️ Table en ajout seul : les triggers refusent toute modification
+def create_audit_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id TEXT NOT NULL UNIQUE,
+            ts REAL NOT NULL,
+            actor TEXT,
+            action TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            row_id TEXT,
+            chart_number TEXT,
+            diff TEXT NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_audit_chart ON audit_log (chart_number, ts)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_actor ON audit_log (actor, ts)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_audit_row ON audit_log (table_name, row_id)"
+    )
+    for event in ("UPDATE", "DELETE"):
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS audit_log_no_{event.lower()}
+            BEFORE {event} ON audit_log
+            BEGIN
+                SELECT RAISE(ABORT, 'audit_log est en ajout seul');
+            END
+        """
+        )
+
+
+# 🔍 Différences colonne par colonne : {colonne: [avant, après]}
+def diff(
+    before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]
+) -> Dict[str, List[Any]]:
+    before, after = before or {}, after or {}
+    changes = {}
+    for column in list(before) + [c for c in after if c not in before]:
+        old, new = before.get(column), after.get(column)
+        if old != new:
+            if column in MASKED_COLUMNS:
+                old, new = "***" if old else None, "***" if new else None
+            changes[column] = [old, new]
+    return changes
+
+
+def spool_path_for(pid: int) -> str:
+    return f"{SPOOL_PREFIX}.{pid}.jsonl"
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill y termine le processus : fichier laissé à python -m utils.audit
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# 🪦 Fichiers d'écriture anticipée laissés par des processus disparus
+def orphan_spools() -> List[str]:
+    orphans = []
+    for path in glob.glob(f"{SPOOL_PREFIX}.*.jsonl"):
+        pid = path[len(SPOOL_PREFIX) + 1 : -len(".jsonl")]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            orphans.append(path)
+    return orphans
+
+
+# 👤 Auteur par défaut : l'utilisateur connecté de la session Streamlit
+def current_actor() -> Optional[str]:
+    try:
+        import streamlit as st
+
+        return st.session_state.get("username")
+    except Exception:
+        return None
+
+
+# 🧵 Écrivain tamponné : record() ne fait qu'un ajout au fichier et à la file ;
+# un thread verse les entrées dans audit_log par lots, par l'écrivain unique
+# de la base (utils/writer.py).
+class AuditWriter:
+    def __init__(self, db_path: str = DB_PATH, spool_path: Optional[str] = None):
+        self.db_path = db_path
+        self.spool_path = spool_path or spool_path_for(os.getpid())
+        self.pending: List[Tuple] = []
+        self.table_ready = False
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.replayed = self.replay_spool()
+        self.spool = open(self.spool_path, "a", encoding="utf-8")
+        self.thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def _insert(self, entries: List[Tuple]) -> None:
+        if not self.table_ready:
+            write_transaction(create_audit_table, self.db_path)
+            self.table_ready = True
+        write_many(
+            """
+            INSERT OR IGNORE INTO audit_log
+                (entry_id, ts, actor, action, table_name, row_id,
+                 chart_number, diff)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            entries,
+            self.db_path,
+        )
+
+    # 🔁 Entrées d'un arrêt brutal (fichier de ce processus, s'il reste d'un
+    # pid réutilisé, et fichiers orphelins) : rejouées puis supprimées ;
+    # entry_id rend l'opération idempotente
+    def replay_spool(self) -> int:
+        replayed = 0
+        for path in sorted(set(orphan_spools() + [self.spool_path])):
+            if not os.path.exists(path):
+                continue
+            entries = []
+            with open(path, encoding="utf-8") as spool:
+                for line in spool:
+                    try:
+                        entries.append(tuple(json.loads(line)))
+                    except ValueError:
+                        continue  # dernière ligne tronquée
+            if entries:
+                self._insert(entries)
+            os.remove(path)
+            replayed += len(entries)
+        return replayed
+
+    def record(self, entry: Tuple) -> None:
+        line = json.dumps(entry, default=str, ensure_ascii=False)
+        with self.lock:
+            self.spool.write(line + "\n")
+            self.spool.flush()
+            self.pending.append(entry)
+            full = len(self.pending) >= BATCH_SIZE
+        if full:
+            self.wakeup.set()
+
+    def flush(self) -> int:
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return 0
+            try:
+                self._insert(batch)
+            except (sqlite3.Error, TimeoutError) as e:
+                # Lot encore en file (WritePending) : le renvoyer est sans
+                # effet, entry_id est unique
+                print(f"⚠️ Journal d'audit : versement reporté ({e})")
+                with self.lock:
+                    self.pending = batch + self.pending
+                return 0
+            with self.lock:
+                # Tout est en base : le fichier peut repartir de zéro
+                if not self.pending:
+                    self.spool.truncate(0)
+                    self.spool.seek(0)
+            return len(batch)
+
+    def _run(self) -> None:
+        while True:
+            self.wakeup.wait(FLUSH_SECONDS)
+            self.wakeup.clear()
+            self.flush()
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+# ✅ Écrivain unique par processus
+def get_writer() -> AuditWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter()
+        return _writer
+
+
+# 🧾 Entrée du journal ; None si une mise à jour ne change aucune colonne
+def make_entry(
+    action: str,
+    table: str,
+    row_id: Any = None,
+    before: Optional[Dict[str, Any]] = None,
+    after: Optional[Dict[str, Any]] = None,
+    actor: Optional[str] = None,
+    chart_number: Optional[str] = None,
+) -> Optional[Tuple]:
+    changes = diff(before, after)
+    if not changes and action == "update":
+        return None
+    if chart_number is None:
+        chart_number = (after or {}).get("chart_number") or (before or {}).get(
+            "chart_number"
+        )
+    return (
+        uuid.uuid4().hex,
+        time.time(),
+        actor if actor is not None else current_actor(),
+        action,
+        table,
+        None if row_id is None else str(row_id),
+        chart_number,
+        json.dumps(changes, default=str, ensure_ascii=False),
+    )
+
+
+# ➕ Ajoute une entrée, une fois l'écriture journalisée validée (commit) ;
+# rien n'est écrit si aucune colonne n'a changé
+def record(
+    action: str,
+    table: str,
+    row_id: Any = None,
+    before: Optional[Dict[str, Any]] = None,
+    after: Optional[Dict[str, Any]] = None,
+    actor: Optional[str] = None,
+    chart_number: Optional[str] = None,
+) -> bool:
+    entry = make_entry(action, table, row_id, before, after, actor, chart_number)
+    if entry is None:
+        return False
+    get_writer().record(entry)
+    return True
+
+
+# ➕ Entrées préparées par audited_execute, versées après le commit
+def record_entries(entries: List[Tuple]) -> int:
+    writer = get_writer()
+    for entry in entries:
+        writer.record(entry)
+    return len(entries)
+
+
+_WRITE_PATTERN = re.compile(
+    r"^\s*(UPDATE|DELETE\s+FROM)\s+[\"']?(\w+)[\"']?\s+(?:SET\s+(.*?)\s+)?"
+    r"WHERE\s+(.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _rows(cursor: sqlite3.Cursor, sql: str, params: Tuple) -> Dict[Any, Dict]:
+    cursor.execute(sql, params)
+    names = [d[0] for d in cursor.description]
+    return {row[0]: dict(zip(names[1:], row[1:])) for row in cursor.fetchall()}
+
+
+# ✏️ Exécute un UPDATE ou un DELETE … WHERE et prépare une entrée par ligne
+# touchée. Les lignes sont relues par rowid avant et après, dans la même
+# transaction (celle de Backend.transaction, qui appelle cette fonction).
+# Les entrées sont renvoyées, pas enregistrées : l'appelant les passe à
+# record_entries() après le commit, jamais pour une écriture annulée.
+def audited_execute(
+    cursor: sqlite3.Cursor, query: str, params: Tuple, actor: Optional[str] = None
+) -> List[Tuple]:
+    match = _WRITE_PATTERN.match(query)
+    if match is None:
+        cursor.execute(query, params)
+        return []
+    verb, table, assignments, where = match.groups()
+    where_params = tuple(params[(assignments or "").count("?") :])
+    select = f"SELECT rowid, * FROM {table} WHERE {where}"
+    # Point de sauvegarde : en PostgreSQL (utils/storage.py), une relecture
+    # en échec invaliderait toute la transaction
+    cursor.execute("SAVEPOINT audit_before")
+    try:
+        before = _rows(cursor, select, where_params)
+    except sqlite3.Error:
+        # Table sans rowid ou clause inhabituelle : pas de diff possible
+        cursor.execute("ROLLBACK TO audit_before")
+        before = {}
+    cursor.execute("RELEASE audit_before")
+    cursor.execute(query, params)
+    if not before:
+        return []
+    after = {}
+    if verb.upper() == "UPDATE":
+        placeholders = ", ".join("?" for _ in before)
+        after = _rows(
+            cursor,
+            f"SELECT rowid, * FROM {table} WHERE rowid IN ({placeholders})",
+            tuple(before),
+        )
+    action = "update" if verb.upper() == "UPDATE" else "delete"
+    entries = [
+        make_entry(action, table, rowid, old, after.get(rowid), actor)
+        for rowid, old in before.items()
+    ]
+    return [entry for entry in entries if entry is not None]
+
+
+# 📋 Requêtes de consultation (index chart_number/actor + ts)
+def get_audit_entries(
+    chart_number: Optional[str] = None,
+    actor: Optional[str] = None,
+    table: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 500,
+) -> List[sqlite3.Row]:
+    clauses, params = [], []
+    for column, value in [
+        ("chart_number", chart_number),
+        ("actor", actor),
+        ("table_name", table),
+    ]:
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since is not None:
+        clauses.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("ts < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    if _writer is not None:
+        _writer.flush()
+    conn = get_db_connection()
+    create_audit_table(conn)
+    rows = conn.execute(
+        f"SELECT * FROM audit_log {where} ORDER BY ts DESC LIMIT ?",
+        (*params, limit),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def get_audit_actors() -> List[str]:
+    conn = get_db_connection()
+    create_audit_table(conn)
+    rows = conn.execute(
+        "SELECT DISTINCT actor FROM audit_log WHERE actor IS NOT NULL ORDER BY actor"
+    ).fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+# 👇 Exécution directe : verse les fichiers d'écriture anticipée orphelins
+# (ou celui indiqué) dans la base
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    writer = AuditWriter(spool_path=path)
+    print(f"📝 Journal d'audit : {writer.replayed} entrée(s) versée(s).")
@@ -1,15 +1,14 @@
 import bcrypt
-import sqlite3
 import streamlit as st
 
+from utils.storage import get_backend
+
 DB_PATH = "users.db"
 
 
 # 🔧 Initialisation de la base si elle n'existe pas
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
+    get_backend(DB_PATH).execute(
         """
         CREATE TABLE IF NOT EXISTS users (
             username TEXT PRIMARY KEY,
@@ -18,8 +17,6 @@ def init_db():
         )
     """
     )
-    conn.commit()
-    conn.close()
 
 
 # 🔐 Hachage du mot de passe
@@ -34,15 +31,10 @@ def verify_password(password: str, password_hash: str) -> bool:
 
 # 🔎 Récupération d’un utilisateur
 def get_user(username: str):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
+    return get_backend(DB_PATH).fetch_one(
         "SELECT username, password_hash, role FROM users WHERE username = ?",
         (username,),
     )
-    user = c.fetchone()
-    conn.close()
-    return user
 
 
 # ➕ Création d’un nouvel utilisateur
@@ -50,14 +42,10 @@ def create_user(username: str, password: str, role: str = "user") -> bool:
     if get_user(username):
         return False  # utilisateur déjà existant
     password_hash = hash_password(password)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
+    get_backend(DB_PATH).execute(
         "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
         (username, password_hash, role),
     )
-    conn.commit()
-    conn.close()
     return True
 
 
@@ -0,0 +1,259 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.jobs import job_handler
+
+DB_PATH = "data.db"
+BACKUP_DIR = "backups"
+
+# 🗄️ Bases sauvegardées par la tâche planifiée (celles qui existent)
+BACKUP_DATABASES = ["data.db", "users.db"]
+
+# 🔁 Nombre de sauvegardes planifiées conservées par base ; les sauvegardes
+# étiquetées (« pre-restore », manuelles) ne sont jamais retirées
+KEEP = 14
+
+# 🐢 Copie par tranches : entre deux tranches, le verrou est relâché et les
+# écrivains de l'application peuvent passer. En mode WAL, la lecture ne
+# bloque pas les écrivains : la copie se fait alors en une seule passe, ce
+# qui évite qu'une écriture concurrente ne la fasse recommencer.
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005
+
+# 🔂 Chaque écriture concurrente fait recommencer la copie par tranches ;
+# au-delà de ce nombre de reprises, la copie se termine en une seule passe
+MAX_RESTARTS = 3
+
+
+class _Restarted(Exception):
+    pass
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _check(path: str) -> str:
+    conn = sqlite3.connect(path)
+    result = conn.execute("PRAGMA quick_check").fetchone()[0]
+    conn.close()
+    return result
+
+
+# 💾 Sauvegarde à chaud : API de sauvegarde SQLite, contrôle d'intégrité,
+# compression gzip, empreinte SHA-256 et manifeste JSON avec les durées
+def backup_database(
+    db_path: str = DB_PATH, dest_dir: str = BACKUP_DIR, label: str = ""
+) -> Dict[str, Any]:
+    os.makedirs(dest_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    # Suffixe unique : deux sauvegardes dans la même seconde (restauration
+    # puis tâche planifiée) ne s'écrasent pas
+    stamp = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    suffix = f"-{label}" if label else ""
+    archive = os.path.join(dest_dir, f"{name}-{stamp}{suffix}.db.gz")
+    copy_path = archive[: -len(".gz")] + ".tmp"
+    timings = {}
+
+    started = time.perf_counter()
+    steps = restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal steps, restarts, last_remaining
+        steps += 1
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _Restarted()
+        last_remaining = remaining
+
+    source = sqlite3.connect(db_path, timeout=30)
+    target = sqlite3.connect(copy_path)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        try:
+            source.backup(
+                target,
+                pages=-1 if wal else PAGES_PER_STEP,
+                progress=progress,
+                sleep=STEP_SLEEP,
+            )
+        except _Restarted:
+            source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    timings["copy"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    check = _check(copy_path)
+    timings["check"] = time.perf_counter() - started
+    if check != "ok":
+        os.remove(copy_path)
+        raise RuntimeError(f"Copie de {db_path} corrompue : {check}")
+
+    started = time.perf_counter()
+    with open(copy_path, "rb") as src, gzip.open(archive, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    size = os.path.getsize(copy_path)
+    os.remove(copy_path)
+    timings["compress"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    manifest = {
+        "source": os.path.abspath(db_path),
+        "archive": os.path.basename(archive),
+        "label": label,
+        "created_at": time.time(),
+        "size": size,
+        "compressed_size": os.path.getsize(archive),
+        "sha256": _sha256(archive),
+        "steps": steps,
+        "restarts": restarts,
+        "wal": wal,
+    }
+    timings["checksum"] = time.perf_counter() - started
+    manifest["timings"] = {step: round(seconds, 4) for step, seconds in timings.items()}
+    with open(archive + ".json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    rotate(name, dest_dir)
+    return manifest
+
+
+# 🏷️ Étiquette d'une sauvegarde (manifestes antérieurs : lue dans le nom)
+def _label(manifest: Dict[str, Any]) -> str:
+    if "label" in manifest:
+        return manifest["label"]
+    match = re.search(r"-\d{8}-\d{6}-(.+)\.db\.gz$", manifest["archive"])
+    return match.group(1) if match else ""
+
+
+# 🔁 Rotation : seules les KEEP sauvegardes planifiées les plus récentes d'une
+# base restent ; les sauvegardes étiquetées ne sont ni comptées ni retirées
+def rotate(name: str, dest_dir: str = BACKUP_DIR, keep: int = KEEP) -> List[str]:
+    removed = []
+    scheduled = [m for m in list_backups(dest_dir, name) if not _label(m)]
+    for manifest in scheduled[keep:]:
+        for path in (manifest["path"], manifest["path"] + ".json"):
+            if os.path.exists(path):
+                os.remove(path)
+        removed.append(manifest["archive"])
+    return removed
+
+
+# 📋 Sauvegardes disponibles, de la plus récente à la plus ancienne
+def list_backups(
+    dest_dir: str = BACKUP_DIR, name: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    if not os.path.isdir(dest_dir):
+        return []
+    manifests = []
+    for file_name in os.listdir(dest_dir):
+        if not file_name.endswith(".db.gz.json"):
+            continue
+        if name and not file_name.startswith(f"{name}-"):
+            continue
+        with open(os.path.join(dest_dir, file_name), encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["path"] = os.path.join(dest_dir, manifest["archive"])
+        manifests.append(manifest)
+    return sorted(manifests, key=lambda m: m["created_at"], reverse=True)
+
+
+def verify_backup(archive: str) -> bool:
+    with open(archive + ".json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return _sha256(archive) == manifest["sha256"]
+
+
+# ♻️ Restauration : empreinte vérifiée, copie décompressée contrôlée, puis
+# écriture dans la base cible par l'API de sauvegarde (les connexions
+# ouvertes voient directement le nouveau contenu). L'état courant est
+# sauvegardé juste avant, avec l'étiquette « pre-restore ».
+def restore_backup(archive: str, target_path: str = DB_PATH) -> Dict[str, Any]:
+    if not verify_backup(archive):
+        raise RuntimeError(f"Empreinte invalide pour {archive}")
+    timings = {}
+    started = time.perf_counter()
+    copy_path = archive[: -len(".gz")] + ".restore"
+    with gzip.open(archive, "rb") as src, open(copy_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    check = _check(copy_path)
+    if check != "ok":
+        os.remove(copy_path)
+        raise RuntimeError(f"Sauvegarde {archive} corrompue : {check}")
+    timings["decompress"] = time.perf_counter() - started
+
+    # Après la décompression : la rotation peut alors retirer l'archive
+    if os.path.exists(target_path):
+        started = time.perf_counter()
+        backup_database(target_path, os.path.dirname(archive) or ".", "pre-restore")
+        timings["pre_restore_backup"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    source = sqlite3.connect(copy_path)
+    target = sqlite3.connect(target_path, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+        os.remove(copy_path)
+    timings["restore"] = time.perf_counter() - started
+    return {
+        "archive": os.path.basename(archive),
+        "target": target_path,
+        "timings": {step: round(seconds, 4) for step, seconds in timings.items()},
+    }
+
+
+# 🔄 Tâche de fond : sauvegarde de chaque base existante
+@job_handler("backup")
+def backup_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    results = {}
+    for db_path in payload.get("databases") or BACKUP_DATABASES:
+        if os.path.exists(db_path):
+            manifest = backup_database(db_path, payload.get("dest_dir", BACKUP_DIR))
+            results[db_path] = {
+                "archive": manifest["archive"],
+                "timings": manifest["timings"],
+            }
+    return results
+
+
+# 👇 Exécution directe :
+#   python -m utils.backup                    sauvegarde data.db et users.db
+#   python -m utils.backup list               sauvegardes disponibles
+#   python -m utils.backup restore <archive> [base cible]
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "backup"
+    if command == "backup":
+        for db_path, result in backup_job({}).items():
+            print(f"💾 {db_path} → {result['archive']} {result['timings']}")
+    elif command == "list":
+        for m in list_backups():
+            state = "✅" if verify_backup(m["path"]) else "❌"
+            print(
+                f"{state} {m['archive']} "
+                f"({m['compressed_size'] / 1024:.0f} Ko, {m['timings']})"
+            )
+    elif command == "restore" and len(sys.argv) > 2:
+        target = sys.argv[3] if len(sys.argv) > 3 else DB_PATH
+        print(f"♻️ {restore_backup(sys.argv[2], target)}")
+    else:
+        print("Usage : python -m utils.backup [backup|list|restore <archive> [base]]")
@@ -0,0 +1,90 @@
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+
+from utils.calendar_view import fetch_window_rendez_vous
+from utils.jobs import job_handler
+
+SCOPES = ["https://www.googleapis.com/auth/calendar.events"]
+TOKEN_FILE = "token.json"
+CLIENT_FILE = "client_id.json"
+TIME_ZONE = "America/Toronto"
+EVENT_MINUTES = 30
+
+
+# 🔑 Autorisation interactive (page Streamlit, navigateur local)
+def authorize_google_calendar() -> None:
+    flow = InstalledAppFlow.from_client_secrets_file(CLIENT_FILE, SCOPES)
+    creds = flow.run_local_server(port=0)
+    with open(TOKEN_FILE, "w") as token:
+        token.write(creds.to_json())
+
+
+def is_authorized() -> bool:
+    return os.path.exists(TOKEN_FILE)
+
+
+# 🔌 Service Calendar pour un worker : jamais d'autorisation interactive
+def get_google_calendar_service():
+    if not os.path.exists(TOKEN_FILE):
+        raise RuntimeError("Google Calendar non autorisé (token.json manquant).")
+    creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+    if not creds.valid:
+        if not (creds.expired and creds.refresh_token):
+            raise RuntimeError("Jeton Google Calendar invalide : ré-autoriser.")
+        creds.refresh(Request())
+        with open(TOKEN_FILE, "w") as token:
+            token.write(creds.to_json())
+    return build("calendar", "v3", credentials=creds)
+
+
+def event_exists(service, nom: str, motif: str, start: datetime) -> bool:
+    events_result = (
+        service.events()
+        .list(
+            calendarId="primary",
+            timeMin=start.isoformat(),
+            timeMax=(start + timedelta(minutes=EVENT_MINUTES)).isoformat(),
+            q=motif,
+            singleEvents=True,
+        )
+        .execute()
+    )
+    return len(events_result.get("items", [])) > 0
+
+
+# 🔄 Synchronisation d'une fenêtre de rendez-vous (tâche de fond)
+@job_handler("calendar_sync")
+def sync_window(payload: Dict[str, Any]) -> Dict[str, Any]:
+    start = date.fromisoformat(payload["start"])
+    end = date.fromisoformat(payload["end"])
+    nom_filter = payload.get("nom")
+    service = get_google_calendar_service()
+    synced = skipped = 0
+    for nom, day, heure, motif in fetch_window_rendez_vous(start, end):
+        if nom_filter and nom != nom_filter:
+            continue
+        try:
+            moment = datetime.fromisoformat(f"{str(day)[:10]} {str(heure)[:8]}")
+        except ValueError:
+            skipped += 1
+            continue
+        if event_exists(service, nom, motif, moment):
+            continue
+        event = {
+            "summary": motif,
+            "description": f"Patient: {nom}",
+            "start": {"dateTime": moment.isoformat(), "timeZone": TIME_ZONE},
+            "end": {
+                "dateTime": (moment + timedelta(minutes=EVENT_MINUTES)).isoformat(),
+                "timeZone": TIME_ZONE,
+            },
+        }
+        service.events().insert(calendarId="primary", body=event).execute()
+        synced += 1
+    return {"synced": synced, "skipped": skipped}
@@ -0,0 +1,121 @@
+import sqlite3
+from collections import Counter
+from datetime import date, timedelta
+from typing import List, Tuple, Any
+
+import plotly.graph_objects as go
+
+from utils.perf import timed
+from utils.recurrence import get_window_occurrences
+from utils.rendez_vous import migrate_rendez_vous
+
+DB_PATH = "data.db"
+
+# 🗓️ Fenêtres d'affichage disponibles
+VIEWS = ["Jour", "Semaine", "Mois"]
+
+# 🕒 Plage horaire affichée dans la grille
+FIRST_HOUR = 7
+LAST_HOUR = 20
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 📇 Index sur la date : chaque vue ne lit que sa fenêtre (schéma migré
+# au passage, utils/rendez_vous.py)
+def ensure_calendar_index() -> None:
+    conn = get_db_connection()
+    migrate_rendez_vous(conn)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rendez_vous_date_heure "
+        "ON rendez_vous (date, heure)"
+    )
+    conn.commit()
+    conn.close()
+
+
+# 📐 Bornes [début, fin[ de la fenêtre visible
+def get_window(anchor: date, view: str) -> Tuple[date, date]:
+    if view == "Jour":
+        return anchor, anchor + timedelta(days=1)
+    if view == "Semaine":
+        start = anchor - timedelta(days=anchor.weekday())
+        return start, start + timedelta(days=7)
+    start = anchor.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month
+
+
+# 📋 Rendez-vous de la fenêtre seulement (ponctuels + séries récurrentes)
+@timed(kind="db")
+def fetch_window_rendez_vous(start: date, end: date) -> List[Tuple[Any]]:
+    conn = get_db_connection()
+    rows = conn.execute(
+        """
+        SELECT nom, date, heure, motif FROM rendez_vous
+        WHERE date >= ? AND date < ?
+        ORDER BY date, heure
+        """,
+        (start.isoformat(), end.isoformat()),
+    ).fetchall()
+    conn.close()
+    rows = [tuple(row) for row in rows] + get_window_occurrences(start, end)
+    return sorted(rows, key=lambda row: (str(row[1]), str(row[2])))
+
+
+# 🧮 Nombre de rendez-vous par jour et par heure, agrégé par SQLite
+@timed(kind="db")
+def fetch_window_counts(start: date, end: date) -> List[Tuple[str, int, int]]:
+    conn = get_db_connection()
+    rows = conn.execute(
+        """
+        SELECT date, CAST(substr(heure, 1, 2) AS INTEGER) AS hour, COUNT(*)
+        FROM rendez_vous
+        WHERE date >= ? AND date < ?
+        GROUP BY date, hour
+        """,
+        (start.isoformat(), end.isoformat()),
+    ).fetchall()
+    conn.close()
+
+    counts = Counter({(day, hour): count for day, hour, count in rows})
+    for _, day, heure, _ in get_window_occurrences(start, end):
+        hour = int(str(heure)[:2]) if heure else None
+        counts[(day, hour)] += 1
+    return [(day, hour, count) for (day, hour), count in counts.items()]
+
+
+# 📊 Grille jour × heure : une seule trace, taille bornée par la fenêtre
+@timed(kind="chart")
+def build_calendar_figure(
+    start: date, end: date, counts: List[Tuple[str, int, int]]
+) -> go.Figure:
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+    day_index = {d.isoformat(): i for i, d in enumerate(days)}
+
+    low = min([FIRST_HOUR] + [hour for _, hour, _ in counts if hour is not None])
+    high = max([LAST_HOUR] + [hour for _, hour, _ in counts if hour is not None])
+    hours = list(range(low, high + 1))
+
+    z = [[0] * len(days) for _ in hours]
+    for day, hour, count in counts:
+        if day in day_index and hour is not None:
+            z[hour - low][day_index[day]] = count
+
+    fig = go.Figure(
+        go.Heatmap(
+            x=[d.strftime("%a %d/%m") for d in days],
+            y=[f"{h:02d}:00" for h in hours],
+            z=z,
+            colorscale="Blues",
+            hovertemplate="%{x} %{y}<br>%{z} rendez-vous<extra></extra>",
+        )
+    )
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(height=500, margin=dict(l=10, r=10, t=30, b=10))
+    return fig
@@ -0,0 +1,230 @@
+import json
+import sqlite3
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.jobs import job_handler
+from utils.writer import WritePending, write
+
+DB_PATH = "data.db"
+
+# 📡 Tables suivies : chaque insertion, modification ou suppression y ajoute
+# une ligne au journal des changements
+CDC_TABLES = ["demographics", "prenatal_care", "rendez_vous", "private_messages"]
+
+# 🧹 Conservation minimale des changements déjà lus par tous les consommateurs
+RETENTION_SECONDS = 7 * 24 * 3600
+
+BATCH_SIZE = 1000
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🏗️ Journal des changements et curseurs des consommateurs. seq est
+# strictement croissant : SQLite n'a qu'un écrivain à la fois, donc les
+# numéros sont validés dans l'ordre et « seq > curseur » ne saute rien.
+def create_change_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D')),
+            row_id INTEGER NOT NULL,
+            chart_number TEXT,
+            data TEXT,
+            ts REAL NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log (table_name, seq)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS change_cursors (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL
+        )
+    """
+    )
+
+
+# 🧾 Image JSON de la ligne (les BLOB, comme les pièces jointes, sont exclus)
+def _row_json(ref: str, columns: List[sqlite3.Row]) -> str:
+    pairs = ", ".join(
+        f"'{col['name']}', {ref}.{col['name']}"
+        for col in columns
+        if (col["type"] or "").upper() != "BLOB"
+    )
+    return f"json_object({pairs})"
+
+
+# 🔁 Triggers d'une table, recréés pour suivre ses colonnes actuelles
+def install_triggers(conn: sqlite3.Connection, table: str) -> bool:
+    columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    if not columns:
+        return False
+    names = [col["name"] for col in columns]
+    now = "(julianday('now') - 2440587.5) * 86400.0"
+    for event, op, ref in (
+        ("INSERT", "I", "NEW"),
+        ("UPDATE", "U", "NEW"),
+        ("DELETE", "D", "OLD"),
+    ):
+        trigger = f"trg_cdc_{table}_{event.lower()}"
+        chart = f"{ref}.chart_number" if "chart_number" in names else "NULL"
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute(
+            f"""
+            CREATE TRIGGER {trigger} AFTER {event} ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, op, row_id, chart_number, data, ts)
+                VALUES ('{table}', '{op}', {ref}.rowid, {chart},
+                        {_row_json(ref, columns)}, {now});
+            END
+        """
+        )
+    return True
+
+
+def install_changefeed(tables: Sequence[str] = CDC_TABLES) -> List[str]:
+    conn = get_db_connection()
+    create_change_tables(conn)
+    installed = [table for table in tables if install_triggers(conn, table)]
+    conn.commit()
+    conn.close()
+    return installed
+
+
+_feed_ready = False
+
+
+# ✅ Création unique par processus
+def ensure_changefeed() -> None:
+    global _feed_ready
+    if not _feed_ready:
+        install_changefeed()
+        _feed_ready = True
+
+
+# 📥 Changements postérieurs à un curseur, dans l'ordre
+def get_changes(
+    since: int, tables: Optional[Sequence[str]] = None, limit: int = BATCH_SIZE
+) -> List[Dict[str, Any]]:
+    ensure_changefeed()
+    query = "SELECT * FROM change_log WHERE seq > ?"
+    params: List[Any] = [since]
+    if tables:
+        query += f" AND table_name IN ({', '.join('?' for _ in tables)})"
+        params.extend(tables)
+    conn = get_db_connection()
+    rows = conn.execute(f"{query} ORDER BY seq LIMIT ?", (*params, limit)).fetchall()
+    conn.close()
+    changes = []
+    for row in rows:
+        change = dict(row)
+        change["data"] = json.loads(row["data"]) if row["data"] else None
+        changes.append(change)
+    return changes
+
+
+def latest_seq() -> int:
+    ensure_changefeed()
+    conn = get_db_connection()
+    seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+    conn.close()
+    return seq
+
+
+# 📌 Curseur persistant par consommateur
+def get_cursor(consumer: str) -> int:
+    ensure_changefeed()
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT seq FROM change_cursors WHERE consumer = ?", (consumer,)
+    ).fetchone()
+    conn.close()
+    return row["seq"] if row else 0
+
+
+# ✍️ Par l'écrivain unique (utils/writer.py) ; un curseur encore en file sera
+# avancé plus tard (au pire, le lot est relu)
+def set_cursor(consumer: str, seq: int) -> None:
+    ensure_changefeed()
+    try:
+        write(
+            """
+            INSERT INTO change_cursors (consumer, seq, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (consumer)
+            DO UPDATE SET seq = excluded.seq, updated_at = excluded.updated_at
+            """,
+            (consumer, seq, time.time()),
+            DB_PATH,
+        )
+    except WritePending:
+        pass
+
+
+# 🔄 Traite tous les changements en attente, lot par lot. Le curseur avance
+# après chaque lot traité sans erreur : un lot en échec sera relu.
+def consume(
+    consumer: str,
+    handler: Callable[[List[Dict[str, Any]]], None],
+    tables: Optional[Sequence[str]] = None,
+    limit: int = BATCH_SIZE,
+) -> int:
+    cursor = get_cursor(consumer)
+    total = 0
+    while True:
+        changes = get_changes(cursor, tables, limit)
+        if not changes:
+            break
+        handler(changes)
+        cursor = changes[-1]["seq"]
+        set_cursor(consumer, cursor)
+        total += len(changes)
+        if len(changes) < limit:
+            break
+    return total
+
+
+# 🧹 Purge des changements lus par tous les consommateurs et assez anciens
+def prune_changes(retention_seconds: float = RETENTION_SECONDS) -> int:
+    ensure_changefeed()
+    conn = get_db_connection()
+    floor = conn.execute("SELECT MIN(seq) FROM change_cursors").fetchone()[0]
+    conn.close()
+    if floor is None:
+        return 0
+    result = write(
+        "DELETE FROM change_log WHERE seq <= ? AND ts < ?",
+        (floor, time.time() - retention_seconds),
+        DB_PATH,
+    )
+    return result.rowcount
+
+
+@job_handler("prune_change_log")
+def prune_change_log(payload: Dict[str, Any]) -> Dict[str, Any]:
+    retention = payload.get("retention_seconds", RETENTION_SECONDS)
+    return {"pruned": prune_changes(retention)}
+
+
+# 👇 Exécution directe : installe les triggers et affiche l'état des curseurs
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        DB_PATH = sys.argv[1]
+    print(f"📡 Tables suivies : {', '.join(install_changefeed())}")
+    conn = get_db_connection()
+    for row in conn.execute("SELECT consumer, seq FROM change_cursors"):
+        print(f"   {row['consumer']} → {row['seq']}")
+    print(f"   dernier changement : {latest_seq()}")
+    conn.close()
@@ -0,0 +1,174 @@
+import os
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.perf import timed
+
+# 📉 Données de graphiques agrégées côté serveur : histogrammes et cartes de
+# chaleur pré-comptés, nuages et séries réduits. Les figures Plotly et
+# matplotlib sont construites sur ces tableaux, jamais sur les lignes brutes.
+
+# 📦 Budget par figure : nombre de points envoyés au navigateur et taille
+# maximale du JSON Plotly (au-delà, le détail du span le signale)
+MAX_POINTS = int(os.environ.get("CHART_MAX_POINTS", "2000"))
+MAX_PAYLOAD_BYTES = int(os.environ.get("CHART_MAX_PAYLOAD_KB", "256")) * 1024
+
+# 🟥 Carte de chaleur : valeurs exactes tant qu'un axe en compte au plus
+# autant, intervalles réguliers au-delà
+MAX_HEATMAP_BINS = 60
+
+
+def _numeric(values: Any) -> np.ndarray:
+    numbers = pd.to_numeric(pd.Series(values), errors="coerce")
+    return numbers.dropna().to_numpy(dtype=float)
+
+
+# 📊 Histogramme pré-compté : bornes, centre et effectif de chaque classe
+@timed(kind="pandas")
+def histogram_bins(
+    values: Any, bins: int = 10, value_range: Optional[Tuple[float, float]] = None
+) -> pd.DataFrame:
+    numbers = _numeric(values)
+    if not len(numbers):
+        return pd.DataFrame(columns=["left", "right", "center", "count"])
+    counts, edges = np.histogram(numbers, bins=bins, range=value_range)
+    return pd.DataFrame(
+        {
+            "left": edges[:-1],
+            "right": edges[1:],
+            "center": (edges[:-1] + edges[1:]) / 2,
+            "count": counts,
+        }
+    )
+
+
+# 🏷️ Effectifs par catégorie (et par couleur) : remplace px.histogram sur
+# une colonne texte
+@timed(kind="pandas")
+def category_counts(
+    df: pd.DataFrame, x: str, color: Optional[str] = None
+) -> pd.DataFrame:
+    keys = [x] if color is None else [x, color]
+    return df.groupby(keys, dropna=False).size().reset_index(name="count")
+
+
+# 🔢 Axe de carte de chaleur : codes et étiquettes. Valeurs exactes si peu
+# nombreuses, sinon centres d'intervalles réguliers.
+def _heatmap_axis(values: np.ndarray, max_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    labels, codes = np.unique(values, return_inverse=True)
+    if len(labels) <= max_bins:
+        return codes, labels
+    edges = np.histogram_bin_edges(values, bins=max_bins)
+    codes = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, max_bins - 1)
+    return codes, (edges[:-1] + edges[1:]) / 2
+
+
+# 🟥 Carte de chaleur pré-comptée (équivalent de pivot_table(aggfunc="size")) :
+# un seul bincount sur les codes combinés des deux axes
+@timed(kind="pandas")
+def heatmap_counts(
+    df: pd.DataFrame, x: str, y: str, max_bins: int = MAX_HEATMAP_BINS
+) -> pd.DataFrame:
+    pairs = df[[x, y]].apply(pd.to_numeric, errors="coerce").dropna()
+    if pairs.empty:
+        return pd.DataFrame()
+    x_codes, x_labels = _heatmap_axis(pairs[x].to_numpy(dtype=float), max_bins)
+    y_codes, y_labels = _heatmap_axis(pairs[y].to_numpy(dtype=float), max_bins)
+    counts = np.bincount(
+        y_codes * len(x_labels) + x_codes, minlength=len(x_labels) * len(y_labels)
+    )
+    return pd.DataFrame(
+        counts.reshape(len(y_labels), len(x_labels)),
+        index=pd.Index(y_labels, name=y),
+        columns=pd.Index(x_labels, name=x),
+    )
+
+
+# ☁️ Nuage de points réduit : points identiques fusionnés (colonne count,
+# pour la taille des marqueurs). Au-delà du budget, les axes numériques sont
+# ramenés au centre d'une grille régulière, puis fusionnés à nouveau.
+@timed(kind="pandas")
+def scatter_points(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    color: Optional[str] = None,
+    max_points: int = MAX_POINTS,
+) -> pd.DataFrame:
+    keys = [x, y] if color is None else [x, y, color]
+    frame = df[keys].dropna()
+    points = frame.groupby(keys).size().reset_index(name="count")
+    if len(points) <= max_points:
+        return points
+    numeric = [k for k in (x, y) if pd.api.types.is_numeric_dtype(frame[k])]
+    if not numeric:
+        return points.nlargest(max_points, "count")
+    categorical = [k for k in keys if k not in numeric]
+    others = len(points.drop_duplicates(categorical)) if categorical else 1
+    cells = max(2, int((max_points / others) ** (1 / len(numeric))))
+    frame = frame.copy()
+    for key in numeric:
+        values = frame[key].to_numpy(dtype=float)
+        edges = np.histogram_bin_edges(values, bins=cells)
+        codes = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, cells - 1)
+        frame[key] = ((edges[:-1] + edges[1:]) / 2)[codes]
+    points = frame.groupby(keys).size().reset_index(name="count")
+    return points.nlargest(max_points, "count") if len(points) > max_points else points
+
+
+# 📈 Largest-Triangle-Three-Buckets : garde le premier et le dernier point,
+# puis, dans chaque tranche, le point qui forme le plus grand triangle avec
+# le point retenu avant et la moyenne de la tranche suivante. La forme de la
+# courbe (pics, creux) est conservée avec peu de points.
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        following = slice(stop, edges[i + 2] if i + 2 < len(edges) else n)
+        mean_x, mean_y = x[following].mean(), y[following].mean()
+        ax, ay = x[previous], y[previous]
+        area = np.abs(
+            (ax - mean_x) * (y[start:stop] - ay) - (ax - x[start:stop]) * (mean_y - ay)
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+# 📈 Série temporelle (ou numérique) triée puis réduite par LTTB au budget
+@timed(kind="pandas")
+def downsample_series(
+    df: pd.DataFrame, x: str, y: str, max_points: int = MAX_POINTS
+) -> pd.DataFrame:
+    series = df.dropna(subset=[x, y])
+    if len(series) <= max_points:
+        return series
+    xs = series[x]
+    if not pd.api.types.is_numeric_dtype(xs):
+        xs = pd.to_datetime(xs, errors="coerce")
+        series, xs = series[xs.notna()], xs[xs.notna()]
+        xs = xs.astype("int64")
+    order = np.argsort(xs.to_numpy(), kind="stable")
+    series = series.iloc[order]
+    keep = lttb(
+        xs.to_numpy(dtype=float)[order], series[y].to_numpy(dtype=float), max_points
+    )
+    return series.iloc[keep]
+
+
+# 📦 Taille du JSON d'une figure Plotly, pour le détail du span « chart ».
+# Sérialise toute la figure : à n'appeler que si l'overlay est affiché
+# (utils.perf.overlay_visible).
+def payload_detail(fig: Any, budget: int = MAX_PAYLOAD_BYTES) -> str:
+    size = len(fig.to_json())
+    points = sum(len(trace.x) for trace in fig.data if trace.x is not None)
+    flag = "⚠️ " if size > budget else ""
+    return f"{flag}{points} points, {size / 1024:.0f} Ko"
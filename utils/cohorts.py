@@ -0,0 +1,308 @@
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.perf import timed
+from utils.storage import Backend, get_backend
+
+DB_PATH = "data.db"
+
+
+# 📐 Indicateurs de cohorte (dans l'esprit du Canadian Midwifery Minimum
+# Dataset). « rate » : colonne Oui/Non → taux ; « numeric » : distribution.
+@dataclass(frozen=True)
+class Indicator:
+    name: str
+    label: str
+    table: str
+    column: str
+    kind: str
+
+
+INDICATORS = [
+    Indicator(
+        "weeks_first_visit",
+        "Semaines au 1er rendez-vous",
+        "demographics",
+        "weeks_at_first_appointment",
+        "numeric",
+    ),
+    Indicator("age", "Âge", "demographics", "age", "numeric"),
+    Indicator("bmi", "IMC", "prenatal_care", "bmi", "numeric"),
+    Indicator("tobacco", "Tabac", "prenatal_care", "tobacco_use", "rate"),
+    Indicator("substance", "Substances", "prenatal_care", "substance_use", "rate"),
+    Indicator("gdm", "Diabète gestationnel", "prenatal_care", "gdm", "rate"),
+    Indicator("anemia", "Anémie", "prenatal_care", "anemia", "rate"),
+    Indicator(
+        "high_risk_pe",
+        "Risque de prééclampsie",
+        "prenatal_care",
+        "high_risk_pe",
+        "rate",
+    ),
+    Indicator(
+        "c_section",
+        "Césarienne antérieure",
+        "prenatal_care",
+        "previous_c_section",
+        "rate",
+    ),
+    Indicator("vbac", "AVAC antérieur", "prenatal_care", "previous_vbac", "rate"),
+    Indicator(
+        "transfer", "Transfert de soins", "prenatal_care", "transfer_care", "rate"
+    ),
+]
+
+# 🧭 Axes de regroupement
+DIMENSIONS = {
+    "community": "Communauté",
+    "year": "Année de référence",
+    "referral": "Source de référence",
+}
+DEFAULT_BY = ("community", "year", "referral")
+UNKNOWN = "Non précisé"
+
+# ✅ Réponses Oui/Non (formulaires en français, données importées en anglais)
+FLAG_VALUES = {"oui": 1.0, "yes": 1.0, "1": 1.0, "non": 0.0, "no": 0.0, "0": 0.0}
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+# 🧠 Panneaux gardés en mémoire (clé : version des données + regroupement)
+CACHE_SIZE = 32
+
+_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_frames: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _columns(backend: Backend, table: str) -> set:
+    return {row[1] for row in backend.fetch_all(f"PRAGMA table_info({table})")}
+
+
+# 🏷️ Version des données lues : dernier numéro du journal des changements
+# (utils/changefeed.py) s'il existe, plus effectifs et derniers id des deux
+# tables. Lue sur la même copie que les données, elle ne peut pas les devancer.
+def data_version(backend: Backend) -> tuple:
+    try:
+        seq = backend.fetch_one("SELECT COALESCE(MAX(seq), 0) FROM change_log")[0]
+    except sqlite3.Error:
+        seq = None
+    counts = backend.fetch_one(
+        "SELECT (SELECT COUNT(*) FROM demographics),"
+        " (SELECT MAX(id) FROM demographics),"
+        " (SELECT COUNT(*) FROM prenatal_care),"
+        " (SELECT MAX(id) FROM prenatal_care)"
+    )
+    return (seq, *counts)
+
+
+# 🧾 Une ligne par référence (demographics), avec le dernier suivi prénatal
+# de la patiente. Colonnes absentes d'une ancienne base : valeurs manquantes.
+def load_cohort(backend: Backend) -> pd.DataFrame:
+    wanted = {
+        "demographics": ["chart_number", "date_of_referral"],
+        "prenatal_care": ["id", "chart_number"],
+    }
+    wanted["demographics"] += ["community_of_residence", "referred_by"]
+    for indicator in INDICATORS:
+        wanted[indicator.table].append(indicator.column)
+    frames = {}
+    for table, columns in wanted.items():
+        present = [c for c in columns if c in _columns(backend, table)]
+        frame = (
+            backend.fetch_frame(f"SELECT {', '.join(present)} FROM {table}")
+            if present
+            else pd.DataFrame()
+        )
+        frames[table] = frame.reindex(columns=columns)
+    prenatal = (
+        frames["prenatal_care"]
+        .sort_values("id")
+        .drop_duplicates("chart_number", keep="last")
+        .drop(columns="id")
+    )
+    merged = frames["demographics"].merge(prenatal, on="chart_number", how="left")
+    return build_frame(merged)
+
+
+# 🔢 Cadre numérique : axes en texte, indicateurs en float (NaN = inconnu).
+# Accepte aussi une seule table (p. ex. demographics) : le reste est inconnu.
+def build_frame(raw: pd.DataFrame) -> pd.DataFrame:
+    raw = raw.reindex(
+        columns=["date_of_referral", "community_of_residence", "referred_by"]
+        + [indicator.column for indicator in INDICATORS]
+    )
+    years = pd.to_datetime(raw["date_of_referral"], errors="coerce").dt.year
+    frame = pd.DataFrame(
+        {
+            "community": raw["community_of_residence"],
+            "year": years.astype("Int64").astype("string"),
+            "referral": raw["referred_by"],
+        }
+    )
+    for dimension in DIMENSIONS:
+        values = frame[dimension].astype("string").str.strip()
+        frame[dimension] = values.mask(values == "").fillna(UNKNOWN).astype(str)
+    for indicator in INDICATORS:
+        column = raw[indicator.column]
+        if indicator.kind == "rate":
+            flags = column.astype("string").str.strip().str.lower()
+            frame[indicator.name] = flags.map(FLAG_VALUES).astype(float)
+        else:
+            frame[indicator.name] = pd.to_numeric(column, errors="coerce")
+    return frame
+
+
+# 📏 Quantiles et mode de chaque groupe, pour une colonne déjà triée par
+# groupe : un tri (groupe, valeur), puis lecture des positions par groupe
+def _order_stats(
+    codes: np.ndarray, column: np.ndarray, starts: np.ndarray, counts: np.ndarray
+) -> Tuple[List[np.ndarray], np.ndarray]:
+    order = np.lexsort((column, codes))  # NaN en fin de chaque groupe
+    values = column[order]
+    empty = counts == 0
+    quantiles = []
+    for q in QUANTILES:
+        position = q * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(np.intp)
+        high = np.ceil(position).astype(np.intp)
+        below, above = values[starts + low], values[starts + high]
+        result = below + (above - below) * (position - low)
+        result[empty] = np.nan
+        quantiles.append(result)
+
+    mode = np.full(len(starts), np.nan)
+    valid = ~np.isnan(values)
+    group, value = codes[valid], values[valid]
+    if len(value):
+        change = np.r_[True, (group[1:] != group[:-1]) | (value[1:] != value[:-1])]
+        run_starts = np.flatnonzero(change)
+        run_length = np.diff(np.r_[run_starts, len(value)])
+        run_group, run_value = group[run_starts], value[run_starts]
+        # Série la plus longue de chaque groupe (à égalité : la plus petite)
+        pick = np.lexsort((run_value, -run_length, run_group))
+        first = np.r_[True, run_group[pick][1:] != run_group[pick][:-1]]
+        mode[run_group[pick][first]] = run_value[pick][first]
+    return quantiles, mode
+
+
+# 🔑 Numéro de groupe par ligne : chaque axe est factorisé à part, les codes
+# sont combinés en un entier (base mixte), puis renumérotés dans l'ordre
+def _group_codes(frame: pd.DataFrame, by: List[str]) -> Tuple[np.ndarray, dict]:
+    combined = np.zeros(len(frame), dtype=np.int64)
+    axes = []
+    for dimension in by:
+        codes, uniques = pd.factorize(frame[dimension], sort=True)
+        combined = combined * len(uniques) + codes
+        axes.append((dimension, np.asarray(uniques, dtype=object)))
+    keys, codes = np.unique(combined, return_inverse=True)
+    groups = {}
+    for dimension, uniques in reversed(axes):
+        groups[dimension] = uniques[keys % len(uniques)]
+        keys = keys // len(uniques)
+    return codes, {dimension: groups[dimension] for dimension in by}
+
+
+# ⚡ Panneau complet en une passe vectorisée : un tri stable par groupe,
+# puis effectifs, sommes et sommes des carrés de tous les indicateurs à la
+# fois (np.add.reduceat sur la matrice). Seuls quantiles et mode demandent
+# un tri par colonne numérique. Résultat en format long : une ligne par
+# groupe et par indicateur.
+@timed(kind="pandas")
+def compute_panel(
+    frame: pd.DataFrame, by: Sequence[str] = DEFAULT_BY
+) -> pd.DataFrame:
+    by = list(by)
+    if frame.empty:
+        return pd.DataFrame()
+    codes, groups = _group_codes(frame, by)
+
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    matrix = frame[[i.name for i in INDICATORS]].to_numpy(dtype=float)[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    size = np.diff(np.r_[starts, len(codes)])
+
+    valid = ~np.isnan(matrix)
+    # Décalage par la moyenne globale : variance stable numériquement
+    known = valid.sum(axis=0)
+    center = np.nansum(matrix, axis=0) / np.maximum(known, 1)
+    shifted = np.where(valid, matrix - center, 0.0)
+    count = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+    total = np.add.reduceat(shifted, starts, axis=0)
+    squares = np.add.reduceat(shifted * shifted, starts, axis=0)
+    low = np.fmin.reduceat(matrix, starts, axis=0)
+    high = np.fmax.reduceat(matrix, starts, axis=0)
+    with np.errstate(all="ignore"):
+        mean = np.where(count > 0, center + total / count, np.nan)
+        spread = np.maximum(squares - total * total / count, 0)
+        var = np.where(count > 1, spread / (count - 1), np.nan)
+
+    parts = []
+    for j, indicator in enumerate(INDICATORS):
+        part = {
+            **groups,
+            "indicator": indicator.name,
+            "label": indicator.label,
+            "kind": indicator.kind,
+            "patients": size,
+            "n": count[:, j],
+        }
+        if indicator.kind == "rate":
+            part["events"] = np.rint(mean[:, j] * count[:, j])
+            part["rate"] = mean[:, j]
+        else:
+            quantiles, mode = _order_stats(codes, matrix[:, j], starts, count[:, j])
+            part["mean"] = mean[:, j]
+            part["std"] = np.sqrt(var[:, j])
+            part["var"] = var[:, j]
+            part["min"] = low[:, j]
+            part.update(zip(("q1", "median", "q3"), quantiles))
+            part["max"] = high[:, j]
+            part["mode"] = mode
+        parts.append(pd.DataFrame(part, index=np.arange(len(size))))
+    return pd.concat(parts, ignore_index=True)
+
+
+# 📊 Panneau des indicateurs, lu sur la copie analytique et mis en cache
+# tant que la version des données ne change pas
+def get_panel(
+    by: Sequence[str] = DEFAULT_BY, db_path: Optional[str] = None
+) -> pd.DataFrame:
+    backend = get_backend(db_path or DB_PATH, readonly=True)
+    source = (os.path.abspath(db_path or DB_PATH), data_version(backend))
+    key = (*source, tuple(by))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+        frame = _frames.get(source)
+    if frame is None:
+        frame = load_cohort(backend)
+    panel = compute_panel(frame, by)
+    with _cache_lock:
+        _frames[source] = frame
+        _frames.move_to_end(source)
+        while len(_frames) > 2:
+            _frames.popitem(last=False)
+        _cache[key] = panel
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return panel
+
+
+# 👇 Exécution directe : python -m utils.cohorts [community] [year] [referral]
+# (sans axe : cohorte entière)
+if __name__ == "__main__":
+    dimensions = [d for d in sys.argv[1:] if d in DIMENSIONS]
+    panel = get_panel(dimensions)
+    with pd.option_context("display.width", 200, "display.max_columns", 30):
+        print(panel.round(3).to_string(index=False))
@@ -0,0 +1,90 @@
+import json
+import socketserver
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, List
+
+# 🧪 Serveurs factices pour tester la boîte d'envoi sans rien envoyer :
+# un puits SMTP (sans TLS ni authentification) et une passerelle SMS HTTP.
+SMTP_PORT = 1025
+SMS_PORT = 8025
+
+received: Dict[str, List] = {"email": [], "sms": []}
+
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode("utf-8"))
+
+    def handle(self) -> None:
+        self.reply("220 sink ESMTP")
+        envelope = {"from": None, "to": []}
+        while True:
+            line = self.rfile.readline().decode("utf-8", "replace").rstrip("\r\n")
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 sink")
+            elif command == "MAIL":
+                envelope = {"from": line[10:].strip("<> "), "to": []}
+                self.reply("250 OK")
+            elif command == "RCPT":
+                envelope["to"].append(line[8:].strip("<> "))
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline().decode("utf-8", "replace")
+                    if data.rstrip("\r\n") == ".":
+                        break
+                    lines.append(data)
+                received["email"].append({**envelope, "data": "".join(lines)})
+                print(f"📧 {envelope['from']} → {', '.join(envelope['to'])}")
+                self.reply("250 OK queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SmsSinkHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        message = json.loads(self.rfile.read(length) or b"{}")
+        received["sms"].append(message)
+        print(f"📱 → {message.get('to')} : {message.get('body')}")
+        self.send_response(202)
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class ThreadingSmtpServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+# ▶️ Démarrage des deux puits en arrière-plan ; renvoie les serveurs
+def start_sinks(smtp_port: int = SMTP_PORT, sms_port: int = SMS_PORT):
+    smtp_server = ThreadingSmtpServer(("127.0.0.1", smtp_port), SmtpSinkHandler)
+    sms_server = HTTPServer(("127.0.0.1", sms_port), SmsSinkHandler)
+    for server in (smtp_server, sms_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return smtp_server, sms_server
+
+
+# 👇 Exécution directe : python -m utils.dev_sinks [port_smtp] [port_sms]
+if __name__ == "__main__":
+    ports = [int(p) for p in sys.argv[1:3]]
+    servers = start_sinks(*ports)
+    print("🧪 Puits SMTP et SMS démarrés. Ctrl+C pour arrêter.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
@@ -0,0 +1,259 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple
+
+from utils.rendez_vous import migrate_rendez_vous
+
+DB_PATH = "data.db"
+
+# 🗃️ Tables qui composent un dossier
+DOSSIER_TABLES = ["demographics", "prenatal_care", "rendez_vous"]
+
+# 🧠 Nombre de dossiers gardés en mémoire
+CACHE_SIZE = 256
+
+
+# 🧾 Modèles typés du dossier
+@dataclass(slots=True)
+class Demographics:
+    chart_number: Optional[str] = None
+    dob: Optional[str] = None
+    date_of_referral: Optional[str] = None
+    age: Optional[str] = None
+    community_of_residence: Optional[str] = None
+    status: Optional[str] = None
+    referred_by: Optional[str] = None
+    reason_for_referral: Optional[str] = None
+    successful_first_contact: Optional[str] = None
+    eligible_to_midwifery_care: Optional[str] = None
+    reason_for_non_eligibility: Optional[str] = None
+    weeks_at_first_appointment: Optional[str] = None
+    reason_if_never_seen: Optional[str] = None
+
+
+@dataclass(slots=True)
+class PrenatalRecord:
+    id: Optional[int] = None
+    date_collection: Optional[str] = None
+    gpa: Optional[str] = None
+    edd_date: Optional[str] = None
+    tobacco_use: Optional[str] = None
+    substance_use: Optional[str] = None
+    bmi: Optional[float] = None
+    ce_cle_status: Optional[str] = None
+    racism: Optional[str] = None
+    domestic_violence: Optional[str] = None
+    housing: Optional[str] = None
+    pregnancy_loss: Optional[str] = None
+    previous_c_section: Optional[str] = None
+    previous_vbac: Optional[str] = None
+    high_risk_pe: Optional[str] = None
+    gdm: Optional[str] = None
+    anemia: Optional[str] = None
+    stbbis: Optional[str] = None
+    trainee_involved: Optional[str] = None
+    referral_worker: Optional[str] = None
+    prenatal_consultation: Optional[str] = None
+    reason1: Optional[str] = None
+    made_with1: Optional[str] = None
+    reason2: Optional[str] = None
+    made_with2: Optional[str] = None
+    reason3: Optional[str] = None
+    made_with3: Optional[str] = None
+    notes: Optional[str] = None
+    telehealth: Optional[str] = None
+    shared_care: Optional[str] = None
+    transfer_care: Optional[str] = None
+    other_transfer_reason: Optional[str] = None
+    transfer_to: Optional[str] = None
+    care_ended: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Appointment:
+    id: Optional[int] = None
+    appointment_date: Optional[str] = None
+    appointment_type: Optional[str] = None
+    appointment_detail: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    attended: Optional[str] = None
+    notes: Optional[str] = None
+
+
+@dataclass(slots=True)
+class PatientDossier:
+    chart_number: str
+    demographics: Optional[Demographics]
+    prenatal: List[PrenatalRecord]
+    rendez_vous: List[Appointment]
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    return sqlite3.connect(DB_PATH)
+
+
+# 📅 Champs du rendez-vous lus dans le schéma de rendez_vous
+# (utils/rendez_vous.py) : date et heure réunies, motif comme type
+APPOINTMENT_EXPRESSIONS = {
+    "appointment_date": "trim(date || ' ' || COALESCE(heure, ''))",
+    "appointment_type": "motif",
+}
+
+
+# 🧩 json_object('col', col, ...) généré à partir des champs du modèle
+def _json_object(model, expressions: Optional[Dict[str, str]] = None) -> str:
+    expressions = expressions or {}
+    pairs = ", ".join(
+        f"'{f.name}', {expressions.get(f.name, f.name)}" for f in fields(model)
+    )
+    return f"json_object({pairs})"
+
+
+# 📜 Une seule requête : trois sous-requêtes indexées sur chart_number
+DOSSIER_QUERY = f"""
+    SELECT
+        (SELECT version FROM dossier_versions WHERE chart_number = :chart),
+        (SELECT {_json_object(Demographics)} FROM demographics
+            WHERE chart_number = :chart ORDER BY id DESC LIMIT 1),
+        (SELECT json_group_array(json(obj)) FROM (
+            SELECT {_json_object(PrenatalRecord)} AS obj FROM prenatal_care
+            WHERE chart_number = :chart ORDER BY date_collection DESC, id DESC)),
+        (SELECT json_group_array(json(obj)) FROM (
+            SELECT {_json_object(Appointment, APPOINTMENT_EXPRESSIONS)} AS obj
+            FROM rendez_vous
+            WHERE chart_number = :chart ORDER BY date DESC, heure DESC, id DESC))
+"""
+
+_schema_ready = False
+_cache: "OrderedDict[str, Tuple[int, Optional[PatientDossier]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# 🔔 Triggers d'invalidation attendus, un par table et par événement
+DOSSIER_TRIGGERS = [
+    f"trg_{table}_dossier_{event}"
+    for table in DOSSIER_TABLES
+    for event in ("insert", "update", "delete")
+]
+
+
+# 🔎 Compteur et triggers en place ? Vérifié à chaque lecture (sqlite_master
+# est en mémoire) : reset_and_init_db.py supprime les tables, et leurs
+# triggers avec elles, sans que ce processus le sache.
+def _schema_present(conn: sqlite3.Connection) -> bool:
+    names = ["dossier_versions", *DOSSIER_TRIGGERS]
+    found = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        f" AND name IN ({', '.join('?' * len(names))})",
+        names,
+    ).fetchone()[0]
+    return found == len(names)
+
+
+# 🏗️ Index, compteur de versions et triggers d'invalidation. Les triggers
+# sont recréés au premier appel du processus pour suivre leur définition
+# actuelle, puis dès qu'il en manque ; une ligne sans chart_number ne touche
+# pas au compteur.
+def ensure_dossier_schema(conn: sqlite3.Connection) -> None:
+    global _schema_ready
+    if _schema_ready and _schema_present(conn):
+        return
+    migrate_rendez_vous(conn)
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dossier_versions (
+            chart_number TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """
+    )
+    for table in DOSSIER_TABLES:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_chart_number "
+            f"ON {table} (chart_number)"
+        )
+        for event, refs in (
+            ("INSERT", ["NEW"]),
+            ("UPDATE", ["OLD", "NEW"]),
+            ("DELETE", ["OLD"]),
+        ):
+            bumps = "".join(
+                f"""
+                INSERT INTO dossier_versions (chart_number, version)
+                SELECT {ref}.chart_number, 1 WHERE {ref}.chart_number IS NOT NULL
+                ON CONFLICT (chart_number) DO UPDATE SET version = version + 1;"""
+                for ref in refs
+            )
+            trigger = f"trg_{table}_dossier_{event.lower()}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(
+                f"""
+                CREATE TRIGGER {trigger}
+                AFTER {event} ON {table}
+                BEGIN{bumps}
+                END
+            """
+            )
+    # Lignes créées par les anciens triggers pour chart_number NULL
+    cursor.execute("DELETE FROM dossier_versions WHERE chart_number IS NULL")
+    conn.commit()
+    # Tables recréées : les versions en cache ne prouvent plus rien
+    with _cache_lock:
+        _cache.clear()
+    _schema_ready = True
+
+
+def _build(model, payload: Dict):
+    return model(**{f.name: payload.get(f.name) for f in fields(model)})
+
+
+# 🔢 Version courante du dossier (incrémentée par les triggers)
+def get_dossier_version(conn: sqlite3.Connection, chart_number: str) -> int:
+    row = conn.execute(
+        "SELECT version FROM dossier_versions WHERE chart_number = ?",
+        (chart_number,),
+    ).fetchone()
+    return row[0] if row else 0
+
+
+# 📂 Dossier complet d'une patiente (None si aucune donnée)
+def get_patient_dossier(chart_number: str) -> Optional[PatientDossier]:
+    conn = get_db_connection()
+    ensure_dossier_schema(conn)
+
+    # ⚡ Dossier déjà en cache : seule la version est relue
+    with _cache_lock:
+        cached = _cache.get(chart_number)
+    if cached and cached[0] == get_dossier_version(conn, chart_number):
+        conn.close()
+        with _cache_lock:
+            _cache.move_to_end(chart_number)
+        return cached[1]
+
+    version, demo, prenatal, rdv = conn.execute(
+        DOSSIER_QUERY, {"chart": chart_number}
+    ).fetchone()
+    conn.close()
+
+    dossier = None
+    prenatal_rows = json.loads(prenatal) if prenatal else []
+    rdv_rows = json.loads(rdv) if rdv else []
+    if demo or prenatal_rows or rdv_rows:
+        dossier = PatientDossier(
+            chart_number=chart_number,
+            demographics=_build(Demographics, json.loads(demo)) if demo else None,
+            prenatal=[_build(PrenatalRecord, row) for row in prenatal_rows],
+            rendez_vous=[_build(Appointment, row) for row in rdv_rows],
+        )
+
+    with _cache_lock:
+        _cache[chart_number] = (version or 0, dossier)
+        _cache.move_to_end(chart_number)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return dossier
@@ -0,0 +1,164 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from utils.writer import WritePending, write
+
+DB_PATH = "data.db"
+
+# ⏱️ Délai minimal entre deux écritures d'une même étape
+DEBOUNCE_SECONDS = 3.0
+
+# 🧠 Dernière version écrite et modifications en attente, par (formulaire, propriétaire, étape)
+_saved: Dict[Tuple[str, str, int], Tuple[float, str]] = {}
+_pending: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    return sqlite3.connect(DB_PATH)
+
+
+# 🏗️ Une ligne par étape : seule l'étape modifiée est réécrite
+def create_drafts_table() -> None:
+    conn = get_db_connection()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS form_drafts (
+            form_id TEXT NOT NULL,
+            owner TEXT NOT NULL,
+            step INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (form_id, owner, step)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.commit()
+    conn.close()
+
+
+_table_ready = False
+
+
+# ✅ Création unique par processus
+def ensure_drafts_table() -> None:
+    global _table_ready
+    if not _table_ready:
+        create_drafts_table()
+        _table_ready = True
+
+
+def _dumps(values: Dict[str, Any]) -> str:
+    return json.dumps(values, separators=(",", ":"), sort_keys=True, default=str)
+
+
+# ✍️ Par l'écrivain unique (utils/writer.py) ; une sauvegarde encore en file
+# après le délai d'attente sera écrite plus tard
+def _write(form_id: str, owner: str, step: int, payload: str) -> None:
+    ensure_drafts_table()
+    try:
+        write(
+            """
+            INSERT INTO form_drafts (form_id, owner, step, data, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (form_id, owner, step)
+            DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+            """,
+            (form_id, owner, step, payload, time.time()),
+            DB_PATH,
+        )
+    except WritePending:
+        pass
+
+
+# 💾 Sauvegarde différée : écrit seulement si l'étape a changé et que le délai est écoulé
+def autosave(
+    form_id: str, owner: str, step: int, values: Dict[str, Any], force: bool = False
+) -> bool:
+    key = (form_id, owner, step)
+    payload = _dumps(values)
+    now = time.monotonic()
+    with _lock:
+        last_time, last_payload = _saved.get(key, (0.0, None))
+        if payload == last_payload:
+            _pending.pop(key, None)
+            return False
+        if not force and now - last_time < DEBOUNCE_SECONDS:
+            _pending[key] = values
+            return False
+        _saved[key] = (now, payload)
+        _pending.pop(key, None)
+    _write(form_id, owner, step, payload)
+    return True
+
+
+# 🚿 Écrit immédiatement tout ce qui attend pour ce propriétaire
+def flush(form_id: str, owner: str) -> None:
+    with _lock:
+        waiting = [
+            (key[2], values)
+            for key, values in _pending.items()
+            if key[0] == form_id and key[1] == owner
+        ]
+    for step, values in waiting:
+        autosave(form_id, owner, step, values, force=True)
+
+
+# 📂 Valeurs d'une étape (modifications en attente prioritaires)
+def get_step_values(form_id: str, owner: str, step: int) -> Dict[str, Any]:
+    with _lock:
+        pending = _pending.get((form_id, owner, step))
+    if pending is not None:
+        return dict(pending)
+    ensure_drafts_table()
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT data FROM form_drafts WHERE form_id = ? AND owner = ? AND step = ?",
+        (form_id, owner, step),
+    ).fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else {}
+
+
+# 🔄 Brouillon complet : {étape: valeurs}
+def load_draft(form_id: str, owner: str) -> Dict[int, Dict[str, Any]]:
+    flush(form_id, owner)
+    ensure_drafts_table()
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT step, data FROM form_drafts WHERE form_id = ? AND owner = ?",
+        (form_id, owner),
+    ).fetchall()
+    conn.close()
+    return {step: json.loads(data) for step, data in rows}
+
+
+# 📍 Étape courante, conservée dans la ligne réservée 0
+def save_current_step(form_id: str, owner: str, step: int) -> None:
+    autosave(form_id, owner, 0, {"step": step}, force=True)
+
+
+def get_current_step(form_id: str, owner: str) -> Optional[int]:
+    return get_step_values(form_id, owner, 0).get("step")
+
+
+# 🗑️ Suppression du brouillon après soumission
+def delete_draft(form_id: str, owner: str) -> None:
+    with _lock:
+        for key in [k for k in _saved if k[0] == form_id and k[1] == owner]:
+            _saved.pop(key, None)
+        for key in [k for k in _pending if k[0] == form_id and k[1] == owner]:
+            _pending.pop(key, None)
+    ensure_drafts_table()
+    try:
+        write(
+            "DELETE FROM form_drafts WHERE form_id = ? AND owner = ?",
+            (form_id, owner),
+            DB_PATH,
+        )
+    except WritePending:
+        pass
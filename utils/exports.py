@@ -0,0 +1,153 @@
+import io
+import tempfile
+from dataclasses import asdict, fields
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fpdf import FPDF
+
+from utils.perf import timed
+
+# 📤 Exports partagés par les pages (PDF, ICS, CSV, Excel). Ils vivent hors
+# des scripts Streamlit pour être appelés par les pages comme par les
+# benchmarks (benchmarks/).
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class PDF(FPDF):
+    """
+    Classe personnalisée pour FPDF, ajoutant un en-tête et un pied de page
+    pour une mise en forme cohérente.
+    """
+
+    def __init__(self, title, orientation="P", unit="mm", format="A4"):
+        super().__init__(orientation, unit, format)
+        self.title = title
+
+    def header(self):
+        # Police Arial gras 15
+        self.set_font("Arial", "B", 15)
+        # Décalage vers la droite
+        self.cell(80)
+        # Titre
+        self.cell(30, 10, self.title, 0, 1, "C")
+        # Saut de ligne
+        self.ln(20)
+
+    def footer(self):
+        # Positionnement à 1.5 cm du bas
+        self.set_y(-15)
+        # Police Arial italique 8
+        self.set_font("Arial", "I", 8)
+        # Numéro de page
+        self.cell(0, 10, f"Page {self.page_no()}/{{nb}}", 0, 0, "C")
+
+
+# 📄 Rapport libre (titre + texte) du script des pôles
+@timed(kind="export")
+def create_pdf(title: str, content: str) -> bytes:
+    pdf = PDF(title)
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_font("Times", size=12)
+    pdf.multi_cell(0, 10, content)
+    # 'S' renvoie une chaîne : encodée en bytes pour Streamlit
+    return pdf.output(dest="S").encode("latin-1")
+
+
+# 📄 Rapport « clé : valeur » de midwives_Statistics.py
+@timed(kind="export")
+def generate_pdf(data_dict: Dict[str, Any]) -> bytes:
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt="Rapport Sage-Femme", ln=True, align="C")
+    for key, value in data_dict.items():
+        pdf.cell(200, 10, txt=f"{key}: {value}", ln=True)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+# 🧾 Une ligne « champ: valeur » par enregistrement (champs vides omis)
+def format_record(record) -> str:
+    return ", ".join(
+        f"{f.name}: {getattr(record, f.name)}"
+        for f in fields(record)
+        if getattr(record, f.name) not in (None, "")
+    )
+
+
+# 📂 Dossier patient complet en PDF ; renvoie le chemin du fichier temporaire
+@timed(kind="export")
+def generate_dossier_pdf(dossier, patient_id: str) -> str:
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(
+        200, 10, txt=f"Dossier médical du patient #{patient_id}", ln=True, align="C"
+    )
+
+    pdf.ln(10)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(200, 10, txt="📋 Informations démographiques", ln=True)
+    pdf.set_font("Arial", size=10)
+    if dossier.demographics:
+        for key, value in asdict(dossier.demographics).items():
+            pdf.cell(200, 8, txt=f"{key}: {value}", ln=True)
+
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(200, 10, txt="🤰 Soins prénatals", ln=True)
+    pdf.set_font("Arial", size=10)
+    for item in dossier.prenatal:
+        pdf.multi_cell(0, 8, txt=format_record(item))
+
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(200, 10, txt="📅 Rendez-vous", ln=True)
+    pdf.set_font("Arial", size=10)
+    for rdv in dossier.rendez_vous:
+        pdf.multi_cell(0, 8, txt=format_record(rdv))
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    pdf.output(temp_file.name)
+    return temp_file.name
+
+
+# 📅 Calendrier ICS : (titre, début, durée en minutes, description) par événement
+@timed(kind="export")
+def build_ics(events: Iterable[Tuple[str, datetime, Optional[int], str]]) -> str:
+    from ics import Calendar, Event
+
+    calendar = Calendar()
+    for name, begin, minutes, description in events:
+        event = Event()
+        event.name = name
+        event.begin = begin
+        event.duration = timedelta(minutes=minutes or 30)
+        event.description = description
+        calendar.events.add(event)
+    return "".join(calendar)
+
+
+def write_temp_file(content: str, suffix: str) -> str:
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    with open(temp_file.name, "w") as f:
+        f.write(content)
+    return temp_file.name
+
+
+# 📊 Tableaux en CSV (UTF-8) et en Excel (une feuille)
+@timed(kind="export")
+def dataframe_to_csv(df, encoding: str = "utf-8") -> bytes:
+    return df.to_csv(index=False).encode(encoding)
+
+
+@timed(kind="export")
+def dataframe_to_xlsx(df, sheet_name: str = "Données") -> bytes:
+    import pandas as pd
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name[:31])
+    return buffer.getvalue()
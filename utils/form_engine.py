@@ -0,0 +1,299 @@
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import streamlit as st
+
+from utils import drafts
+from utils.validation import ValidationError, quarantine
+
+# 🧩 Types de champs pris en charge
+WIDGETS = ["text", "textarea", "int", "float", "date", "select", "multiselect"]
+
+
+# 🧾 Description d'un champ : nom (clé des valeurs), libellé et type de widget
+@dataclass(frozen=True)
+class Field:
+    name: str
+    label: str
+    widget: str = "text"
+    options: Sequence[Any] = ()
+    default: Any = None
+    required: bool = False
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    step: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Step:
+    title: str
+    fields: Tuple[Field, ...]
+    columns: int = 1
+
+
+# 📋 Formulaire complet : les étapes et l'écriture finale (une seule transaction)
+@dataclass(frozen=True)
+class FormSchema:
+    form_id: str
+    steps: Tuple[Step, ...]
+    on_submit: Callable[[sqlite3.Connection, Dict[str, Any]], None]
+    connect: Callable[[], sqlite3.Connection]
+    submit_label: str = "📤 Soumettre"
+    review_title: str = "📋 Récapitulatif"
+    field_index: Dict[str, Field] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        index = {f.name: f for step in self.steps for f in step.fields}
+        object.__setattr__(self, "field_index", index)
+
+
+# ⬅️➡️ Boutons Précédent / Suivant partagés : renvoie -1, 0 ou +1
+def nav_buttons(
+    index: int,
+    count: int,
+    key: str,
+    in_form: bool = False,
+    next_label: str = "Suivant ➡️",
+    allow_last: bool = False,
+) -> int:
+    button = st.form_submit_button if in_form else st.button
+    col1, col2 = st.columns(2)
+    with col1:
+        back = button("⬅️ Précédent", disabled=(index == 0), key=f"{key}_prev")
+    with col2:
+        forward = button(
+            next_label,
+            disabled=(index >= count - 1 and not allow_last),
+            key=f"{key}_next",
+        )
+    if back:
+        return -1
+    if forward:
+        return 1
+    return 0
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if value is None or value == "" or isinstance(value, date):
+        return value or None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _initial(f: Field, value: Any) -> Any:
+    if value is not None:
+        return value
+    return f.default() if callable(f.default) else f.default
+
+
+# 🖊️ Rendu d'un champ à partir de la valeur mémorisée
+def render_field(f: Field, value: Any, key: str) -> Any:
+    value = _initial(f, value)
+    if f.widget == "text":
+        return st.text_input(f.label, value=value or "", key=key)
+    if f.widget == "textarea":
+        return st.text_area(f.label, value=value or "", key=key)
+    if f.widget == "int":
+        return st.number_input(
+            f.label,
+            min_value=None if f.min_value is None else int(f.min_value),
+            max_value=None if f.max_value is None else int(f.max_value),
+            value=int(value or 0),
+            step=int(f.step or 1),
+            key=key,
+        )
+    if f.widget == "float":
+        return st.number_input(
+            f.label,
+            min_value=f.min_value,
+            max_value=f.max_value,
+            value=float(value or 0.0),
+            step=float(f.step or 0.1),
+            key=key,
+        )
+    if f.widget == "date":
+        return st.date_input(f.label, value=_as_date(value), key=key)
+    if f.widget == "select":
+        options = list(f.options)
+        index = options.index(value) if value in options else 0
+        return st.selectbox(f.label, options, index=index, key=key)
+    if f.widget == "multiselect":
+        options = list(f.options)
+        selected = [v for v in (value or []) if v in options]
+        return st.multiselect(f.label, options, default=selected, key=key)
+    raise ValueError(f"Type de champ inconnu : {f.widget}")
+
+
+# ✅ Champs obligatoires manquants pour une étape
+def validate_step(step: Step, values: Dict[str, Any]) -> List[str]:
+    return [
+        f"« {f.label} » est obligatoire."
+        for f in step.fields
+        if f.required and values.get(f.name) in (None, "", [])
+    ]
+
+
+# 💾 Stockage des valeurs : brouillon persistant si un propriétaire est fourni,
+# sinon la session. Chaque étape est stockée séparément.
+class _Store:
+    def __init__(self, schema: FormSchema, owner: Optional[str]):
+        self.schema = schema
+        self.owner = owner
+        self.state_key = f"form_{schema.form_id}"
+
+    def _session(self) -> Dict[str, Any]:
+        return st.session_state.setdefault(self.state_key, {"step": 0, "values": {}})
+
+    def get_index(self) -> int:
+        if self.owner:
+            if f"{self.state_key}_step" not in st.session_state:
+                step = drafts.get_current_step(self.schema.form_id, self.owner)
+                st.session_state[f"{self.state_key}_step"] = (step or 1) - 1
+            return st.session_state[f"{self.state_key}_step"]
+        return self._session()["step"]
+
+    def set_index(self, index: int) -> None:
+        if self.owner:
+            st.session_state[f"{self.state_key}_step"] = index
+            drafts.save_current_step(self.schema.form_id, self.owner, index + 1)
+        else:
+            self._session()["step"] = index
+
+    def get_values(self, index: int) -> Dict[str, Any]:
+        if self.owner:
+            return drafts.get_step_values(self.schema.form_id, self.owner, index + 1)
+        return dict(self._session()["values"].get(index, {}))
+
+    def set_values(self, index: int, values: Dict[str, Any], force: bool) -> None:
+        if self.owner:
+            drafts.autosave(self.schema.form_id, self.owner, index + 1, values, force)
+        else:
+            self._session()["values"][index] = values
+
+    def all_values(self) -> Dict[str, Any]:
+        if self.owner:
+            by_step = drafts.load_draft(self.schema.form_id, self.owner)
+            by_step = {step - 1: values for step, values in by_step.items() if step}
+        else:
+            by_step = self._session()["values"]
+        merged: Dict[str, Any] = {}
+        for index in sorted(by_step):
+            merged.update(by_step[index])
+        for name, f in self.schema.field_index.items():
+            merged[name] = _initial(f, merged.get(name))
+            if f.widget == "date":
+                merged[name] = _as_date(merged[name])
+        return merged
+
+    def clear(self) -> None:
+        if self.owner:
+            drafts.delete_draft(self.schema.form_id, self.owner)
+            st.session_state.pop(f"{self.state_key}_step", None)
+        else:
+            st.session_state.pop(self.state_key, None)
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value) or "—"
+    return str(value) if value not in (None, "") else "—"
+
+
+# 📝 Écriture finale : toutes les tables dans une seule transaction.
+# Un enregistrement refusé annule tout et part en quarantaine.
+def commit_form(schema: FormSchema, values: Dict[str, Any]) -> None:
+    conn = schema.connect()
+    try:
+        schema.on_submit(conn, values)
+        conn.commit()
+    except ValidationError as e:
+        conn.rollback()
+        quarantine(conn, e)
+        conn.commit()
+        raise
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# 🚀 Affiche uniquement l'étape active ; renvoie True après l'enregistrement.
+# Sans propriétaire, l'étape est un st.form : aucun rerun pendant la saisie.
+# Avec un propriétaire, les widgets sont « vivants » et l'étape est
+# sauvegardée en brouillon (écritures différées) à chaque rerun.
+def run_form(schema: FormSchema, owner: Optional[str] = None) -> bool:
+    store = _Store(schema, owner)
+    count = len(schema.steps) + 1
+    index = min(store.get_index(), count - 1)
+    st.caption(f"Étape {index + 1}/{count}")
+
+    # 📋 Dernière étape : récapitulatif puis enregistrement
+    if index == len(schema.steps):
+        st.subheader(schema.review_title)
+        values = store.all_values()
+        for step in schema.steps:
+            st.markdown(f"**{step.title}**")
+            for f in step.fields:
+                st.markdown(f"- {f.label} : {_format(values.get(f.name))}")
+        move = nav_buttons(
+            index,
+            count,
+            key=f"{schema.form_id}_nav",
+            next_label=schema.submit_label,
+            allow_last=True,
+        )
+        if move < 0:
+            store.set_index(index - 1)
+            st.rerun()
+        if move > 0:
+            errors = [e for step in schema.steps for e in validate_step(step, values)]
+            if errors:
+                for error in errors:
+                    st.error(error)
+                return False
+            try:
+                commit_form(schema, values)
+            except ValidationError as e:
+                for column, message in e.errors.items():
+                    label = schema.field_index.get(column)
+                    st.error(f"{label.label if label else column} : {message}")
+                return False
+            store.clear()
+            return True
+        return False
+
+    step = schema.steps[index]
+    stored = store.get_values(index)
+    live = owner is not None
+    container = st.container() if live else st.form(f"{schema.form_id}_step{index}")
+    with container:
+        st.subheader(step.title)
+        values: Dict[str, Any] = {}
+        fields = list(step.fields)
+        for start in range(0, len(fields), step.columns):
+            row = fields[start : start + step.columns]
+            cols = st.columns(len(row)) if step.columns > 1 else [st.container()]
+            for col, f in zip(cols, row):
+                with col:
+                    values[f.name] = render_field(
+                        f, stored.get(f.name), key=f"{schema.form_id}:{f.name}"
+                    )
+        move = nav_buttons(index, count, key=f"{schema.form_id}_nav", in_form=not live)
+
+    if move:
+        errors = validate_step(step, values) if move > 0 else []
+        store.set_values(index, values, force=True)
+        if errors:
+            for error in errors:
+                st.error(error)
+            return False
+        store.set_index(index + move)
+        st.rerun()
+    elif live:
+        store.set_values(index, values, force=False)
+    return False
@@ -0,0 +1,599 @@
+import importlib
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+DB_PATH = "data.db"
+EXPORT_DIR = "exports"
+
+# ⏱️ Réglages du planificateur
+POLL_SECONDS = 2.0
+BACKOFF_SECONDS = 30
+STALE_AFTER_SECONDS = 3600
+WORKER_COUNT = 2
+
+# 🧩 Modules qui enregistrent des tâches supplémentaires au démarrage
+HANDLER_MODULES = [
+    "utils.calendar_sync",
+    "utils.outbox",
+    "utils.reminders",
+    "utils.changefeed",
+    "utils.backup",
+    "utils.perf",
+    "utils.snapshots",
+    "utils.sketches",
+]
+
+# 📅 Planifications par défaut : nom → (type de tâche, cron, paramètres)
+DEFAULT_SCHEDULES = {
+    "analyze-nightly": ("analyze", "30 2 * * *", {}),
+    "vacuum-weekly": ("vacuum", "0 3 * * 0", {}),
+    "refresh-indexes": ("refresh_indexes", "*/15 * * * *", {}),
+    "dispatch-outbox": ("dispatch_outbox", "* * * * *", {}),
+    "appointment-reminders": ("appointment_reminders", "*/10 * * * *", {}),
+    "prune-change-log": ("prune_change_log", "45 2 * * *", {}),
+    "backup-nightly": ("backup", "15 1 * * *", {}),
+    "aggregate-perf": ("aggregate_perf", "*/15 * * * *", {}),
+    "refresh-snapshots": ("refresh_snapshots", "*/5 * * * *", {}),
+    "rebuild-sketches": ("rebuild_sketches", "50 2 * * *", {}),
+}
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+
+# 🔌 Connexion à la base (attente plutôt qu'échec si un autre écrivain travaille)
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🏷️ Enregistrement d'une tâche : @job_handler("vacuum")
+def job_handler(kind: str):
+    def register(func: Callable[[Dict[str, Any]], Any]):
+        HANDLERS[kind] = func
+        return func
+
+    return register
+
+
+# 🏗️ File de tâches persistante et planifications
+def create_job_tables() -> None:
+    conn = get_db_connection()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'pending',
+            priority INTEGER NOT NULL DEFAULT 0,
+            run_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            schedule_name TEXT,
+            worker TEXT,
+            last_error TEXT,
+            result TEXT,
+            created_by TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status_run_at ON jobs(status, run_at)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_schedules (
+            name TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            cron TEXT NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',
+            enabled INTEGER NOT NULL DEFAULT 1,
+            next_run REAL NOT NULL
+        )
+    """
+    )
+    conn.commit()
+    conn.close()
+
+
+_tables_ready = False
+
+
+# ✅ Création unique par processus
+def ensure_job_tables() -> None:
+    global _tables_ready
+    if not _tables_ready:
+        create_job_tables()
+        _tables_ready = True
+
+
+# ➕ Mise en file d'une tâche ; renvoie son id
+def enqueue(
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[float] = None,
+    priority: int = 0,
+    max_attempts: int = 3,
+    created_by: Optional[str] = None,
+    schedule_name: Optional[str] = None,
+) -> int:
+    ensure_job_tables()
+    now = time.time()
+    conn = get_db_connection()
+    cursor = conn.execute(
+        """
+        INSERT INTO jobs (kind, payload, priority, run_at, max_attempts,
+                          schedule_name, created_by, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            kind,
+            json.dumps(payload or {}, default=str),
+            priority,
+            run_at or now,
+            max_attempts,
+            schedule_name,
+            created_by,
+            now,
+        ),
+    )
+    conn.commit()
+    job_id = cursor.lastrowid
+    conn.close()
+    return job_id
+
+
+# 🔁 Mise en file sauf si une tâche identique attend ou tourne déjà
+def enqueue_unique(
+    kind: str, payload: Optional[Dict[str, Any]] = None, **kwargs: Any
+) -> int:
+    ensure_job_tables()
+    conn = get_db_connection()
+    row = conn.execute(
+        """
+        SELECT id FROM jobs
+        WHERE kind = ? AND payload = ? AND status IN ('pending', 'running')
+        ORDER BY id LIMIT 1
+        """,
+        (kind, json.dumps(payload or {}, default=str)),
+    ).fetchone()
+    conn.close()
+    if row:
+        return row["id"]
+    return enqueue(kind, payload, **kwargs)
+
+
+def get_job(job_id: int) -> Optional[sqlite3.Row]:
+    ensure_job_tables()
+    conn = get_db_connection()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def get_recent_jobs(
+    limit: int = 100, status: Optional[str] = None
+) -> List[sqlite3.Row]:
+    ensure_job_tables()
+    conn = get_db_connection()
+    if status:
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?",
+            (status, limit),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    conn.close()
+    return rows
+
+
+def get_latest_job(kind: str) -> Optional[sqlite3.Row]:
+    ensure_job_tables()
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT * FROM jobs WHERE kind = ? ORDER BY id DESC LIMIT 1", (kind,)
+    ).fetchone()
+    conn.close()
+    return row
+
+
+def retry_job(job_id: int) -> None:
+    conn = get_db_connection()
+    conn.execute(
+        """
+        UPDATE jobs SET status = 'pending', attempts = 0, run_at = ?, last_error = NULL
+        WHERE id = ? AND status = 'failed'
+        """,
+        (time.time(), job_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+# 🕒 Expressions cron à 5 champs : minute heure jour mois jour-de-semaine
+# (*, listes "1,15", intervalles "1-5", pas "*/15" ; dimanche = 0).
+CRON_BOUNDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-"))
+        else:
+            start = end = int(part)
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expression: str) -> List[Set[int]]:
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError(f"Expression cron invalide : {expression}")
+    return [
+        _parse_cron_field(field, low, high)
+        for field, (low, high) in zip(fields, CRON_BOUNDS)
+    ]
+
+
+# ⏭️ Prochaine échéance strictement après `after` (avance par mois/jour/heure)
+def next_cron_time(expression: str, after: datetime) -> datetime:
+    minutes, hours, days, months, weekdays = parse_cron(expression)
+    day_field, weekday_field = expression.split()[2], expression.split()[4]
+    day_restricted = not day_field.startswith("*")
+    weekday_restricted = not weekday_field.startswith("*")
+    moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limit = after + timedelta(days=366 * 5)
+    while moment <= limit:
+        if moment.month not in months:
+            year = moment.year + (moment.month == 12)
+            moment = moment.replace(
+                year=year, month=moment.month % 12 + 1, day=1, hour=0, minute=0
+            )
+            continue
+        # Comme cron : jour du mois et jour de semaine tous deux restreints →
+        # l'un OU l'autre suffit ; sinon seul le champ restreint compte
+        day_ok = moment.day in days
+        weekday_ok = moment.isoweekday() % 7 in weekdays
+        if day_restricted and weekday_restricted:
+            day_match = day_ok or weekday_ok
+        else:
+            day_match = day_ok and weekday_ok
+        if not day_match:
+            moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            continue
+        if moment.hour not in hours:
+            moment = (moment + timedelta(hours=1)).replace(minute=0)
+            continue
+        if moment.minute not in minutes:
+            moment += timedelta(minutes=1)
+            continue
+        return moment
+    raise ValueError(f"Aucune échéance pour : {expression}")
+
+
+# 📅 Création ou mise à jour d'une planification
+def set_schedule(
+    name: str,
+    kind: str,
+    cron: str,
+    payload: Optional[Dict[str, Any]] = None,
+    enabled: bool = True,
+) -> None:
+    ensure_job_tables()
+    next_run = next_cron_time(cron, datetime.now()).timestamp()
+    conn = get_db_connection()
+    conn.execute(
+        """
+        INSERT INTO job_schedules (name, kind, cron, payload, enabled, next_run)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET
+            kind = excluded.kind, cron = excluded.cron, payload = excluded.payload,
+            enabled = excluded.enabled, next_run = excluded.next_run
+        """,
+        (name, kind, cron, json.dumps(payload or {}), int(enabled), next_run),
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_schedules() -> List[sqlite3.Row]:
+    ensure_job_tables()
+    conn = get_db_connection()
+    rows = conn.execute("SELECT * FROM job_schedules ORDER BY name").fetchall()
+    conn.close()
+    return rows
+
+
+def install_default_schedules() -> None:
+    existing = {row["name"] for row in get_schedules()}
+    for name, (kind, cron, payload) in DEFAULT_SCHEDULES.items():
+        if name not in existing:
+            set_schedule(name, kind, cron, payload)
+
+
+# 🕰️ Planifications échues → tâches en file (une seule fois par échéance)
+def materialize_due_schedules(now: Optional[float] = None) -> int:
+    now = now or time.time()
+    conn = get_db_connection()
+    created = 0
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        due = conn.execute(
+            "SELECT * FROM job_schedules WHERE enabled = 1 AND next_run <= ?", (now,)
+        ).fetchall()
+        for schedule in due:
+            conn.execute(
+                """
+                INSERT INTO jobs (kind, payload, run_at, schedule_name, created_by,
+                                  created_at)
+                VALUES (?, ?, ?, ?, 'scheduler', ?)
+                """,
+                (schedule["kind"], schedule["payload"], now, schedule["name"], now),
+            )
+            next_run = next_cron_time(
+                schedule["cron"], datetime.fromtimestamp(now)
+            ).timestamp()
+            conn.execute(
+                "UPDATE job_schedules SET next_run = ? WHERE name = ?",
+                (next_run, schedule["name"]),
+            )
+            created += 1
+        conn.commit()
+    finally:
+        conn.close()
+    return created
+
+
+# 🔒 Réservation atomique de la prochaine tâche (sûre entre threads et processus)
+def claim_next_job(worker: str) -> Optional[sqlite3.Row]:
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        job = conn.execute(
+            """
+            SELECT * FROM jobs
+            WHERE status = 'pending' AND run_at <= ?
+            ORDER BY priority DESC, run_at, id
+            LIMIT 1
+            """,
+            (now,),
+        ).fetchone()
+        if job is not None:
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'running', worker = ?, started_at = ?,
+                                attempts = attempts + 1
+                WHERE id = ?
+                """,
+                (worker, now, job["id"]),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return job
+
+
+def _finish(job_id: int, status: str, **fields: Any) -> None:
+    if status in ("done", "failed"):
+        fields["finished_at"] = time.time()
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    conn = get_db_connection()
+    conn.execute(
+        f"UPDATE jobs SET status = ?, {assignments} WHERE id = ?",
+        (status, *fields.values(), job_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+# ▶️ Exécution d'une tâche réservée ; nouvel essai avec délai exponentiel
+def run_job(job: sqlite3.Row) -> None:
+    handler = HANDLERS.get(job["kind"])
+    attempts = job["attempts"] + 1
+    try:
+        if handler is None:
+            raise LookupError(f"Aucun gestionnaire pour la tâche « {job['kind']} »")
+        result = handler(json.loads(job["payload"] or "{}"))
+    except Exception:
+        error = traceback.format_exc(limit=5)
+        if attempts < job["max_attempts"]:
+            delay = BACKOFF_SECONDS * 2 ** (attempts - 1)
+            _finish(job["id"], "pending", last_error=error, run_at=time.time() + delay)
+        else:
+            _finish(job["id"], "failed", last_error=error)
+        return
+    _finish(job["id"], "done", result=json.dumps(result, default=str))
+
+
+# 🧟 Tâches restées « running » après l'arrêt brutal d'un worker
+def requeue_stale_jobs(max_age: float = STALE_AFTER_SECONDS) -> int:
+    conn = get_db_connection()
+    cursor = conn.execute(
+        """
+        UPDATE jobs SET status = 'pending', worker = NULL, run_at = ?
+        WHERE status = 'running' AND started_at < ?
+        """,
+        (time.time(), time.time() - max_age),
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount
+
+
+def load_handler_modules() -> None:
+    for module in HANDLER_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"⚠️ Tâches de {module} indisponibles : {e}")
+
+
+# 🧵 Planificateur : un thread d'horloge et des workers qui vident la file
+class Scheduler:
+    def __init__(self, workers: int = WORKER_COUNT, poll: float = POLL_SECONDS):
+        self.workers = workers
+        self.poll = poll
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _tick(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                materialize_due_schedules()
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ Planification différée : {e}")
+            self.stop_event.wait(self.poll)
+
+    def _work(self, index: int) -> None:
+        worker = f"{self.name}#{index}"
+        while not self.stop_event.is_set():
+            try:
+                job = claim_next_job(worker)
+            except sqlite3.OperationalError:
+                job = None
+            if job is None:
+                self.stop_event.wait(self.poll)
+                continue
+            run_job(job)
+
+    def start(self) -> None:
+        ensure_job_tables()
+        load_handler_modules()
+        install_default_schedules()
+        requeue_stale_jobs()
+        targets = [(self._tick, ())] + [(self._work, (i,)) for i in range(self.workers)]
+        for target, args in targets:
+            thread = threading.Thread(target=target, args=args, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=self.poll * 2)
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+# 🚀 Démarrage unique par processus Streamlit (appelé par app.py et les pages)
+def start_scheduler(workers: int = WORKER_COUNT) -> Scheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(workers)
+            _scheduler.start()
+    return _scheduler
+
+
+# =====================================================================
+# ---- TÂCHES DE MAINTENANCE ----
+# =====================================================================
+@job_handler("analyze")
+def analyze_database(payload: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    conn = sqlite3.connect(payload.get("db_path", DB_PATH), timeout=30)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return {"seconds": round(time.perf_counter() - start, 3)}
+
+
+@job_handler("vacuum")
+def vacuum_database(payload: Dict[str, Any]) -> Dict[str, Any]:
+    path = payload.get("db_path", DB_PATH)
+    before = os.path.getsize(path)
+    start = time.perf_counter()
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("VACUUM")
+    conn.close()
+    return {
+        "seconds": round(time.perf_counter() - start, 3),
+        "bytes_before": before,
+        "bytes_after": os.path.getsize(path),
+    }
+
+
+# 🔄 Index dérivés (recherche plein texte, doublons de patientes)
+@job_handler("refresh_indexes")
+def refresh_indexes(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from utils.changefeed import ensure_changefeed
+    from utils.patient_matching import sync_match_index
+    from utils.search import ensure_search_index
+
+    ensure_search_index()
+    ensure_changefeed()
+    return {"new_patients_indexed": sync_match_index()}
+
+
+@job_handler("rebuild_search_index")
+def rebuild_search(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from utils.search import rebuild_search_index
+
+    return {"entries": rebuild_search_index()}
+
+
+# 📤 Export d'une table en CSV ou XLSX dans exports/
+@job_handler("export_table")
+def export_table(payload: Dict[str, Any]) -> Dict[str, Any]:
+    import pandas as pd
+
+    table = payload["table"]
+    fmt = payload.get("format", "csv")
+    conn = sqlite3.connect(payload.get("db_path", DB_PATH), timeout=30)
+    known = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    if table not in known:
+        conn.close()
+        raise ValueError(f"Table inconnue : {table}")
+    df = pd.read_sql_query(f'SELECT * FROM "{table}"', conn)
+    conn.close()
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(EXPORT_DIR, f"{table}_{stamp}.{fmt}")
+    if fmt == "xlsx":
+        df.to_excel(path, index=False, sheet_name=table[:31])
+    else:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+    return {"path": path, "rows": len(df)}
+
+
+# 🧩 Analyse des conflits de pages (anciennement subprocess bloquant dans Main.py)
+@job_handler("manage_pages")
+def manage_pages(payload: Dict[str, Any]) -> Dict[str, Any]:
+    command = [sys.executable, "manage_pages.py"]
+    mode = payload.get("mode")
+    if mode in ("--dry-run", "--auto-fix"):
+        command.append(mode)
+    result = subprocess.run(command, capture_output=True, text=True, timeout=600)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr or f"Code de sortie {result.returncode}")
+    return {"stdout": result.stdout, "stderr": result.stderr}
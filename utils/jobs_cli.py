@@ -0,0 +1,29 @@
+import json
+import sys
+import time
+
+from utils.jobs import WORKER_COUNT, Scheduler, enqueue
+
+# 👇 Exécution directe : worker autonome (processus séparé de Streamlit)
+#    python -m utils.jobs_cli worker [nombre_de_threads]
+#    python -m utils.jobs_cli enqueue <type> ['{"json": "payload"}']
+# Module distinct de utils/jobs.py : lancé avec « -m utils.jobs », le fichier
+# deviendrait __main__ et les modules de tâches (HANDLER_MODULES)
+# s'enregistreraient dans une autre copie de HANDLERS que celle du worker.
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "worker"
+    if command == "enqueue":
+        kind = sys.argv[2]
+        payload = json.loads(sys.argv[3]) if len(sys.argv) > 3 else {}
+        print(f"➕ Tâche {enqueue(kind, payload, created_by='cli')} en file.")
+    else:
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else WORKER_COUNT
+        scheduler = Scheduler(count)
+        scheduler.start()
+        print(f"🧵 Worker {scheduler.name} démarré ({count} thread(s)).")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            scheduler.stop()
+            print("👋 Worker arrêté.")
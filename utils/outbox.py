@@ -0,0 +1,382 @@
+import json
+import os
+import smtplib
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional
+
+from utils.jobs import job_handler
+
+DB_PATH = "data.db"
+
+# ✉️ Configuration des fournisseurs (variables d'environnement). Pour les
+# tests : SMTP_HOST=localhost SMTP_PORT=1025 SMTP_SSL=0 SMS_PROVIDER=http
+# SMS_ENDPOINT=http://localhost:8025/sms avec `python -m utils.dev_sinks`.
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "465"))
+SMTP_SSL = os.environ.get("SMTP_SSL", "1") == "1"
+SMTP_USER = os.environ.get("SMTP_USER", "")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD", "")
+SMTP_FROM = os.environ.get("SMTP_FROM", SMTP_USER or "noreply@localhost")
+
+SMS_PROVIDER = os.environ.get("SMS_PROVIDER", "twilio")
+SMS_ENDPOINT = os.environ.get("SMS_ENDPOINT", "http://localhost:8025/sms")
+TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID", "")
+TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN", "")
+TWILIO_FROM = os.environ.get("TWILIO_FROM", "")
+
+# 🚦 Débit maximal par canal (messages / seconde) et taille des lots
+RATE_LIMITS = {"email": 5.0, "sms": 1.0}
+BATCH_SIZE = 50
+
+# 🔁 Nouvel essai : 1 min, 2 min, 4 min... puis abandon
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 60
+
+# ⏳ Bail d'un lot réservé : passé ce délai (dispatcher arrêté), il est repris
+LEASE_SECONDS = 600
+
+CHANNELS = ["email", "sms"]
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🏗️ Boîte d'envoi : un message par ligne, dédoublonné par dedupe_key
+def create_outbox_table() -> None:
+    conn = get_db_connection()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            subject TEXT,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            dedupe_key TEXT UNIQUE,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        )
+    """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_outbox_pending
+        ON outbox(channel, status, next_attempt_at)
+    """
+    )
+    conn.commit()
+    conn.close()
+
+
+_table_ready = False
+
+
+# ✅ Création unique par processus
+def ensure_outbox_table() -> None:
+    global _table_ready
+    if not _table_ready:
+        create_outbox_table()
+        _table_ready = True
+
+
+# ➕ Mise en file ; renvoie None si la clé de dédoublonnage existe déjà
+def queue_message(
+    channel: str,
+    recipient: str,
+    body: str,
+    subject: Optional[str] = None,
+    dedupe_key: Optional[str] = None,
+) -> Optional[int]:
+    if channel not in CHANNELS:
+        raise ValueError(f"Canal inconnu : {channel}")
+    ensure_outbox_table()
+    now = time.time()
+    conn = get_db_connection()
+    cursor = conn.execute(
+        """
+        INSERT OR IGNORE INTO outbox
+            (channel, recipient, subject, body, next_attempt_at, dedupe_key,
+             created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (channel, recipient, subject, body, now, dedupe_key, now),
+    )
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid if cursor.rowcount else None
+
+
+def queue_email(
+    recipient: str, subject: str, body: str, dedupe_key: Optional[str] = None
+) -> Optional[int]:
+    return queue_message("email", recipient, body, subject, dedupe_key)
+
+
+def queue_sms(
+    recipient: str, body: str, dedupe_key: Optional[str] = None
+) -> Optional[int]:
+    return queue_message("sms", recipient, body, None, dedupe_key)
+
+
+# 🚦 Seau à jetons : au plus `rate` envois par seconde, par fournisseur
+class RateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_limiters = {channel: RateLimiter(rate) for channel, rate in RATE_LIMITS.items()}
+
+
+# 🚫 Fournisseur injoignable : tout le lot repart en file avec délai
+class TransportUnavailable(Exception):
+    pass
+
+
+# 📧 Transport e-mail : une seule connexion SMTP pour tout un lot, ouverte
+# par open() avant le premier envoi
+class SmtpTransport:
+    def __init__(self):
+        self.server: Optional[smtplib.SMTP] = None
+
+    def open(self) -> None:
+        try:
+            if SMTP_SSL:
+                server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=30)
+            else:
+                server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+            if SMTP_USER:
+                server.login(SMTP_USER, SMTP_PASSWORD)
+        except OSError as e:
+            raise TransportUnavailable(f"SMTP {SMTP_HOST}:{SMTP_PORT} : {e!r}") from e
+        self.server = server
+
+    def send(self, message: sqlite3.Row) -> None:
+        msg = EmailMessage()
+        msg["Subject"] = message["subject"] or ""
+        msg["From"] = SMTP_FROM
+        msg["To"] = message["recipient"]
+        msg.set_content(message["body"])
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Connexion fermée par le serveur entre deux envois : une reconnexion
+            self.open()
+            self.server.send_message(msg)
+
+    def close(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                pass
+            self.server = None
+
+
+# 📱 Transports SMS : Twilio (client réutilisé) ou point d'accès HTTP JSON
+class TwilioTransport:
+    def __init__(self):
+        from twilio.rest import Client
+
+        self.client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
+    def open(self) -> None:
+        pass
+
+    def send(self, message: sqlite3.Row) -> None:
+        self.client.messages.create(
+            body=message["body"], from_=TWILIO_FROM, to=message["recipient"]
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class HttpSmsTransport:
+    def open(self) -> None:
+        pass
+
+    def send(self, message: sqlite3.Row) -> None:
+        data = json.dumps({"to": message["recipient"], "body": message["body"]})
+        request = urllib.request.Request(
+            SMS_ENDPOINT,
+            data=data.encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"Passerelle SMS : HTTP {response.status}")
+
+    def close(self) -> None:
+        pass
+
+
+def make_transport(channel: str):
+    if channel == "email":
+        return SmtpTransport()
+    if SMS_PROVIDER == "http":
+        return HttpSmsTransport()
+    return TwilioTransport()
+
+
+# 🔒 Réservation d'un lot de messages échus pour un canal
+def claim_batch(channel: str, limit: int = BATCH_SIZE) -> List[sqlite3.Row]:
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            """
+            SELECT * FROM outbox
+            WHERE channel = ? AND status IN ('pending', 'sending')
+              AND next_attempt_at <= ?
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+            """,
+            (channel, now, limit),
+        ).fetchall()
+        conn.executemany(
+            """
+            UPDATE outbox SET status = 'sending', attempts = attempts + 1,
+                              next_attempt_at = ?
+            WHERE id = ?
+            """,
+            [(now + LEASE_SECONDS, row["id"]) for row in rows],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return rows
+
+
+# 📝 Résultats du lot écrits en une transaction
+def _record_results(sent: List[int], errors: Dict[int, tuple]) -> None:
+    now = time.time()
+    conn = get_db_connection()
+    conn.executemany(
+        "UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL "
+        "WHERE id = ?",
+        [(now, message_id) for message_id in sent],
+    )
+    for message_id, (attempts, error) in errors.items():
+        if attempts >= MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                (error, message_id),
+            )
+        else:
+            conn.execute(
+                """
+                UPDATE outbox SET status = 'pending', last_error = ?,
+                                  next_attempt_at = ?
+                WHERE id = ?
+                """,
+                (error, now + BACKOFF_SECONDS * 2 ** (attempts - 1), message_id),
+            )
+    conn.commit()
+    conn.close()
+
+
+# 🚚 Envoi d'un lot pour un canal ; renvoie (envoyés, en erreur)
+def dispatch_channel(channel: str, limit: int = BATCH_SIZE) -> tuple:
+    batch = claim_batch(channel, limit)
+    if not batch:
+        return 0, 0
+    sent: List[int] = []
+    errors: Dict[int, tuple] = {}
+    transport = None
+    try:
+        transport = make_transport(channel)
+        # Connexion ouverte une fois, avant le lot : un hôte injoignable coûte
+        # un seul délai d'attente et non un par message
+        transport.open()
+        for message in batch:
+            _limiters[channel].wait()
+            try:
+                transport.send(message)
+                sent.append(message["id"])
+            except TransportUnavailable:
+                raise
+            except Exception as e:
+                errors[message["id"]] = (message["attempts"] + 1, repr(e))
+    except Exception as e:
+        # Fournisseur injoignable : tout le lot restant repart en file, avec
+        # le délai croissant de _record_results
+        for message in batch:
+            if message["id"] not in sent and message["id"] not in errors:
+                errors[message["id"]] = (message["attempts"] + 1, repr(e))
+    finally:
+        if transport is not None:
+            transport.close()
+        _record_results(sent, errors)
+    return len(sent), len(errors)
+
+
+# ⚡ Envoi immédiat, sans passer par la table : pour les messages portant un
+# secret (mot de passe temporaire), qui ne doivent pas rester dans data.db
+# ni dans ses sauvegardes et copies. Pas de nouvel essai : l'erreur remonte.
+def send_now(
+    channel: str, recipient: str, body: str, subject: Optional[str] = None
+) -> None:
+    transport = make_transport(channel)
+    try:
+        transport.open()
+        _limiters[channel].wait()
+        transport.send({"recipient": recipient, "subject": subject, "body": body})
+    finally:
+        transport.close()
+
+
+# 🔄 Tâche de fond : vide la boîte d'envoi, canal par canal, lot par lot
+@job_handler("dispatch_outbox")
+def dispatch_outbox(payload: Dict[str, Any]) -> Dict[str, Any]:
+    ensure_outbox_table()
+    channels = payload.get("channels") or CHANNELS
+    limit = payload.get("batch_size", BATCH_SIZE)
+    totals = {}
+    for channel in channels:
+        sent = failed = 0
+        while True:
+            batch_sent, batch_failed = dispatch_channel(channel, limit)
+            sent, failed = sent + batch_sent, failed + batch_failed
+            if batch_sent + batch_failed < limit:
+                break
+        totals[channel] = {"sent": sent, "errors": failed}
+    return totals
+
+
+def get_outbox_counts() -> Dict[str, int]:
+    ensure_outbox_table()
+    conn = get_db_connection()
+    rows = conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+    conn.close()
+    return {status: count for status, count in rows}
+
+
+# 👇 Exécution directe : envoi immédiat de tout ce qui attend
+if __name__ == "__main__":
+    channels = sys.argv[1:] or CHANNELS
+    print(f"📤 {dispatch_outbox({'channels': channels})}")
@@ -0,0 +1,375 @@
+import re
+import sqlite3
+import unicodedata
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.changefeed import consume, latest_seq, set_cursor
+
+DB_PATH = "data.db"
+
+# 🎯 Score minimal pour signaler un doublon potentiel
+MATCH_THRESHOLD = 0.55
+
+# 🔤 Réécritures orthographiques : graphies françaises et variantes de
+# transcription du cri (voyelles longues doublées, w/u, sh/ch...).
+SPELLING_RULES = [
+    ("tch", "s"),
+    ("sch", "s"),
+    ("ch", "s"),
+    ("sh", "s"),
+    ("ph", "f"),
+    ("qu", "k"),
+    ("gu", "g"),
+    ("ck", "k"),
+    ("eau", "o"),
+    ("au", "o"),
+    ("ou", "u"),
+    ("oo", "u"),
+    ("ee", "i"),
+    ("ii", "i"),
+    ("aa", "a"),
+    ("w", "u"),
+    ("y", "i"),
+]
+
+# 🔡 Regroupement des consonnes proches
+CONSONANT_GROUPS = {
+    "b": "p",
+    "p": "p",
+    "d": "t",
+    "t": "t",
+    "c": "k",
+    "g": "k",
+    "k": "k",
+    "q": "k",
+    "s": "s",
+    "z": "s",
+    "x": "s",
+    "f": "f",
+    "v": "f",
+    "j": "j",
+    "l": "l",
+    "m": "m",
+    "n": "n",
+    "r": "r",
+}
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🧽 Minuscules, sans accents ni ponctuation ("Oujé-Bougoumou" → "ouje bougoumou")
+def normalize(text: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^a-z]+", " ", text).split())
+
+
+# 🔊 Clé phonétique d'un mot, tolérante aux variantes d'orthographe
+def phonetic_key(word: str) -> str:
+    word = normalize(word).replace(" ", "")
+    if not word:
+        return ""
+    # Finales muettes en français (Gagnon/Gagnont, Lessard/Lessards)
+    word = word.rstrip("e") or word
+    if len(word) > 4 and word[-1] in "stxd":
+        word = word[:-1]
+    for source, target in SPELLING_RULES:
+        word = word.replace(source, target)
+
+    previous = CONSONANT_GROUPS.get(word[0], "")
+    key = previous or word[0]
+    for char in word[1:]:
+        code = CONSONANT_GROUPS.get(char, "")
+        if code and code != previous:
+            key += code
+        previous = code
+    return key[:6]
+
+
+# 🧩 Trigrammes d'un nom complet, indépendants de l'ordre prénom/nom
+def trigrams(full_name: str) -> Set[str]:
+    tokens = sorted(normalize(full_name).split())
+    grams = set()
+    for token in tokens:
+        padded = f"  {token} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def name_similarity(a: str, b: str) -> float:
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+# 🗝️ Clés de blocage : seuls les dossiers partageant une clé sont comparés
+def block_keys(
+    nom: Optional[str], dob: Optional[str], community: Optional[str]
+) -> List[str]:
+    surname = phonetic_key(nom or "")
+    dob = str(dob or "")[:10]
+    community = normalize(community)
+    keys = []
+    if surname and dob:
+        keys.append(f"n:{surname}:{dob[:4]}")
+    if dob:
+        keys.append(f"d:{dob}")
+    if surname and community:
+        keys.append(f"c:{community}:{surname}")
+    return keys
+
+
+# 🏗️ Table des clés de blocage et état de l'indexation
+def create_match_tables() -> None:
+    conn = get_db_connection()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS patient_match_keys (
+            block_key TEXT NOT NULL,
+            patient_rowid INTEGER NOT NULL,
+            PRIMARY KEY (block_key, patient_rowid)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS patient_match_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_rowid INTEGER NOT NULL DEFAULT 0
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_patient_match_rowid "
+        "ON patient_match_keys (patient_rowid)"
+    )
+    conn.execute("INSERT OR IGNORE INTO patient_match_state (id) VALUES (1)")
+    conn.commit()
+    conn.close()
+
+
+# 🧾 Colonnes utiles selon le schéma demographics en place
+def _patient_select(conn: sqlite3.Connection) -> str:
+    existing = [row[1] for row in conn.execute("PRAGMA table_info(demographics)")]
+
+    def pick(*candidates: str) -> str:
+        for column in candidates:
+            if column in existing:
+                return column
+        return "NULL"
+
+    return f"""
+        SELECT rowid AS patient_rowid,
+               chart_number,
+               {pick('nom')} AS nom,
+               {pick('prenom')} AS prenom,
+               {pick('date_naissance', 'dob')} AS dob,
+               {pick('community_of_residence')} AS community
+        FROM demographics"""
+
+
+def _index_rows(conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> None:
+    conn.executemany(
+        "INSERT OR IGNORE INTO patient_match_keys (block_key, patient_rowid) "
+        "VALUES (?, ?)",
+        [
+            (key, row["patient_rowid"])
+            for row in rows
+            for key in block_keys(row["nom"], row["dob"], row["community"])
+        ],
+    )
+
+
+# 🔄 Indexation incrémentale : nouvelles lignes puis fiches modifiées
+def sync_match_index() -> int:
+    create_match_tables()
+    conn = get_db_connection()
+    last_rowid = conn.execute(
+        "SELECT last_rowid FROM patient_match_state WHERE id = 1"
+    ).fetchone()[0]
+    rows = conn.execute(
+        f"{_patient_select(conn)} WHERE rowid > ? ORDER BY rowid", (last_rowid,)
+    ).fetchall()
+    if rows:
+        _index_rows(conn, rows)
+        conn.execute(
+            "UPDATE patient_match_state SET last_rowid = ? WHERE id = 1",
+            (rows[-1]["patient_rowid"],),
+        )
+        conn.commit()
+    conn.close()
+    return len(rows) + consume("patient_matching", _reindex_changed, ["demographics"])
+
+
+# ✏️ Fiches modifiées ou supprimées (journal des changements) : leurs clés
+# sont retirées puis recalculées ; les insertions sont couvertes ci-dessus.
+def _reindex_changed(changes: List[Dict]) -> None:
+    rowids = sorted({c["row_id"] for c in changes if c["op"] in ("U", "D")})
+    if not rowids:
+        return
+    conn = get_db_connection()
+    placeholders = ", ".join("?" for _ in rowids)
+    conn.execute(
+        f"DELETE FROM patient_match_keys WHERE patient_rowid IN ({placeholders})",
+        rowids,
+    )
+    last_rowid = conn.execute(
+        "SELECT last_rowid FROM patient_match_state WHERE id = 1"
+    ).fetchone()[0]
+    rows = conn.execute(
+        f"{_patient_select(conn)} WHERE rowid IN ({placeholders}) AND rowid <= ?",
+        (*rowids, last_rowid),
+    ).fetchall()
+    _index_rows(conn, rows)
+    conn.commit()
+    conn.close()
+
+
+# 🧱 Reconstruction complète (après modifications ou import en masse)
+def rebuild_match_index() -> int:
+    create_match_tables()
+    conn = get_db_connection()
+    conn.execute("DELETE FROM patient_match_keys")
+    conn.execute("UPDATE patient_match_state SET last_rowid = 0 WHERE id = 1")
+    conn.commit()
+    conn.close()
+    set_cursor("patient_matching", latest_seq())
+    return sync_match_index()
+
+
+def _full_name(row) -> str:
+    return f"{row['prenom'] or ''} {row['nom'] or ''}"
+
+
+# 🧮 Score de ressemblance entre deux fiches (0 à 1)
+def match_score(a: Dict, b: Dict) -> float:
+    if a.get("chart_number") and a.get("chart_number") == b.get("chart_number"):
+        return 1.0
+    dob_a, dob_b = str(a.get("dob") or "")[:10], str(b.get("dob") or "")[:10]
+    dob_score = 0.0
+    if dob_a and dob_a == dob_b:
+        dob_score = 1.0
+    elif dob_a[:4] and dob_a[:4] == dob_b[:4]:
+        dob_score = 0.3
+    community_a = normalize(a.get("community"))
+    community_b = normalize(b.get("community"))
+    community_score = float(bool(community_a) and community_a == community_b)
+    return (
+        0.6 * name_similarity(_full_name(a), _full_name(b))
+        + 0.25 * dob_score
+        + 0.15 * community_score
+    )
+
+
+# 🔍 Doublons potentiels pour une saisie en cours
+def find_candidates(
+    nom: Optional[str],
+    prenom: Optional[str],
+    dob: Optional[str] = None,
+    community: Optional[str] = None,
+    chart_number: Optional[str] = None,
+    limit: int = 5,
+) -> List[Tuple[float, Dict]]:
+    sync_match_index()
+    entry = {
+        "chart_number": chart_number,
+        "nom": nom,
+        "prenom": prenom,
+        "dob": dob,
+        "community": community,
+    }
+    keys = block_keys(nom, dob, community)
+
+    conn = get_db_connection()
+    select = _patient_select(conn)
+    clauses, params = [], []
+    if keys:
+        placeholders = ", ".join("?" for _ in keys)
+        clauses.append(
+            "rowid IN (SELECT patient_rowid FROM patient_match_keys "
+            f"WHERE block_key IN ({placeholders}))"
+        )
+        params.extend(keys)
+    if chart_number:
+        clauses.append("chart_number = ?")
+        params.append(chart_number)
+    rows = []
+    if clauses:
+        query = f"{select} WHERE {' OR '.join(clauses)}"
+        rows = conn.execute(query, params).fetchall()
+    conn.close()
+
+    scored = [(match_score(entry, dict(row)), dict(row)) for row in rows]
+    scored = [item for item in scored if item[0] >= MATCH_THRESHOLD]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored[:limit]
+
+
+# 🧹 Traitement par lots : groupes de doublons dans les données existantes
+def find_duplicate_groups(threshold: float = MATCH_THRESHOLD) -> List[List[Dict]]:
+    sync_match_index()
+    conn = get_db_connection()
+    patients = {
+        row["patient_rowid"]: dict(row)
+        for row in conn.execute(_patient_select(conn)).fetchall()
+    }
+    blocks = conn.execute(
+        """
+        SELECT group_concat(patient_rowid) FROM patient_match_keys
+        GROUP BY block_key HAVING COUNT(*) > 1
+        """
+    ).fetchall()
+    charts = conn.execute(
+        """
+        SELECT group_concat(rowid) FROM demographics
+        WHERE chart_number IS NOT NULL AND chart_number != ''
+        GROUP BY chart_number HAVING COUNT(*) > 1
+        """
+    ).fetchall()
+    conn.close()
+
+    # 🔗 Union-find sur les paires au-dessus du seuil
+    parent = {rowid: rowid for rowid in patients}
+
+    def find(rowid: int) -> int:
+        while parent[rowid] != rowid:
+            parent[rowid] = parent[parent[rowid]]
+            rowid = parent[rowid]
+        return rowid
+
+    compared = set()
+    for (members,) in blocks + charts:
+        ids = sorted(int(rowid) for rowid in members.split(","))
+        ids = [rowid for rowid in ids if rowid in patients]
+        for a, b in combinations(ids, 2):
+            if (a, b) in compared:
+                continue
+            compared.add((a, b))
+            if match_score(patients[a], patients[b]) >= threshold:
+                parent[find(a)] = find(b)
+
+    groups: Dict[int, List[Dict]] = {}
+    for rowid, patient in patients.items():
+        groups.setdefault(find(rowid), []).append(patient)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+# 👇 Exécution directe : rapport des doublons
+if __name__ == "__main__":
+    rebuild_match_index()
+    duplicate_groups = find_duplicate_groups()
+    print(f"🔍 {len(duplicate_groups)} groupe(s) de doublons potentiels.")
+    for group in duplicate_groups:
+        print(
+            " ↔ ".join(
+                f"{p['chart_number']} {_full_name(p).strip()} ({p['dob']})"
+                for p in group
+            )
+        )
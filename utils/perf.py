@@ -0,0 +1,349 @@
+import atexit
+import functools
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.jobs import job_handler
+from utils.writer import write_many
+
+DB_PATH = "data.db"
+
+# 📊 Fenêtre des percentiles : échantillons des 7 derniers jours
+WINDOW_SECONDS = 7 * 24 * 3600
+
+# ⏱️ Échantillons gardés en mémoire et versés en base toutes les 5 secondes
+FLUSH_SECONDS = 5.0
+
+# 🏷️ Familles de spans affichées dans l'overlay
+KINDS = {
+    "page": "📄",
+    "db": "🗄️",
+    "pandas": "🐼",
+    "chart": "📈",
+    "export": "📤",
+    "code": "⚙️",
+}
+
+
+# ⏱️ Un span : nom, famille, détail libre, durée et sous-spans
+@dataclass
+class Span:
+    name: str
+    kind: str = "code"
+    detail: str = ""
+    start: float = 0.0
+    duration: float = 0.0
+    children: List["Span"] = field(default_factory=list)
+
+
+# 🧵 Arbre du rerun en cours : un par thread (Streamlit exécute chaque session
+# dans son propre thread). Hors d'une page, les spans ne coûtent qu'un test.
+_local = threading.local()
+
+
+def _stack() -> Optional[List[Span]]:
+    return getattr(_local, "stack", None)
+
+
+# 🚦 Début d'un rerun : nouvelle racine pour la page. Un rerun interrompu
+# (st.stop(), st.rerun()) n'atteint pas end_page : son arbre est abandonné ici.
+def begin_page(page: str) -> None:
+    _local.stack = [Span(page, "page", start=time.perf_counter())]
+
+
+@contextmanager
+def span(name: str, kind: str = "code", detail: str = "") -> Iterator[Span]:
+    stack = _stack()
+    current = Span(name, kind, detail[:120], time.perf_counter())
+    if stack is None:
+        yield current
+        return
+    stack[-1].children.append(current)
+    stack.append(current)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.start
+        stack.pop()
+
+
+# 🏷️ Décorateur : @timed(kind="db") ou @timed("export_pdf", "export")
+def timed(name: Optional[str] = None, kind: str = "code") -> Callable:
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _stack() is None:
+                return func(*args, **kwargs)
+            with span(label, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🏗️ Échantillons bruts et percentiles agrégés par page et par span
+def create_perf_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS perf_samples (
+            page TEXT NOT NULL,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            duration_ms REAL NOT NULL,
+            ts REAL NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_perf_samples_ts ON perf_samples (ts)"
+    )
+    # Un même nom de span peut servir à deux familles sur une page : la clé
+    # inclut kind. Table dérivée, recalculée à chaque agrégation : l'ancienne
+    # version (clé page, name) est simplement recréée.
+    old = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'perf_metrics'"
+    ).fetchone()
+    if old and "PRIMARY KEY (page, name)" in old[0]:
+        conn.execute("DROP TABLE perf_metrics")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS perf_metrics (
+            page TEXT NOT NULL,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            p50_ms REAL NOT NULL,
+            p95_ms REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (page, name, kind)
+        )
+    """
+    )
+
+
+_tables_ready = False
+
+
+# ✅ Création unique par processus
+def ensure_perf_tables() -> None:
+    global _tables_ready
+    if not _tables_ready:
+        conn = get_db_connection()
+        create_perf_tables(conn)
+        conn.commit()
+        conn.close()
+        _tables_ready = True
+
+
+def _flatten(root: Span) -> List[Tuple[str, str, float]]:
+    # Durées cumulées par nom : un span appelé 40 fois compte pour un échantillon
+    totals: Dict[Tuple[str, str], float] = {}
+    pending = list(root.children)
+    while pending:
+        node = pending.pop()
+        key = (node.name, node.kind)
+        totals[key] = totals.get(key, 0.0) + node.duration
+        pending.extend(node.children)
+    samples = [(name, kind, seconds) for (name, kind), seconds in totals.items()]
+    return [("__total__", "page", root.duration)] + samples
+
+
+# 📥 Échantillons en mémoire, versés en base par un thread de fond (via
+# l'écrivain unique de utils/writer.py) : un rerun n'écrit rien lui-même
+class SampleBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: List[Tuple] = []
+        self.thread = threading.Thread(
+            target=self._run, name="perf-samples", daemon=True
+        )
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def add(self, samples: List[Tuple]) -> None:
+        with self.lock:
+            self.samples.extend(samples)
+
+    def flush(self) -> int:
+        with self.lock:
+            samples, self.samples = self.samples, []
+        if not samples:
+            return 0
+        try:
+            ensure_perf_tables()
+            write_many(
+                "INSERT INTO perf_samples (page, name, kind, duration_ms, ts) "
+                "VALUES (?, ?, ?, ?, ?)",
+                samples,
+                DB_PATH,
+            )
+        except (sqlite3.Error, TimeoutError) as e:
+            print(f"⚠️ Mesures de performance : versement perdu ({e})")
+            return 0
+        return len(samples)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            self.flush()
+
+
+_buffer: Optional[SampleBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+# ✅ Tampon unique par processus
+def get_buffer() -> SampleBuffer:
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = SampleBuffer()
+        return _buffer
+
+
+def flush_samples() -> int:
+    return _buffer.flush() if _buffer is not None else 0
+
+
+# 🏁 Fin du rerun : échantillons mis en tampon, puis l'arbre est rendu à
+# l'appelant. La pile est vidée quoi qu'il arrive.
+def end_page() -> Optional[Span]:
+    stack = _stack()
+    if not stack:
+        return None
+    try:
+        root = stack[0]
+        root.duration = time.perf_counter() - root.start
+        now = time.time()
+        get_buffer().add(
+            [
+                (root.name, name, kind, seconds * 1000, now)
+                for name, kind, seconds in _flatten(root)
+            ]
+        )
+        return root
+    finally:
+        _local.stack = None
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    rank = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[rank]
+
+
+# 🧮 Recalcul de p50/p95 sur la fenêtre ; les échantillons plus anciens sont purgés
+def aggregate_metrics(window_seconds: float = WINDOW_SECONDS) -> int:
+    ensure_perf_tables()
+    flush_samples()
+    since = time.time() - window_seconds
+    conn = get_db_connection()
+    groups: Dict[Tuple[str, str, str], List[float]] = {}
+    for row in conn.execute(
+        "SELECT page, name, kind, duration_ms FROM perf_samples WHERE ts >= ?",
+        (since,),
+    ):
+        groups.setdefault((row[0], row[1], row[2]), []).append(row[3])
+    now = time.time()
+    conn.execute("DELETE FROM perf_metrics")
+    conn.executemany(
+        "INSERT INTO perf_metrics "
+        "(page, name, kind, count, p50_ms, p95_ms, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                page,
+                name,
+                kind,
+                len(values),
+                _percentile(values, 0.50),
+                _percentile(values, 0.95),
+                now,
+            )
+            for (page, name, kind), values in groups.items()
+        ],
+    )
+    conn.execute("DELETE FROM perf_samples WHERE ts < ?", (since,))
+    conn.commit()
+    conn.close()
+    return len(groups)
+
+
+def get_page_metrics(page: Optional[str] = None) -> List[sqlite3.Row]:
+    ensure_perf_tables()
+    conn = get_db_connection()
+    if page:
+        rows = conn.execute(
+            "SELECT * FROM perf_metrics WHERE page = ? ORDER BY p95_ms DESC", (page,)
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM perf_metrics ORDER BY page, p95_ms DESC"
+        ).fetchall()
+    conn.close()
+    return rows
+
+
+@job_handler("aggregate_perf")
+def aggregate_perf(payload: Dict[str, Any]) -> Dict[str, Any]:
+    window = payload.get("window_seconds", WINDOW_SECONDS)
+    return {"metrics": aggregate_metrics(window)}
+
+
+def _tree_lines(node: Span, depth: int = 0) -> List[str]:
+    icon = KINDS.get(node.kind, "⚙️")
+    detail = f" — {node.detail}" if node.detail else ""
+    lines = [f"{'  ' * depth}{icon} {node.name}: {node.duration * 1000:.1f} ms{detail}"]
+    for child in node.children:
+        lines.extend(_tree_lines(child, depth + 1))
+    return lines
+
+
+# 👁️ Overlay affiché pour cette session (administrateurs) : les détails
+# coûteux des spans ne sont calculés que dans ce cas
+def overlay_visible() -> bool:
+    import streamlit as st
+
+    return st.session_state.get("role") == "admin"
+
+
+# 🔍 Overlay administrateur : arbre du rerun et percentiles de la page.
+# À appeler en fin de page : termine aussi le rerun (end_page).
+def render_overlay() -> None:
+    import streamlit as st
+
+    root = end_page()
+    if root is None or not overlay_visible():
+        return
+    with st.expander(f"⏱️ Performance : {root.duration * 1000:.0f} ms"):
+        st.code("\n".join(_tree_lines(root)), language=None)
+        metrics = get_page_metrics(root.name)
+        if metrics:
+            st.caption("Percentiles des 7 derniers jours")
+            st.table(
+                [
+                    {
+                        "Span": row["name"],
+                        "Famille": row["kind"],
+                        "Reruns": row["count"],
+                        "p50 (ms)": round(row["p50_ms"], 1),
+                        "p95 (ms)": round(row["p95_ms"], 1),
+                    }
+                    for row in metrics
+                ]
+            )
@@ -0,0 +1,450 @@
+import atexit
+import hashlib
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+DB_PATH = "data.db"
+
+# 🐢 Seuil d'une requête lente (exécution + lecture des lignes)
+SLOW_MS = 100.0
+
+# ⏱️ Versement des compteurs en base : toutes les 5 secondes
+FLUSH_SECONDS = 5.0
+
+# 🧠 Requêtes déjà normalisées gardées en mémoire
+FINGERPRINT_CACHE = 4096
+
+# 📜 Plans calculés pour ces instructions (une fois par empreinte et par processus)
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+# 🔌 sqlite3.connect d'origine : le journal écrit par elle, sans se journaliser
+_original_connect = sqlite3.connect
+
+
+# 🧩 Normalisation : commentaires retirés, littéraux remplacés par ?, listes
+# IN (...) et VALUES (...), (...) repliées. Seule la forme normalisée est
+# conservée : aucune valeur saisie (nom, numéro de dossier…) n'est stockée.
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_NAMED = re.compile(r"[:@$]\w+|\?\d*")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_ROWS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_SPACES = re.compile(r"\s+")
+
+_fingerprints: Dict[str, Tuple[str, str]] = {}
+
+
+def normalize(sql: str) -> str:
+    text = _COMMENTS.sub(" ", sql)
+    text = _STRINGS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _NAMED.sub("?", text)
+    text = _IN_LIST.sub("IN (?+)", text)
+    text = _ROWS.sub(lambda m: m.group(0).split(")")[0] + ")", text)
+    return _SPACES.sub(" ", text).strip().rstrip(";").strip()
+
+
+# 🔑 (empreinte, requête normalisée)
+def fingerprint(sql: str) -> Tuple[str, str]:
+    cached = _fingerprints.get(sql)
+    if cached is None:
+        normalized = normalize(sql)
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+        cached = (digest, normalized)
+        if len(_fingerprints) >= FINGERPRINT_CACHE:
+            _fingerprints.clear()
+        _fingerprints[sql] = cached
+    return cached
+
+
+# 🔍 Parcours complets d'un plan : « SCAN t » sans index (SQLite ≥ 3.36) ou
+# « SCAN TABLE t » (versions antérieures)
+def full_scans(plan: List[str]) -> List[str]:
+    tables = []
+    for detail in plan:
+        words = detail.split()
+        if len(words) < 2 or words[0] != "SCAN" or "USING" in words:
+            continue
+        name = words[2] if words[1] == "TABLE" and len(words) > 2 else words[1]
+        if name.startswith("(") or name in ("CONSTANT", "SUBQUERY"):
+            continue
+        if name not in tables:
+            tables.append(name)
+    return tables
+
+
+def create_querylog_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS query_stats (
+            fingerprint TEXT PRIMARY KEY,
+            sql TEXT NOT NULL,
+            calls INTEGER NOT NULL DEFAULT 0,
+            total_ms REAL NOT NULL DEFAULT 0,
+            max_ms REAL NOT NULL DEFAULT 0,
+            slow_calls INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            plan TEXT,
+            full_scan TEXT,
+            first_seen REAL,
+            last_seen REAL
+        )
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS slow_queries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fingerprint TEXT NOT NULL,
+            sql TEXT NOT NULL,
+            duration_ms REAL NOT NULL,
+            rows INTEGER,
+            plan TEXT,
+            ts REAL NOT NULL
+        )
+    """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_slow_queries_ts ON slow_queries (ts)")
+
+
+# 📊 Compteurs en mémoire, versés en base par un thread de fond
+class QueryLog:
+    def __init__(self, db_path: str = DB_PATH, slow_ms: float = SLOW_MS):
+        self.db_path = db_path
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.slow: List[Tuple] = []
+        self.plans: Dict[str, Optional[List[str]]] = {}
+        self.thread = threading.Thread(
+            target=self._run, name="query-log", daemon=True
+        )
+        self.thread.start()
+        atexit.register(self.flush)
+
+    # 📜 Plan d'une empreinte, calculé à sa première exécution
+    def plan_for(
+        self, conn: sqlite3.Connection, key: str, sql: str, parameters: Any
+    ) -> Optional[List[str]]:
+        if key in self.plans:
+            return self.plans[key]
+        plan = None
+        if sql.lstrip().split(None, 1)[0].upper() in EXPLAINABLE:
+            try:
+                rows = sqlite3.Connection.execute(
+                    conn, f"EXPLAIN QUERY PLAN {sql}", parameters
+                ).fetchall()
+                plan = [row[-1] for row in rows]
+            except (sqlite3.Error, ValueError):
+                plan = None
+        self.plans[key] = plan
+        return plan
+
+    def record(
+        self,
+        key: str,
+        normalized: str,
+        ms: float,
+        plan: Optional[List[str]],
+        calls: int = 1,
+        error: bool = False,
+    ) -> None:
+        now = time.time()
+        with self.lock:
+            stat = self.stats.get(key)
+            if stat is None:
+                stat = self.stats[key] = {
+                    "sql": normalized,
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "slow_calls": 0,
+                    "errors": 0,
+                    "plan": plan,
+                    "first_seen": now,
+                }
+            stat["calls"] += calls
+            stat["total_ms"] += ms
+            stat["max_ms"] = max(stat["max_ms"], ms)
+            stat["errors"] += error
+            stat["last_seen"] = now
+
+    # ➕ Temps de lecture des lignes, ajouté à l'exécution déjà comptée
+    def add_fetch(self, key: str, ms: float, total_ms: float) -> None:
+        with self.lock:
+            stat = self.stats.get(key)
+            if stat is not None:
+                stat["total_ms"] += ms
+                stat["max_ms"] = max(stat["max_ms"], total_ms)
+
+    def record_slow(
+        self,
+        key: str,
+        normalized: str,
+        ms: float,
+        rows: Optional[int],
+        plan: Optional[List[str]],
+    ) -> None:
+        with self.lock:
+            stat = self.stats.get(key)
+            if stat is not None:
+                stat["slow_calls"] += 1
+            self.slow.append(
+                (
+                    key,
+                    normalized,
+                    ms,
+                    rows,
+                    "\n".join(plan) if plan else None,
+                    time.time(),
+                )
+            )
+
+    def flush(self) -> int:
+        with self.lock:
+            stats, self.stats = self.stats, {}
+            slow, self.slow = self.slow, []
+        if not stats and not slow:
+            return 0
+        rows = [
+            (
+                key,
+                s["sql"],
+                s["calls"],
+                s["total_ms"],
+                s["max_ms"],
+                s["slow_calls"],
+                s["errors"],
+                "\n".join(s["plan"]) if s["plan"] else None,
+                ", ".join(full_scans(s["plan"] or [])) or None,
+                s["first_seen"],
+                s["last_seen"],
+            )
+            for key, s in stats.items()
+        ]
+        try:
+            conn = _original_connect(self.db_path, timeout=30)
+            try:
+                create_querylog_tables(conn)
+                conn.executemany(
+                    """
+                    INSERT INTO query_stats (fingerprint, sql, calls, total_ms,
+                        max_ms, slow_calls, errors, plan, full_scan, first_seen,
+                        last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (fingerprint) DO UPDATE SET
+                        calls = calls + excluded.calls,
+                        total_ms = total_ms + excluded.total_ms,
+                        max_ms = MAX(max_ms, excluded.max_ms),
+                        slow_calls = slow_calls + excluded.slow_calls,
+                        errors = errors + excluded.errors,
+                        plan = COALESCE(excluded.plan, plan),
+                        full_scan = COALESCE(excluded.full_scan, full_scan),
+                        last_seen = excluded.last_seen
+                    """,
+                    rows,
+                )
+                conn.executemany(
+                    """
+                    INSERT INTO slow_queries
+                        (fingerprint, sql, duration_ms, rows, plan, ts)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    slow,
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Journal des requêtes : versement perdu ({e})")
+            return 0
+        return len(rows)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            self.flush()
+
+
+_log: Optional[QueryLog] = None
+
+
+# ⏱️ Curseur chronométré : exécution puis lecture (fetchall/fetchmany/fetchone)
+class LoggedCursor(sqlite3.Cursor):
+    _key: Optional[str] = None
+
+    def _timed(self, method, sql: str, parameters: Any, calls: Optional[int] = None):
+        key, normalized = fingerprint(sql)
+        started = time.perf_counter()
+        try:
+            result = method(self, sql, parameters)
+        except Exception:
+            if _log is not None:
+                _log.record(key, normalized, _ms(started), None, calls or 1, True)
+            raise
+        ms = _ms(started)
+        log = _log
+        if log is not None:
+            # executemany : un seul passage compté par ligne, sans plan
+            plan = None
+            if calls is None:
+                plan = log.plan_for(self.connection, key, sql, parameters)
+            log.record(key, normalized, ms, plan, calls or 1)
+            self._key, self._normalized, self._ms = key, normalized, ms
+            self._plan, self._slow = plan, ms >= log.slow_ms
+            if self._slow:
+                log.record_slow(key, normalized, ms, None, plan)
+        return result
+
+    def execute(self, sql, parameters=()):
+        return self._timed(sqlite3.Cursor.execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq = list(seq_of_parameters)
+        return self._timed(sqlite3.Cursor.executemany, sql, seq, max(1, len(seq)))
+
+    def _fetched(self, started: float, rows: Optional[int]) -> None:
+        log = _log
+        if self._key is None or log is None:
+            return
+        ms = _ms(started)
+        self._ms += ms
+        log.add_fetch(self._key, ms, self._ms)
+        if not self._slow and self._ms >= log.slow_ms:
+            self._slow = True
+            log.record_slow(self._key, self._normalized, self._ms, rows, self._plan)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, None)
+        return rows
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, None)
+        return row
+
+
+# 🔌 Connexion dont les curseurs (y compris conn.execute) sont chronométrés
+class LoggedConnection(sqlite3.Connection):
+    def cursor(self, factory=LoggedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def _connect(*args, **kwargs) -> sqlite3.Connection:
+    kwargs.setdefault("factory", LoggedConnection)
+    return _original_connect(*args, **kwargs)
+
+
+# 🚀 Journalisation de toutes les connexions du processus : sqlite3.connect
+# est remplacé (les connexions ouvertes avec une factory propre sont laissées
+# telles quelles). Sans effet au second appel.
+def install_query_log(db_path: str = DB_PATH, slow_ms: float = SLOW_MS) -> QueryLog:
+    global _log
+    if _log is None:
+        _log = QueryLog(db_path, slow_ms)
+        sqlite3.connect = _connect
+    return _log
+
+
+def uninstall_query_log() -> None:
+    global _log
+    sqlite3.connect = _original_connect
+    if _log is not None:
+        _log.flush()
+        _log = None
+
+
+def _read(query: str, params: Tuple = ()) -> List[sqlite3.Row]:
+    if _log is not None:
+        _log.flush()
+    conn = _original_connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    create_querylog_tables(conn)
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    return rows
+
+
+# 📋 Requêtes par temps cumulé décroissant
+def get_query_stats(limit: int = 50) -> List[sqlite3.Row]:
+    return _read(
+        "SELECT *, total_ms / calls AS mean_ms FROM query_stats "
+        "ORDER BY total_ms DESC LIMIT ?",
+        (limit,),
+    )
+
+
+# 🐢 Dernières requêtes lentes, avec leur plan
+def get_slow_queries(limit: int = 50) -> List[sqlite3.Row]:
+    return _read("SELECT * FROM slow_queries ORDER BY ts DESC LIMIT ?", (limit,))
+
+
+# 🔍 Requêtes qui parcourent une table entière : candidates à un index
+def get_full_scans(limit: int = 50) -> List[sqlite3.Row]:
+    return _read(
+        "SELECT *, total_ms / calls AS mean_ms FROM query_stats "
+        "WHERE full_scan IS NOT NULL ORDER BY total_ms DESC LIMIT ?",
+        (limit,),
+    )
+
+
+def reset_query_stats() -> None:
+    if _log is not None:
+        _log.flush()
+    conn = _original_connect(DB_PATH, timeout=30)
+    create_querylog_tables(conn)
+    conn.execute("DELETE FROM query_stats")
+    conn.execute("DELETE FROM slow_queries")
+    conn.commit()
+    conn.close()
+
+
+# 👇 Exécution directe : python -m utils.querylog [stats|slow|scans|reset]
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        for row in get_query_stats():
+            print(
+                f"⏱️ {row['total_ms']:10.1f} ms  {row['calls']:>7} appel(s)  "
+                f"max {row['max_ms']:8.1f} ms  {row['sql'][:100]}"
+            )
+    elif command == "slow":
+        for row in get_slow_queries():
+            print(f"🐢 {row['duration_ms']:8.1f} ms  {row['sql'][:100]}")
+            for line in (row["plan"] or "").splitlines():
+                print(f"      {line}")
+    elif command == "scans":
+        for row in get_full_scans():
+            print(
+                f"🔍 {row['full_scan']:<20} {row['total_ms']:10.1f} ms  "
+                f"{row['calls']:>7} appel(s)  {row['sql'][:90]}"
+            )
+    elif command == "reset":
+        reset_query_stats()
+        print("🧹 Statistiques des requêtes remises à zéro.")
+    else:
+        print("Usage : python -m utils.querylog [stats|slow|scans|reset]")
@@ -0,0 +1,197 @@
+import sqlite3
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple, Any
+
+DB_PATH = "data.db"
+
+# 🔁 Calendrier de suivi prénatal par défaut :
+# toutes les 4 semaines jusqu'à 28 SA, toutes les 2 semaines jusqu'à 36 SA,
+# puis chaque semaine jusqu'à 41 SA. Format : "SA_limite:intervalle_semaines".
+PRENATAL_RULE = "28:4,36:2,41:1"
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🏗️ Une ligne par série, jamais une ligne par occurrence
+def create_series_table() -> None:
+    conn = get_db_connection()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rendez_vous_series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chart_number TEXT,
+            nom TEXT,
+            motif TEXT,
+            heure TEXT,
+            rule TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            edd_date TEXT NOT NULL,
+            until_date TEXT NOT NULL,
+            end_date TEXT,
+            clinician TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+    )
+    # Séries créées avant la colonne clinician (destinataire des rappels)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(rendez_vous_series)")}
+    if "clinician" not in columns:
+        conn.execute("ALTER TABLE rendez_vous_series ADD COLUMN clinician TEXT")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rendez_vous_series_dates "
+        "ON rendez_vous_series (start_date, until_date)"
+    )
+    conn.commit()
+    conn.close()
+
+
+# 📐 "28:4,36:2,41:1" → [(28, 4), (36, 2), (41, 1)]
+def parse_rule(rule: str) -> List[Tuple[int, int]]:
+    phases = []
+    for part in rule.split(","):
+        until_week, every = part.split(":")
+        phases.append((int(until_week), int(every)))
+    return phases
+
+
+# 🤰 Date correspondant à un âge gestationnel donné (EDD = 40 SA)
+def date_at_gestational_week(edd: date, week: int) -> date:
+    return edd - timedelta(weeks=40 - week)
+
+
+# 🔎 Dernière DPA connue pour la patiente
+def get_latest_edd(chart_number: str) -> Optional[date]:
+    conn = get_db_connection()
+    row = conn.execute(
+        """
+        SELECT edd_date FROM prenatal_care
+        WHERE chart_number = ? AND edd_date IS NOT NULL AND edd_date != ''
+        ORDER BY date_collection DESC, id DESC
+        LIMIT 1
+        """,
+        (chart_number,),
+    ).fetchone()
+    conn.close()
+    if not row:
+        return None
+    return date.fromisoformat(str(row["edd_date"])[:10])
+
+
+# ➕ Création d'une série à partir de la DPA de prenatal_care
+def create_series(
+    chart_number: str,
+    nom: str,
+    start_date: date,
+    heure: str,
+    motif: str,
+    rule: str = PRENATAL_RULE,
+    clinician: Optional[str] = None,
+) -> Optional[int]:
+    edd = get_latest_edd(chart_number)
+    if edd is None:
+        return None
+    last_week = max(week for week, _ in parse_rule(rule))
+    until = date_at_gestational_week(edd, last_week)
+    create_series_table()
+    conn = get_db_connection()
+    cursor = conn.execute(
+        """
+        INSERT INTO rendez_vous_series
+            (chart_number, nom, motif, heure, rule, start_date, edd_date, until_date,
+             clinician)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            chart_number,
+            nom,
+            motif,
+            heure,
+            rule,
+            start_date.isoformat(),
+            edd.isoformat(),
+            until.isoformat(),
+            clinician,
+        ),
+    )
+    series_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return series_id
+
+
+# ⏹️ Arrêt d'une série (accouchement, transfert...) sans toucher à l'historique
+def end_series(series_id: int, end_date: date) -> None:
+    conn = get_db_connection()
+    conn.execute(
+        "UPDATE rendez_vous_series SET end_date = ? WHERE id = ?",
+        (end_date.isoformat(), series_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+# 🔄 Expansion paresseuse : seules les dates de [start, end[ sont produites
+def expand_series(series: sqlite3.Row, start: date, end: date) -> Iterator[date]:
+    edd = date.fromisoformat(series["edd_date"])
+    current = date.fromisoformat(series["start_date"])
+    stop = end
+    if series["end_date"]:
+        stop = min(stop, date.fromisoformat(series["end_date"]))
+
+    for until_week, every in parse_rule(series["rule"]):
+        phase_end = date_at_gestational_week(edd, until_week)
+        step = timedelta(weeks=every)
+        # ⏩ Saut direct jusqu'à la fenêtre au lieu d'itérer depuis le début
+        target = min(start, phase_end)
+        if current < target:
+            current += step * -(-(target - current).days // step.days)
+        while current < phase_end and current < stop:
+            if current >= start:
+                yield current
+            current += step
+        if current >= stop:
+            return
+
+
+# 📋 Séries qui recoupent la fenêtre
+def fetch_series_in_window(start: date, end: date) -> List[sqlite3.Row]:
+    create_series_table()
+    conn = get_db_connection()
+    rows = conn.execute(
+        """
+        SELECT * FROM rendez_vous_series
+        WHERE start_date < ? AND until_date > ?
+          AND (end_date IS NULL OR end_date > ?)
+        """,
+        (end.isoformat(), start.isoformat(), start.isoformat()),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+# 📆 Occurrences de la fenêtre, au même format que rendez_vous (nom, date, heure, motif)
+def get_window_occurrences(start: date, end: date) -> List[Tuple[Any]]:
+    occurrences = []
+    for series in fetch_series_in_window(start, end):
+        for day in expand_series(series, start, end):
+            occurrences.append(
+                (series["nom"], day.isoformat(), series["heure"], series["motif"])
+            )
+    return occurrences
+
+
+# 🗂️ Séries d'une patiente
+def get_patient_series(chart_number: str) -> List[sqlite3.Row]:
+    create_series_table()
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT * FROM rendez_vous_series WHERE chart_number = ? ORDER BY start_date",
+        (chart_number,),
+    ).fetchall()
+    conn.close()
+    return rows
@@ -0,0 +1,345 @@
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.calendar_view import ensure_calendar_index, fetch_window_rendez_vous
+from utils.jobs import job_handler
+from utils.Notifications import add_notification
+from utils.outbox import queue_email, queue_sms
+from utils.recurrence import expand_series, fetch_series_in_window
+
+DB_PATH = "data.db"
+
+# ⏰ Horizon des rappels : rendez-vous des N prochaines heures
+REMINDER_HOURS = 24
+
+# 🔁 Un envoi en échec est repris au passage suivant, au plus N fois ; une
+# réservation (« sending ») abandonnée par un passage interrompu est reprise
+# après le bail
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 600
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# 🏗️ Envois (un par rendez-vous, canal et destinataire) : pending → sending
+# → sent, ou failed après MAX_ATTEMPTS ; delivered_at date le dernier
+# changement d'état. Plus la liste du jour précalculée pour la page.
+def create_reminder_tables() -> None:
+    conn = get_db_connection()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reminder_deliveries (
+            appointment_key TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            delivered_at REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            PRIMARY KEY (appointment_key, channel, recipient)
+        )
+    """
+    )
+    # Table antérieure aux statuts : ses lignes sont des envois faits
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(reminder_deliveries)")}
+    if "status" not in columns:
+        conn.execute(
+            "ALTER TABLE reminder_deliveries "
+            "ADD COLUMN status TEXT NOT NULL DEFAULT 'sent'"
+        )
+        conn.execute(
+            "ALTER TABLE reminder_deliveries "
+            "ADD COLUMN attempts INTEGER NOT NULL DEFAULT 1"
+        )
+        conn.execute("ALTER TABLE reminder_deliveries ADD COLUMN last_error TEXT")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reminders_today (
+            day TEXT NOT NULL,
+            heure TEXT,
+            nom TEXT,
+            motif TEXT
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reminders_today_day "
+        "ON reminders_today (day, heure)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reminder_runs (
+            day TEXT PRIMARY KEY,
+            computed_at REAL NOT NULL
+        )
+    """
+    )
+    conn.commit()
+    conn.close()
+
+
+_tables_ready = False
+
+
+# ✅ Création unique par processus
+def ensure_reminder_tables() -> None:
+    global _tables_ready
+    if not _tables_ready:
+        create_reminder_tables()
+        ensure_calendar_index()
+        _tables_ready = True
+
+
+# 🔑 Identifiant d'un rendez-vous (les occurrences de séries n'ont pas d'id)
+def appointment_key(rdv: Dict[str, Any]) -> str:
+    return f"{rdv['date']}|{rdv['heure']}|{rdv['nom']}"
+
+
+def _starts_at(rdv: Dict[str, Any]) -> Optional[datetime]:
+    text = f"{str(rdv['date'])[:10]} {str(rdv['heure'] or '00:00')[:5]}"
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+
+
+# 📋 Rendez-vous (ponctuels + occurrences de séries) qui commencent dans
+# [maintenant, maintenant + heures[, avec dossier et clinicienne
+def fetch_upcoming(now: datetime, hours: int = REMINDER_HOURS) -> List[Dict[str, Any]]:
+    end = now + timedelta(hours=hours)
+    start_day, end_day = now.date(), end.date() + timedelta(days=1)
+    conn = get_db_connection()
+    rows = conn.execute(
+        """
+        SELECT nom, date, heure, motif, chart_number, clinician FROM rendez_vous
+        WHERE date >= ? AND date < ?
+        """,
+        (start_day.isoformat(), end_day.isoformat()),
+    ).fetchall()
+    conn.close()
+    appointments = [dict(row) for row in rows]
+    for series in fetch_series_in_window(start_day, end_day):
+        for day in expand_series(series, start_day, end_day):
+            appointments.append(
+                {
+                    "nom": series["nom"],
+                    "date": day.isoformat(),
+                    "heure": series["heure"],
+                    "motif": series["motif"],
+                    "chart_number": series["chart_number"],
+                    "clinician": series["clinician"],
+                }
+            )
+    return [
+        rdv
+        for rdv in appointments
+        if (starts := _starts_at(rdv)) and now <= starts < end
+    ]
+
+
+# 👩‍⚕️ Clinicienne du rendez-vous (users.username), si elle existe
+def _clinician(
+    conn: sqlite3.Connection, username: Optional[str]
+) -> Optional[sqlite3.Row]:
+    if not username:
+        return None
+    try:
+        return conn.execute(
+            "SELECT username, email FROM users WHERE username = ?", (username,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+
+
+# 📱 Téléphone de la patiente : par numéro de dossier, sinon seulement si le
+# nom désigne une seule fiche
+def _patient_phone(conn: sqlite3.Connection, rdv: Dict[str, Any]) -> Optional[str]:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(demographics)")}
+    if "telephone" not in columns:
+        return None
+    if rdv["chart_number"] and "chart_number" in columns:
+        phones = conn.execute(
+            """
+            SELECT DISTINCT telephone FROM demographics
+            WHERE chart_number = ? AND telephone IS NOT NULL AND telephone != ''
+            """,
+            (rdv["chart_number"],),
+        ).fetchall()
+    elif {"nom", "prenom"} <= columns:
+        nom = rdv["nom"]
+        phones = conn.execute(
+            """
+            SELECT DISTINCT telephone FROM demographics
+            WHERE telephone IS NOT NULL AND telephone != ''
+              AND (nom = ? OR prenom || ' ' || nom = ? OR nom || ' ' || prenom = ?)
+            """,
+            (nom, nom, nom),
+        ).fetchall()
+    else:
+        return None
+    return phones[0][0] if len(phones) == 1 else None
+
+
+# 🔒 Réserve un envoi (pending → sending) ; False s'il est déjà fait, en
+# cours dans un autre passage ou abandonné après MAX_ATTEMPTS
+def _claim(conn: sqlite3.Connection, key: str, channel: str, recipient: str) -> bool:
+    now = time.time()
+    conn.execute(
+        "INSERT OR IGNORE INTO reminder_deliveries "
+        "(appointment_key, channel, recipient, delivered_at) VALUES (?, ?, ?, ?)",
+        (key, channel, recipient, now),
+    )
+    cursor = conn.execute(
+        """
+        UPDATE reminder_deliveries
+        SET status = 'sending', attempts = attempts + 1, delivered_at = ?
+        WHERE appointment_key = ? AND channel = ? AND recipient = ?
+          AND attempts < ?
+          AND (status = 'pending' OR (status = 'sending' AND delivered_at < ?))
+        """,
+        (now, key, channel, recipient, MAX_ATTEMPTS, now - LEASE_SECONDS),
+    )
+    conn.commit()
+    return cursor.rowcount == 1
+
+
+# 📝 Issue d'un envoi réservé : sent, ou pending (nouvel essai au passage
+# suivant) / failed après MAX_ATTEMPTS
+def _finish(
+    conn: sqlite3.Connection,
+    key: str,
+    channel: str,
+    recipient: str,
+    error: Optional[str] = None,
+) -> None:
+    conn.execute(
+        """
+        UPDATE reminder_deliveries
+        SET status = CASE WHEN ? IS NULL THEN 'sent'
+                          WHEN attempts >= ? THEN 'failed'
+                          ELSE 'pending' END,
+            last_error = ?, delivered_at = ?
+        WHERE appointment_key = ? AND channel = ? AND recipient = ?
+        """,
+        (error, MAX_ATTEMPTS, error, time.time(), key, channel, recipient),
+    )
+    conn.commit()
+
+
+# 🔔 Rappels d'un rendez-vous : notification et e-mail à la clinicienne du
+# rendez-vous, SMS à la patiente. Chaque envoi est réservé puis marqué
+# « sent » une fois fait ; un échec repasse en « pending ». L'e-mail et le
+# SMS sont en plus dédoublonnés par la boîte d'envoi (même clé).
+def send_reminders(conn: sqlite3.Connection, rdv: Dict[str, Any]) -> Dict[str, int]:
+    nom, day, heure, motif = rdv["nom"], rdv["date"], rdv["heure"], rdv["motif"]
+    key = appointment_key(rdv)
+    message = f"🔔 Rendez-vous le {day} à {str(heure)[:5]} — {nom} : {motif}"
+    sent = {"notification": 0, "email": 0, "sms": 0, "errors": 0}
+
+    targets = []
+    clinician = _clinician(conn, rdv["clinician"])
+    if clinician:
+        targets.append(("notification", clinician["username"]))
+        if clinician["email"]:
+            targets.append(("email", clinician["email"]))
+    phone = _patient_phone(conn, rdv)
+    if phone:
+        targets.append(("sms", phone))
+
+    for channel, recipient in targets:
+        if not _claim(conn, key, channel, recipient):
+            continue
+        dedupe_key = f"reminder:{key}:{recipient}"
+        try:
+            if channel == "notification":
+                add_notification(recipient, message)
+            elif channel == "email":
+                queue_email(recipient, "Rappel de rendez-vous", message, dedupe_key)
+            else:
+                sms = f"Rappel : rendez-vous le {day} à {str(heure)[:5]}."
+                queue_sms(recipient, sms, dedupe_key)
+        except Exception as e:
+            _finish(conn, key, channel, recipient, repr(e))
+            sent["errors"] += 1
+            continue
+        _finish(conn, key, channel, recipient)
+        sent[channel] += 1
+    return sent
+
+
+# 📆 Liste du jour précalculée (lue par la page, sans parcourir tous les rdv)
+def refresh_today(day: Optional[date] = None) -> int:
+    ensure_reminder_tables()
+    day = day or date.today()
+    rows = fetch_window_rendez_vous(day, day + timedelta(days=1))
+    conn = get_db_connection()
+    conn.execute("DELETE FROM reminders_today WHERE day = ?", (day.isoformat(),))
+    conn.executemany(
+        "INSERT INTO reminders_today (day, heure, nom, motif) VALUES (?, ?, ?, ?)",
+        [(day.isoformat(), str(heure), nom, motif) for nom, _, heure, motif in rows],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO reminder_runs (day, computed_at) VALUES (?, ?)",
+        (day.isoformat(), time.time()),
+    )
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def get_today_reminders(day: Optional[date] = None) -> List[Tuple[str, str, str]]:
+    ensure_reminder_tables()
+    day = day or date.today()
+    conn = get_db_connection()
+    computed = conn.execute(
+        "SELECT 1 FROM reminder_runs WHERE day = ?", (day.isoformat(),)
+    ).fetchone()
+    conn.close()
+    if computed is None:
+        # Premier affichage du jour avant le passage de la tâche
+        refresh_today(day)
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT heure, nom, motif FROM reminders_today WHERE day = ? ORDER BY heure",
+        (day.isoformat(),),
+    ).fetchall()
+    conn.close()
+    return [tuple(row) for row in rows]
+
+
+# 🔄 Tâche de fond : rappels des prochaines heures + liste du jour
+@job_handler("appointment_reminders")
+def appointment_reminders(payload: Dict[str, Any]) -> Dict[str, Any]:
+    ensure_reminder_tables()
+    hours = int(payload.get("hours", REMINDER_HOURS))
+    upcoming = fetch_upcoming(datetime.now(), hours)
+    totals = {
+        "appointments": len(upcoming),
+        "notification": 0,
+        "email": 0,
+        "sms": 0,
+        "errors": 0,
+    }
+    conn = get_db_connection()
+    try:
+        for rdv in upcoming:
+            for channel, count in send_reminders(conn, rdv).items():
+                totals[channel] += count
+    finally:
+        conn.close()
+    totals["today"] = refresh_today()
+    return totals
+
+
+# 👇 Exécution directe : python -m utils.reminders [heures]
+if __name__ == "__main__":
+    hours = int(sys.argv[1]) if len(sys.argv) > 1 else REMINDER_HOURS
+    print(f"🔔 {appointment_reminders({'hours': hours})}")
@@ -0,0 +1,61 @@
+import sqlite3
+from typing import List
+
+# 📅 Schéma unique de rendez_vous dans data.db : celui des pages et de
+# init_db.py (nom, date, heure, motif), complété des colonnes du dossier
+# patient. Le calendrier et le dossier (utils/dossier.py) lisent tous deux
+# cette table ; clinician (nom d'utilisateur) reçoit les rappels.
+RENDEZ_VOUS_DDL = """
+    CREATE TABLE IF NOT EXISTS rendez_vous (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom TEXT,
+        date TEXT,
+        heure TEXT,
+        motif TEXT,
+        chart_number TEXT,
+        appointment_detail TEXT,
+        duration_minutes INTEGER,
+        attended TEXT,
+        notes TEXT,
+        clinician TEXT
+    )
+"""
+
+# ➕ Colonnes ajoutées aux bases créées avant ce schéma (tables des pages
+# sans colonnes du dossier, ou ancienne table de db.py sans nom/date/heure)
+COLUMNS = [
+    ("nom", "TEXT"),
+    ("date", "TEXT"),
+    ("heure", "TEXT"),
+    ("motif", "TEXT"),
+    ("chart_number", "TEXT"),
+    ("appointment_detail", "TEXT"),
+    ("duration_minutes", "INTEGER"),
+    ("attended", "TEXT"),
+    ("notes", "TEXT"),
+    ("clinician", "TEXT"),
+]
+
+
+# 🧱 Migration idempotente : table créée si absente, colonnes manquantes
+# ajoutées (pas de commit ici). Renvoie les colonnes ajoutées.
+def migrate_rendez_vous(conn: sqlite3.Connection) -> List[str]:
+    conn.execute(RENDEZ_VOUS_DDL)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(rendez_vous)")}
+    added = []
+    for column, sql_type in COLUMNS:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE rendez_vous ADD COLUMN {column} {sql_type}")
+            added.append(column)
+    # Ancienne table de db.py : date, heure et motif repris de ses colonnes
+    if "date" in added and "appointment_date" in columns:
+        conn.execute(
+            """
+            UPDATE rendez_vous SET
+                date = substr(appointment_date, 1, 10),
+                heure = NULLIF(substr(appointment_date, 12, 5), ''),
+                motif = appointment_type
+            WHERE date IS NULL
+            """
+        )
+    return added
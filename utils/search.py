@@ -0,0 +1,273 @@
+import re
+import sqlite3
+from typing import Dict, List, Optional
+
+DB_PATH = "data.db"
+
+# 🩺 Rôles autorisés à consulter les données cliniques
+CLINICAL_ROLES = ["admin", "doctor", "nurse", "sage-femme"]
+
+# 🗂️ Tables indexées : code (pour le rowid), type de résultat et colonnes
+# candidates. Seules les colonnes réellement présentes sont utilisées, car le
+# schéma diffère selon le script d'initialisation employé.
+SOURCES: Dict[str, Dict] = {
+    "demographics": {
+        "code": 1,
+        "kind": "patient",
+        "chart": "chart_number",
+        "title": ["nom", "prenom", "chart_number"],
+        "body": [
+            "community_of_residence",
+            "reason_for_referral",
+            "reason_for_non_eligibility",
+            "reason_if_never_seen",
+            "adresse",
+        ],
+    },
+    "prenatal_care": {
+        "code": 2,
+        "kind": "prenatal",
+        "chart": "chart_number",
+        "title": ["chart_number", "nom"],
+        "body": ["notes", "other_transfer_reason", "remarques"],
+    },
+    "intrapartum_care": {
+        "code": 3,
+        "kind": "intrapartum",
+        "chart": "chart_number",
+        "title": ["nom", "type_accouchement"],
+        "body": ["observations"],
+    },
+    "private_messages": {
+        "code": 4,
+        "kind": "message",
+        "author": "sender",
+        "recipient": "receiver",
+        "title": ["sender", "receiver"],
+        "body": ["message"],
+    },
+}
+
+KIND_LABELS = {
+    "patient": "👤 Patiente",
+    "prenatal": "🤰 Soins prénatals",
+    "intrapartum": "🩺 Intrapartum",
+    "message": "💬 Message",
+}
+
+INDEX_COLUMNS = "rowid, kind, ref_id, chart_number, author, recipient, title, body"
+
+# 🔢 rowid = rowid source × 8 + code de table : suppression ciblée sans balayage
+ROWID_FACTOR = 8
+
+
+# 🔌 Connexion à la base
+def get_db_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _existing_columns(cursor: sqlite3.Cursor, table: str) -> List[str]:
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+
+
+def _concat(ref: str, columns: List[str]) -> str:
+    if not columns:
+        return "''"
+    return " || ' ' || ".join(f"coalesce({ref}.{col}, '')" for col in columns)
+
+
+def _column_or_null(ref: str, column: Optional[str], existing: List[str]) -> str:
+    return f"{ref}.{column}" if column and column in existing else "NULL"
+
+
+# 🧾 Expression SELECT produisant une ligne d'index pour une table source
+def _index_select(table: str, ref: str, existing: List[str]) -> str:
+    source = SOURCES[table]
+    title = [col for col in source["title"] if col in existing]
+    body = [col for col in source["body"] if col in existing]
+    return f"""
+        SELECT {ref}.rowid * {ROWID_FACTOR} + {source['code']},
+               '{source['kind']}',
+               {ref}.rowid,
+               {_column_or_null(ref, source.get('chart'), existing)},
+               {_column_or_null(ref, source.get('author'), existing)},
+               {_column_or_null(ref, source.get('recipient'), existing)},
+               {_concat(ref, title)},
+               {_concat(ref, body)}"""
+
+
+# 📥 Lignes existantes des tables sources copiées dans l'index
+def _backfill(cursor: sqlite3.Cursor, tables: Optional[List[str]] = None) -> None:
+    for table in SOURCES if tables is None else tables:
+        existing = _existing_columns(cursor, table)
+        if not existing:
+            continue
+        select = _index_select(table, table, existing)
+        cursor.execute(
+            f"INSERT INTO search_index ({INDEX_COLUMNS}) {select} FROM {table}"
+        )
+
+
+# 🔔 Triggers de synchronisation d'une table source (recréés pour suivre
+# ses colonnes actuelles)
+def _install_triggers(cursor: sqlite3.Cursor, table: str, existing: List[str]):
+    source = SOURCES[table]
+    for event in ("insert", "update", "delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_search_{table}_{event}")
+
+    delete_old = (
+        "DELETE FROM search_index "
+        f"WHERE rowid = OLD.rowid * {ROWID_FACTOR} + {source['code']};"
+    )
+    insert_new = (
+        f"INSERT INTO search_index ({INDEX_COLUMNS}) "
+        f"{_index_select(table, 'NEW', existing)};"
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER trg_search_{table}_insert AFTER INSERT ON {table}
+        BEGIN {insert_new} END
+    """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER trg_search_{table}_update AFTER UPDATE ON {table}
+        BEGIN {delete_old} {insert_new} END
+    """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER trg_search_{table}_delete AFTER DELETE ON {table}
+        BEGIN {delete_old} END
+    """
+    )
+
+
+# 🏗️ Table FTS5 + triggers de synchronisation. Une table source sans
+# triggers (créée après l'index, ou supprimée puis recréée) les reçoit et
+# ses lignes sont copiées dans l'index, dans la même transaction ; à la
+# création de l'index, toutes les tables le sont. refresh_triggers recrée
+# aussi ceux qui existent déjà.
+def create_search_index(refresh_triggers: bool = True) -> None:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    created = not cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'search_index'"
+    ).fetchone()
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            kind UNINDEXED,
+            ref_id UNINDEXED,
+            chart_number UNINDEXED,
+            author UNINDEXED,
+            recipient UNINDEXED,
+            title,
+            body,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """
+    )
+    triggers = {
+        row[0]
+        for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            " AND name LIKE 'trg_search_%'"
+        )
+    }
+    missing = []
+    for table, source in SOURCES.items():
+        existing = _existing_columns(cursor, table)
+        if not existing:
+            continue
+        untracked = f"trg_search_{table}_insert" not in triggers
+        if untracked or refresh_triggers:
+            _install_triggers(cursor, table, existing)
+        if untracked and not created:
+            # Lignes d'une ancienne table du même nom, plus à jour
+            cursor.execute(
+                f"DELETE FROM search_index WHERE rowid % {ROWID_FACTOR} = ?",
+                (source["code"],),
+            )
+            missing.append(table)
+    if created:
+        _backfill(cursor)
+    elif missing:
+        _backfill(cursor, missing)
+    conn.commit()
+    conn.close()
+
+
+_index_ready = False
+
+
+# ✅ Triggers recréés une fois par processus ; à chaque appel, les tables
+# sources apparues depuis sont rattachées à l'index
+def ensure_search_index() -> None:
+    global _index_ready
+    create_search_index(refresh_triggers=not _index_ready)
+    _index_ready = True
+
+
+# 🔄 Reconstruction complète (réparation manuelle de l'index)
+def rebuild_search_index() -> int:
+    create_search_index()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM search_index")
+    _backfill(cursor)
+    conn.commit()
+    total = cursor.execute("SELECT COUNT(*) FROM search_index").fetchone()[0]
+    conn.close()
+    return total
+
+
+# ✂️ Texte libre → requête FTS5 sûre (chaque mot en préfixe)
+def build_match_query(text: str) -> str:
+    tokens = re.findall(r"\w+", text, flags=re.UNICODE)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+# 🔍 Recherche classée, filtrée selon le rôle de l'utilisateur
+def search(
+    text: str,
+    username: Optional[str],
+    role: Optional[str],
+    kinds: Optional[List[str]] = None,
+    limit: int = 50,
+) -> List[sqlite3.Row]:
+    match = build_match_query(text)
+    if not match:
+        return []
+    ensure_search_index()
+
+    # 🔐 Les messages ne sont visibles que par leurs participants,
+    # les données cliniques que par les rôles cliniques.
+    clauses = ["search_index MATCH :match"]
+    visibility = ["(kind = 'message' AND (author = :user OR recipient = :user))"]
+    if role in CLINICAL_ROLES:
+        visibility.append("kind != 'message'")
+    clauses.append("(" + " OR ".join(visibility) + ")")
+    params = {"match": match, "user": username, "limit": limit}
+    if kinds:
+        placeholders = ", ".join(f":kind{i}" for i in range(len(kinds)))
+        clauses.append(f"kind IN ({placeholders})")
+        params.update({f"kind{i}": kind for i, kind in enumerate(kinds)})
+
+    conn = get_db_connection()
+    rows = conn.execute(
+        f"""
+        SELECT kind, ref_id, chart_number, author, recipient, title,
+               snippet(search_index, -1, '**', '**', '…', 12) AS snippet,
+               bm25(search_index, 0, 0, 0, 0, 0, 2.0, 1.0) AS score
+        FROM search_index
+        WHERE {' AND '.join(clauses)}
+        ORDER BY score
+        LIMIT :limit
+        """,
+        params,
+    ).fetchall()
+    conn.close()
+    return rows
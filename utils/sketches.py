@@ -0,0 +1,477 @@
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from utils.jobs import job_handler
+from utils.snapshots import connect_snapshot
+from utils.writer import write_transaction
+
+DB_PATH = "midwifery.db"
+
+# 🗂️ Bases dont les statistiques sont tenues par esquisses : la base du
+# suivi (pôles 1-2) et celle du formulaire de collecte
+SKETCH_DATABASES = ["suivi_midwifery_nouvelle.db", "midwifery.db"]
+
+# 🎯 Précision : KLL à k = 200 (erreur de rang ≈ 1 %), HyperLogLog à 2^12
+# registres (erreur type ≈ 1,6 %)
+KLL_K = 200
+HLL_P = 12
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+# 📅 Partition des lignes sans date exploitable (comptées sans borne de début)
+UNDATED = "0000-00"
+MONTH = re.compile(r"^\d{4}-\d{2}")
+
+
+# 📏 Esquisse KLL des quantiles : des niveaux de valeurs, le niveau h pesant
+# 2^h. Un niveau plein est trié et compacté : une valeur sur deux (départ
+# tiré au hasard) monte au niveau suivant. Deux esquisses se fusionnent
+# niveau par niveau, ce qui rend les mois additionnables.
+class KLLSketch:
+    def __init__(self, k: int = KLL_K):
+        self.k = k
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.levels: List[List[float]] = [[]]
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compact(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[level])
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[random.getrandbits(1) :: 2])
+                self.levels[level] = keep
+            level += 1
+
+    def update(self, value: float) -> None:
+        value = float(value)
+        self.n += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compact()
+
+    def merge(self, other: "KLLSketch") -> None:
+        if not other.n:
+            return
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self._compact()
+
+    def quantiles(self, qs: Sequence[float] = QUANTILES) -> Dict[float, float]:
+        if not self.n:
+            return {q: math.nan for q in qs}
+        weighted = sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self.levels)
+            for value in items
+        )
+        total = sum(weight for _, weight in weighted)
+        results = {}
+        for q in qs:
+            if q <= 0:
+                results[q] = self.min
+                continue
+            if q >= 1:
+                results[q] = self.max
+                continue
+            target, seen = q * total, 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    results[q] = value
+                    break
+        return results
+
+    def to_bytes(self) -> bytes:
+        state = {
+            "k": self.k,
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+            "levels": self.levels,
+        }
+        return json.dumps(state, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KLLSketch":
+        state = json.loads(data)
+        sketch = cls(state["k"])
+        sketch.n, sketch.min, sketch.max = state["n"], state["min"], state["max"]
+        sketch.levels = state["levels"]
+        return sketch
+
+
+# 🔢 HyperLogLog des valeurs distinctes : chaque valeur est hachée, les p
+# premiers bits choisissent un registre qui garde le plus long préfixe de
+# zéros vu. Fusion = maximum registre par registre.
+class HyperLogLog:
+    def __init__(self, p: int = HLL_P, registers: Optional[bytes] = None):
+        self.p = p
+        self.m = 1 << p
+        self.n = 0
+        self.registers = bytearray(registers or self.m)
+
+    def update(self, value: Any) -> None:
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+        x = int.from_bytes(digest, "big")
+        bits = 64 - self.p
+        index, rest = x >> bits, x & ((1 << bits) - 1)
+        rank = bits - rest.bit_length() + 1
+        self.n += 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        self.n += other.n
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Petits effectifs : comptage linéaire des registres vides
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(registers=data)
+
+
+Sketch = Union[KLLSketch, HyperLogLog]
+
+
+# 📐 Statistiques tenues à jour : une esquisse par métrique et par mois
+# (mois de la colonne date de la ligne)
+@dataclass(frozen=True)
+class Metric:
+    name: str
+    label: str
+    table: str
+    date_column: str
+    column: str
+    kind: str  # "quantiles" ou "distinct"
+
+
+METRICS = [
+    Metric("age", "Âge", "demographics", "date_of_referral", "age", "quantiles"),
+    Metric(
+        "weeks_first_visit",
+        "Semaines au 1er rendez-vous",
+        "demographics",
+        "date_of_referral",
+        "weeks_at_first_appointment",
+        "quantiles",
+    ),
+    Metric(
+        "patients",
+        "Patientes distinctes",
+        "demographics",
+        "date_of_referral",
+        "chart_number",
+        "distinct",
+    ),
+    Metric(
+        "communities",
+        "Communautés distinctes",
+        "demographics",
+        "date_of_referral",
+        "community_of_residence",
+        "distinct",
+    ),
+    Metric("patient_age", "Âge (collecte)", "patients", "date", "age", "quantiles"),
+    Metric(
+        "services", "Services distincts", "patients", "date", "service", "distinct"
+    ),
+]
+METRICS_BY_NAME = {metric.name: metric for metric in METRICS}
+
+
+def _new_sketch(metric: Metric) -> Sketch:
+    return KLLSketch() if metric.kind == "quantiles" else HyperLogLog()
+
+
+def _load_sketch(metric: Metric, data: bytes, n: int) -> Sketch:
+    cls = KLLSketch if metric.kind == "quantiles" else HyperLogLog
+    sketch = cls.from_bytes(data)
+    sketch.n = n
+    return sketch
+
+
+# 🧮 Valeur retenue pour l'esquisse (None : ligne ignorée)
+def _value(metric: Metric, raw: Any) -> Any:
+    if raw is None:
+        return None
+    if metric.kind == "quantiles":
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            return None
+        return None if math.isnan(value) else value
+    text = str(raw).strip()
+    return text or None
+
+
+def _month(raw: Any) -> str:
+    text = str(raw) if raw is not None else ""
+    return text[:7] if MONTH.match(text) else UNDATED
+
+
+# 🏗️ Table des esquisses (dans la base des données qu'elles résument)
+def create_sketch_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stat_sketches (
+            metric TEXT NOT NULL,
+            month TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            data BLOB NOT NULL,
+            updated_at REAL,
+            PRIMARY KEY (metric, month)
+        )
+    """
+    )
+    # Une ligne par métrique reconstruite depuis la table brute : sans elle,
+    # les esquisses ne couvrent que les lignes observées depuis
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stat_sketches_built (
+            metric TEXT PRIMARY KEY,
+            built_at REAL
+        )
+    """
+    )
+
+
+def _store(conn: sqlite3.Connection, metric: Metric, month: str, sketch: Sketch):
+    conn.execute(
+        """
+        INSERT INTO stat_sketches (metric, month, kind, n, data, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (metric, month) DO UPDATE SET
+            n = excluded.n, data = excluded.data, updated_at = excluded.updated_at
+        """,
+        (metric.name, month, metric.kind, sketch.n, sketch.to_bytes(), time.time()),
+    )
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+# 🎯 Métriques dont la table et les colonnes existent dans cette base
+def metrics_for(conn: sqlite3.Connection) -> List[Metric]:
+    present: Dict[str, set] = {}
+    found = []
+    for metric in METRICS:
+        if metric.table not in present:
+            present[metric.table] = _columns(conn, metric.table)
+        if {metric.date_column, metric.column} <= present[metric.table]:
+            found.append(metric)
+    return found
+
+
+# ➕ Mise à jour à l'insertion, dans la transaction de l'appelant (pas de
+# commit ici) : la ligne et les esquisses de son mois sont validées ensemble
+def observe(conn: sqlite3.Connection, table: str, row: Dict[str, Any]) -> None:
+    metrics = [m for m in METRICS if m.table == table and m.column in row]
+    if not metrics:
+        return
+    create_sketch_table(conn)
+    for metric in metrics:
+        value = _value(metric, row[metric.column])
+        if value is None:
+            continue
+        month = _month(row.get(metric.date_column))
+        stored = conn.execute(
+            "SELECT data, n FROM stat_sketches WHERE metric = ? AND month = ?",
+            (metric.name, month),
+        ).fetchone()
+        sketch = _load_sketch(metric, *stored) if stored else _new_sketch(metric)
+        sketch.update(value)
+        _store(conn, metric, month, sketch)
+
+
+# 🔁 Reconstruction complète depuis les tables brutes (première utilisation,
+# tâche nocturne) : rattrape modifications, suppressions et imports directs
+def rebuild_sketches(
+    conn: sqlite3.Connection, metrics: Optional[Iterable[Metric]] = None
+) -> Dict[str, int]:
+    create_sketch_table(conn)
+    counts = {}
+    for metric in metrics_for(conn) if metrics is None else metrics:
+        sketches: Dict[str, Sketch] = {}
+        rows = conn.execute(
+            f"SELECT {metric.date_column}, {metric.column} FROM {metric.table}"
+        )
+        for raw_date, raw_value in rows:
+            value = _value(metric, raw_value)
+            if value is None:
+                continue
+            month = _month(raw_date)
+            if month not in sketches:
+                sketches[month] = _new_sketch(metric)
+            sketches[month].update(value)
+        conn.execute("DELETE FROM stat_sketches WHERE metric = ?", (metric.name,))
+        for month, sketch in sketches.items():
+            _store(conn, metric, month, sketch)
+        conn.execute(
+            "INSERT OR REPLACE INTO stat_sketches_built (metric, built_at)"
+            " VALUES (?, ?)",
+            (metric.name, time.time()),
+        )
+        counts[metric.name] = len(sketches)
+    return counts
+
+
+_ready: set = set()
+_ready_lock = threading.Lock()
+
+
+# ✅ Création unique par processus : reconstruit les métriques jamais
+# construites, même si observe() a déjà écrit quelques mois
+def ensure_sketches(db_path: str = DB_PATH) -> None:
+    with _ready_lock:
+        if db_path in _ready:
+            return
+
+        def work(conn: sqlite3.Connection) -> None:
+            create_sketch_table(conn)
+            built = {
+                row[0] for row in conn.execute("SELECT metric FROM stat_sketches_built")
+            }
+            missing = [m for m in metrics_for(conn) if m.name not in built]
+            if missing:
+                rebuild_sketches(conn, missing)
+
+        write_transaction(work, db_path)
+        _ready.add(db_path)
+
+
+# 🔀 Fusion des esquisses mensuelles d'une période (mois inclus, "AAAA-MM").
+# readonly=True : lues sur la copie analytique (utils/snapshots.py), au même
+# instant que les lignes qu'un tableau de bord y lit.
+def merged_sketch(
+    name: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db_path: str = DB_PATH,
+    readonly: bool = False,
+) -> Sketch:
+    metric = METRICS_BY_NAME[name]
+    ensure_sketches(db_path)
+    query = (
+        "SELECT data, n FROM stat_sketches WHERE metric = ? AND month BETWEEN ? AND ?"
+    )
+    params = (metric.name, start or UNDATED, end or "9999-99")
+    rows = None
+    if readonly:
+        conn = connect_snapshot(db_path)
+        try:
+            rows = conn.execute(query, params).fetchall()
+        except sqlite3.OperationalError:
+            pass  # copie antérieure à la table des esquisses : lecture sur la base
+        finally:
+            conn.close()
+    if rows is None:
+        conn = sqlite3.connect(db_path, timeout=30)
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+    merged = _new_sketch(metric)
+    for data, n in rows:
+        merged.merge(_load_sketch(metric, data, n))
+    return merged
+
+
+def quantiles(
+    name: str,
+    qs: Sequence[float] = QUANTILES,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db_path: str = DB_PATH,
+    readonly: bool = False,
+) -> Dict[float, float]:
+    return merged_sketch(name, start, end, db_path, readonly).quantiles(qs)
+
+
+def distinct_count(
+    name: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db_path: str = DB_PATH,
+    readonly: bool = False,
+) -> int:
+    return merged_sketch(name, start, end, db_path, readonly).count()
+
+
+# 📅 Période « depuis le 1er janvier » en mois ("AAAA-01", "AAAA-MM")
+def year_to_date(today: Optional[date] = None) -> Tuple[str, str]:
+    today = today or date.today()
+    return f"{today.year}-01", f"{today.year}-{today.month:02d}"
+
+
+# 🌙 Tâche de fond : reconstruction des esquisses de chaque base existante
+@job_handler("rebuild_sketches")
+def rebuild_sketches_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    results = {}
+    for db_path in payload.get("databases") or SKETCH_DATABASES:
+        if not os.path.exists(db_path):
+            continue
+        try:
+            results[db_path] = write_transaction(rebuild_sketches, db_path)
+        except sqlite3.Error as e:
+            results[db_path] = {"error": str(e)}
+    return results
+
+
+# 👇 Exécution directe : python -m utils.sketches [base] [rebuild]
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    if "rebuild" in sys.argv[2:]:
+        print(f"🔁 Mois reconstruits : {write_transaction(rebuild_sketches, db_path)}")
+    start, end = year_to_date()
+    conn = sqlite3.connect(db_path)
+    metrics = metrics_for(conn)
+    conn.close()
+    print(f"📐 {db_path} — depuis le 1er janvier ({start} → {end})")
+    for metric in metrics:
+        sketch = merged_sketch(metric.name, start, end, db_path)
+        if metric.kind == "quantiles":
+            q1, median, q3 = sketch.quantiles().values()
+            print(
+                f"   {metric.label} : n={sketch.n}, Q1={q1}, médiane={median}, Q3={q3}"
+            )
+        else:
+            print(f"   {metric.label} : ≈ {sketch.count()} (sur {sketch.n} lignes)")
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+from utils.jobs import job_handler
+
+DB_PATH = "data.db"
+SNAPSHOT_DIR = "snapshots"
+
+# 📸 Bases copiées pour les tableaux de bord (celles qui existent)
+SNAPSHOT_DATABASES = ["data.db", "midwifery.db"]
+
+# ⏳ Âge maximal d'une copie : la tâche planifiée la rafraîchit avant ; si le
+# planificateur ne tourne pas, la première lecture suivante lance la copie
+# en tâche de fond et lit l'ancienne en attendant
+MAX_AGE_SECONDS = 300
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def snapshot_path(db_path: str = DB_PATH, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(snapshot_dir, f"{name}.db")
+
+
+def snapshot_age(db_path: str = DB_PATH) -> Optional[float]:
+    path = snapshot_path(db_path)
+    if not os.path.exists(path):
+        return None
+    return time.time() - os.path.getmtime(path)
+
+
+# 📸 Copie cohérente par l'API de sauvegarde (une passe : en WAL, la lecture
+# ne bloque pas les écrivains), puis remplacement atomique. Une copie publiée
+# n'est jamais modifiée : les lecteurs l'ouvrent en immutable=1, sans aucun
+# verrou, et ceux qui l'ont déjà ouverte gardent l'ancienne jusqu'à fermeture.
+def refresh_snapshot(
+    db_path: str = DB_PATH, snapshot_dir: str = SNAPSHOT_DIR
+) -> Dict[str, Any]:
+    if not os.path.exists(db_path):
+        raise sqlite3.OperationalError(f"Base introuvable : {db_path}")
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = snapshot_path(db_path, snapshot_dir)
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    started = time.perf_counter()
+    source = sqlite3.connect(db_path, timeout=30)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target)
+        # Copie autonome : pas de fichier -wal à côté de l'instantané
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+    os.replace(tmp_path, path)
+    return {
+        "source": db_path,
+        "snapshot": path,
+        "size": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+# 🔒 Rafraîchissement immédiat, un seul à la fois par copie (tâche planifiée,
+# ou juste après une saisie pour que la session la voie)
+def refresh_now(db_path: str = DB_PATH) -> Dict[str, Any]:
+    with _lock_for(snapshot_path(db_path)):
+        return refresh_snapshot(db_path)
+
+
+# 🧵 Copie en arrière-plan ; rien si une autre est déjà en cours
+def _refresh_in_background(db_path: str) -> None:
+    lock = _lock_for(snapshot_path(db_path))
+    if not lock.acquire(blocking=False):
+        return
+
+    def run() -> None:
+        try:
+            refresh_snapshot(db_path)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Copie analytique de {db_path} non rafraîchie ({e})")
+        finally:
+            lock.release()
+
+    threading.Thread(
+        target=run, name=f"snapshot-{os.path.basename(db_path)}", daemon=True
+    ).start()
+
+
+# ✅ Copie présente ; trop ancienne, elle est servie telle quelle pendant
+# qu'une nouvelle se prépare. Seule la toute première copie est attendue.
+def ensure_snapshot(db_path: str = DB_PATH, max_age: float = MAX_AGE_SECONDS) -> str:
+    path = snapshot_path(db_path)
+    age = snapshot_age(db_path)
+    if age is None:
+        with _lock_for(path):
+            if snapshot_age(db_path) is None:
+                refresh_snapshot(db_path)
+    elif age > max_age:
+        _refresh_in_background(db_path)
+    return path
+
+
+# 📖 Connexion en lecture seule sur la copie (mode=ro, immutable=1)
+def connect_snapshot(db_path: str = DB_PATH) -> sqlite3.Connection:
+    path = os.path.abspath(ensure_snapshot(db_path))
+    return sqlite3.connect(f"file:{quote(path)}?mode=ro&immutable=1", uri=True)
+
+
+# 🔄 Tâche de fond : rafraîchit la copie de chaque base existante
+@job_handler("refresh_snapshots")
+def refresh_snapshots_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    results = {}
+    for db_path in payload.get("databases") or SNAPSHOT_DATABASES:
+        if os.path.exists(db_path):
+            results[db_path] = refresh_now(db_path)
+    return results
+
+
+# 👇 Exécution directe : python -m utils.snapshots [data.db midwifery.db]
+if __name__ == "__main__":
+    for db_path in sys.argv[1:] or SNAPSHOT_DATABASES:
+        if os.path.exists(db_path):
+            result = refresh_snapshot(db_path)
+            print(
+                f"📸 {db_path} → {result['snapshot']} "
+                f"({result['size'] / 1024:.0f} Ko, {result['seconds']:.2f} s)"
+            )
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from utils.perf import timed
+
+# 📊 Agrégations du tableau de bord de midwives_Statistics.py, isolées du
+# rendu pour être mesurées par les benchmarks (benchmarks/).
+
+
+# 📌 Statistiques descriptives + médiane et valeurs manquantes par colonne
+@timed(kind="pandas")
+def describe_with_median(df: pd.DataFrame) -> pd.DataFrame:
+    stats = df.describe().T
+    stats["median"] = df.median(numeric_only=True)
+    stats["missing_values"] = df.isnull().sum()
+    return stats
+
+
+# 📌 Matrice de corrélation des colonnes numériques
+@timed(kind="pandas")
+def correlation_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    return df.corr(numeric_only=True)
+
+
+# 📅 Nombre de lignes par mois (colonne date texte ou datetime)
+@timed(kind="pandas")
+def monthly_counts(df: pd.DataFrame, column: str = "date") -> pd.DataFrame:
+    dates = pd.to_datetime(df[column])
+    df_time = dates.groupby(dates.dt.to_period("M")).size().reset_index(name="Nombre")
+    df_time[column] = df_time[column].astype(str)
+    return df_time
@@ -0,0 +1,509 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.recurrence import PRENATAL_RULE, date_at_gestational_week, parse_rule
+from utils.rendez_vous import RENDEZ_VOUS_DDL
+
+# 📏 Tailles prédéfinies (nombre de patientes)
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+FIXTURE_DIR = "fixtures"
+
+# 🔑 Mot de passe de tous les comptes générés (tests de charge)
+SYNTHETIC_PASSWORD = "synthetic"
+
+# 🧾 Lignes par transaction lors du chargement
+CHUNK_SIZE = 50_000
+
+# 🗺️ Communautés et poids approximatifs (population)
+COMMUNITIES = {
+    "Chisasibi": 0.22,
+    "Mistissini": 0.17,
+    "Waskaganish": 0.12,
+    "Wemindji": 0.08,
+    "Waswanipi": 0.09,
+    "Oujé-Bougoumou": 0.04,
+    "Eastmain": 0.04,
+    "Nemaska": 0.04,
+    "Whapmagoostui": 0.05,
+    "Other": 0.15,
+}
+SURNAMES = [
+    "Bearskin",
+    "Blacksmith",
+    "Cheezo",
+    "Coon",
+    "Diamond",
+    "Gilpin",
+    "Happyjack",
+    "Iserhoff",
+    "Jolly",
+    "Kitchen",
+    "Loon",
+    "Mianscum",
+    "Moses",
+    "Neeposh",
+    "Otter",
+    "Petawabano",
+    "Rabbitskin",
+    "Sandy",
+    "Shecapio",
+    "Stewart",
+    "Tapiatic",
+    "Weistche",
+    "Gagnon",
+    "Tremblay",
+    "Côté",
+    "Bouchard",
+    "Roy",
+]
+FIRST_NAMES = [
+    "Annie",
+    "Bella",
+    "Clara",
+    "Daisy",
+    "Emma",
+    "Florence",
+    "Gloria",
+    "Hannah",
+    "Irene",
+    "Jane",
+    "Kathleen",
+    "Louise",
+    "Marie",
+    "Nancy",
+    "Olivia",
+    "Priscilla",
+    "Rachel",
+    "Sarah",
+    "Tania",
+    "Violet",
+    "Winnie",
+    "Zoé",
+    "Chloé",
+    "Léa",
+]
+REFERRED_BY = ["Self-referral", "Nurse", "Doctor", "Midwife", "PCCR", "Other"]
+REFERRAL_REASONS = [
+    "Complete Midwifery Care",
+    "Prenatal Care",
+    "Shared Care",
+    "Postpartum",
+    "Breastfeeding support",
+    "STBBIs screening",
+    "Birth control",
+]
+STATUSES = {
+    "Indigenous-Cree": 0.85,
+    "Indigenous-nonCree": 0.05,
+    "Non-Indigenous": 0.1,
+}
+STAFF_ROLES = {"sage-femme": 0.6, "nurse": 0.2, "doctor": 0.15, "admin": 0.05}
+APPOINTMENT_TYPES = ["Suivi prénatal", "Échographie", "Prise de sang", "Télésanté"]
+MESSAGE_SNIPPETS = [
+    "Résultats de laboratoire reçus pour le dossier {chart}.",
+    "Pouvez-vous revoir la patiente {chart} cette semaine ?",
+    "Transfert de soins à discuter pour {chart}.",
+    "Rendez-vous de {chart} déplacé.",
+    "Note de suivi ajoutée au dossier {chart}.",
+]
+
+# 📎 Pièces jointes : proportion des messages et taille (octets)
+ATTACHMENT_RATE = 0.03
+ATTACHMENT_SIZE = (512, 8192)
+
+# 🏗️ Schéma des fixtures : union des deux schémas du dépôt (init_db.py et
+# db.py / script des pôles) pour que toutes les pages trouvent leurs colonnes.
+# Dans une base existante, seules les colonnes présentes sont remplies.
+FIXTURE_SCHEMA = {
+    "users": """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            hashed_password TEXT,
+            password_hash TEXT,
+            professional_title TEXT,
+            email TEXT,
+            role TEXT DEFAULT 'patient'
+        )""",
+    "demographics": """
+        CREATE TABLE IF NOT EXISTS demographics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chart_number TEXT,
+            nom TEXT,
+            prenom TEXT,
+            date_naissance TEXT,
+            sexe TEXT,
+            adresse TEXT,
+            telephone TEXT,
+            dob TEXT,
+            date_of_referral TEXT,
+            age INTEGER,
+            community_of_residence TEXT,
+            status TEXT,
+            referred_by TEXT,
+            reason_for_referral TEXT,
+            successful_first_contact TEXT,
+            eligible_to_midwifery_care TEXT,
+            reason_for_non_eligibility TEXT,
+            weeks_at_first_appointment INTEGER,
+            reason_if_never_seen TEXT
+        )""",
+    "prenatal_care": """
+        CREATE TABLE IF NOT EXISTS prenatal_care (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chart_number TEXT,
+            nom TEXT,
+            date_visite TEXT,
+            semaines_gestation INTEGER,
+            tension_arterielle TEXT,
+            remarques TEXT,
+            date_collection TEXT,
+            gpa TEXT,
+            edd_date TEXT,
+            tobacco_use TEXT,
+            substance_use TEXT,
+            bmi REAL,
+            gdm TEXT,
+            anemia TEXT,
+            high_risk_pe TEXT,
+            previous_c_section TEXT,
+            ce_cle_status TEXT,
+            racism TEXT,
+            domestic_violence TEXT,
+            housing TEXT,
+            pregnancy_loss TEXT,
+            previous_vbac TEXT,
+            stbbis TEXT,
+            trainee_involved TEXT,
+            referral_worker TEXT,
+            prenatal_consultation TEXT,
+            reason1 TEXT,
+            made_with1 TEXT,
+            reason2 TEXT,
+            made_with2 TEXT,
+            reason3 TEXT,
+            made_with3 TEXT,
+            notes TEXT,
+            telehealth TEXT,
+            shared_care TEXT,
+            transfer_care TEXT,
+            other_transfer_reason TEXT,
+            transfer_to TEXT,
+            care_ended TEXT,
+            patient_age INTEGER
+        )""",
+    "rendez_vous": RENDEZ_VOUS_DDL,
+    "private_messages": """
+        CREATE TABLE IF NOT EXISTS private_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT,
+            receiver TEXT,
+            message TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            seen INTEGER DEFAULT 0,
+            file_name TEXT,
+            file_data BLOB,
+            thread_id INTEGER
+        )""",
+}
+
+# 📇 Index créés après le chargement (plus rapide qu'à chaque insertion)
+FIXTURE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_demographics_chart_number "
+    "ON demographics (chart_number)",
+    "CREATE INDEX IF NOT EXISTS idx_prenatal_care_chart_number "
+    "ON prenatal_care (chart_number)",
+    "CREATE INDEX IF NOT EXISTS idx_rendez_vous_chart_number "
+    "ON rendez_vous (chart_number)",
+    "CREATE INDEX IF NOT EXISTS idx_rendez_vous_date_heure "
+    "ON rendez_vous (date, heure)",
+    "CREATE INDEX IF NOT EXISTS idx_private_messages_receiver "
+    "ON private_messages (receiver, timestamp)",
+]
+
+
+def _weighted(rng: random.Random, weights: Dict[str, float]) -> Callable[[], str]:
+    choices, cum = list(weights), []
+    total = 0.0
+    for weight in weights.values():
+        total += weight
+        cum.append(total)
+    return lambda: rng.choices(choices, cum_weights=cum)[0]
+
+
+def _clip(value: float, low: int, high: int) -> int:
+    return int(min(high, max(low, round(value))))
+
+
+def _visit_weeks(first_week: int, rule: str = PRENATAL_RULE) -> List[int]:
+    weeks, week = [], first_week
+    for until_week, every in parse_rule(rule):
+        while week <= until_week:
+            weeks.append(week)
+            week += every
+    return weeks
+
+
+# 🧬 Générateur reproductible : même graine, mêmes données
+class SyntheticData:
+    def __init__(self, patients: int, seed: int = 42, today: Optional[date] = None):
+        self.patients = patients
+        self.staff = max(10, patients // 1000)
+        self.rng = random.Random(seed)
+        self.today = today or date.today()
+        self.community = _weighted(self.rng, COMMUNITIES)
+        self.status = _weighted(self.rng, STATUSES)
+        self.staff_role = _weighted(self.rng, STAFF_ROLES)
+        self.staff_names = [f"staff{i:05d}" for i in range(self.staff)]
+
+    def users(self, password_hash: str) -> Iterator[Dict[str, Any]]:
+        for username in self.staff_names:
+            role = self.staff_role()
+            yield {
+                "username": username,
+                "hashed_password": password_hash,
+                "password_hash": password_hash,
+                "professional_title": role,
+                "email": f"{username}@example.org",
+                "role": role,
+            }
+
+    # 👤 Une patiente = une fiche, une ligne prenatal_care et ses visites
+    def patient_rows(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        rng = self.rng
+        for index in range(self.patients):
+            chart = f"C{index + 1:07d}"
+            nom, prenom = rng.choice(SURNAMES), rng.choice(FIRST_NAMES)
+            age = _clip(rng.gauss(28, 6), 14, 48)
+            referral = self.today - timedelta(days=rng.randint(0, 3 * 365))
+            dob = referral - timedelta(days=age * 365 + rng.randint(0, 364))
+            eligible = rng.random() < 0.9
+            seen = eligible and rng.random() < 0.92
+            weeks = _clip(rng.gammavariate(4, 3), 4, 40) if seen else None
+            demographics = {
+                "chart_number": chart,
+                "nom": nom,
+                "prenom": prenom,
+                "date_naissance": dob.isoformat(),
+                "dob": dob.isoformat(),
+                "sexe": "F",
+                "adresse": f"{rng.randint(1, 300)} rue Principale",
+                "telephone": f"819-{rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+                "date_of_referral": referral.isoformat(),
+                "age": age,
+                "community_of_residence": self.community(),
+                "status": self.status(),
+                "referred_by": rng.choice(REFERRED_BY),
+                "reason_for_referral": rng.choice(REFERRAL_REASONS),
+                "successful_first_contact": "Yes" if seen else "Never reached",
+                "eligible_to_midwifery_care": "Yes" if eligible else "No",
+                "reason_for_non_eligibility": None if eligible else "Other",
+                "weeks_at_first_appointment": weeks,
+                "reason_if_never_seen": None if seen else "Unknown",
+            }
+            prenatal, visits = None, []
+            if seen:
+                edd = referral + timedelta(weeks=40 - weeks)
+                gravida = rng.randint(1, 6)
+                para = rng.randint(0, gravida - 1)
+                prenatal = {
+                    "chart_number": chart,
+                    "nom": nom,
+                    "date_visite": referral.isoformat(),
+                    "semaines_gestation": weeks,
+                    "tension_arterielle": (
+                        f"{rng.randint(100, 140)}/{rng.randint(60, 90)}"
+                    ),
+                    "remarques": None,
+                    "date_collection": referral.isoformat(),
+                    "gpa": f"G{gravida}P{para}A{gravida - para - 1}",
+                    "edd_date": edd.isoformat(),
+                    "tobacco_use": "Yes" if rng.random() < 0.3 else "No",
+                    "substance_use": "Yes" if rng.random() < 0.08 else "No",
+                    "bmi": round(_clip(rng.gauss(29, 6) * 10, 170, 550) / 10, 1),
+                    "gdm": "Yes" if rng.random() < 0.18 else "No",
+                    "anemia": "Yes" if rng.random() < 0.12 else "No",
+                    "high_risk_pe": "Yes" if rng.random() < 0.1 else "No",
+                    "previous_c_section": "Yes" if rng.random() < 0.15 else "No",
+                    "notes": None,
+                    "telehealth": "Yes" if rng.random() < 0.2 else "No",
+                    "care_ended": None,
+                    "patient_age": age,
+                }
+                for week in _visit_weeks(weeks):
+                    day = date_at_gestational_week(edd, week)
+                    minute = rng.choice((0, 15, 30, 45))
+                    heure = f"{rng.randint(8, 15):02d}:{minute:02d}"
+                    motif = rng.choice(APPOINTMENT_TYPES)
+                    visits.append(
+                        {
+                            "chart_number": chart,
+                            "nom": f"{prenom} {nom}",
+                            "date": day.isoformat(),
+                            "heure": heure,
+                            "motif": motif,
+                            "appointment_detail": f"{week} SA",
+                            "duration_minutes": rng.choice((30, 45, 60)),
+                            "attended": (
+                                ("Yes" if rng.random() < 0.85 else "No")
+                                if day <= self.today
+                                else None
+                            ),
+                            "notes": None,
+                        }
+                    )
+            yield {
+                "demographics": demographics,
+                "prenatal_care": prenatal,
+                "rendez_vous": visits,
+            }
+
+    # 💬 Messages entre soignantes, regroupés en fils ; quelques pièces jointes
+    def messages(self) -> Iterator[Dict[str, Any]]:
+        rng = self.rng
+        for index in range(self.patients // 2):
+            sender, receiver = rng.sample(self.staff_names, 2)
+            chart = f"C{rng.randint(1, self.patients):07d}"
+            when = self.today - timedelta(days=rng.randint(0, 365))
+            message = {
+                "sender": sender,
+                "receiver": receiver,
+                "message": rng.choice(MESSAGE_SNIPPETS).format(chart=chart),
+                "timestamp": f"{when.isoformat()} {rng.randint(8, 17):02d}:00:00",
+                "seen": 1 if rng.random() < 0.7 else 0,
+                "file_name": None,
+                "file_data": None,
+                "thread_id": index // 4 + 1,
+            }
+            if rng.random() < ATTACHMENT_RATE:
+                message["file_name"] = f"resultats_{chart}.pdf"
+                message["file_data"] = rng.randbytes(rng.randint(*ATTACHMENT_SIZE))
+            yield message
+
+
+# 📥 Chargeur par lots : colonnes projetées sur la table cible
+class BulkWriter:
+    def __init__(self, conn: sqlite3.Connection, table: str):
+        self.conn = conn
+        existing = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        self.columns = [c for c in existing if c != "id"]
+        self.project = itemgetter(*self.columns)
+        self.sql = (
+            f"INSERT INTO {table} ({', '.join(self.columns)}) "
+            f"VALUES ({', '.join('?' for _ in self.columns)})"
+        )
+        self.buffer: List[Any] = []
+        self.count = 0
+
+    def add(self, row: Dict[str, Any]) -> None:
+        for column in self.columns:
+            row.setdefault(column, None)
+        values = self.project(row)
+        self.buffer.append(values if len(self.columns) > 1 else (values,))
+        if len(self.buffer) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.conn.executemany(self.sql, self.buffer)
+            self.conn.commit()
+            self.count += len(self.buffer)
+            self.buffer = []
+
+
+def _password_hash() -> str:
+    import bcrypt
+
+    return bcrypt.hashpw(SYNTHETIC_PASSWORD.encode(), bcrypt.gensalt()).decode()
+
+
+# 🚀 Génération complète ; renvoie le nombre de lignes et la durée par table.
+# Toujours dans une base neuve : le chargement se fait sans journal, et les
+# numéros de dossier (C0000001…) entreraient en collision avec des lignes
+# existantes.
+def generate(
+    db_path: str, patients: int, seed: int = 42, today: Optional[date] = None
+) -> Dict[str, Dict[str, float]]:
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} existe déjà : base neuve attendue")
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    data = SyntheticData(patients, seed, today)
+    conn = sqlite3.connect(db_path)
+    # Fixture jetable : pas de journal ni de fsync pendant le chargement
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    for ddl in FIXTURE_SCHEMA.values():
+        conn.execute(ddl)
+    report: Dict[str, Dict[str, float]] = {}
+
+    def load(tables: List[str], rows: Iterable, split: bool = False) -> None:
+        started = time.perf_counter()
+        writers = {table: BulkWriter(conn, table) for table in tables}
+        for row in rows:
+            if not split:
+                writers[tables[0]].add(row)
+                continue
+            for table in tables:
+                value = row[table]
+                for item in value if isinstance(value, list) else [value]:
+                    if item is not None:
+                        writers[table].add(item)
+        for writer in writers.values():
+            writer.flush()
+        # Tables chargées ensemble : la durée est celle du groupe
+        seconds = time.perf_counter() - started
+        for table, writer in writers.items():
+            report[table] = {"rows": writer.count, "seconds": round(seconds, 2)}
+
+    load(["users"], data.users(_password_hash()))
+    load(["demographics", "prenatal_care", "rendez_vous"], data.patient_rows(), True)
+    load(["private_messages"], data.messages())
+
+    started = time.perf_counter()
+    for ddl in FIXTURE_INDEXES:
+        conn.execute(ddl)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    report["indexes"] = {"rows": 0, "seconds": round(time.perf_counter() - started, 2)}
+    return report
+
+
+# 📁 Chemin d'une fixture ; la date de référence, si elle est fixée, fait
+# partie du nom (les données en dépendent)
+def fixture_path(scale: str, seed: int = 42, today: Optional[date] = None) -> str:
+    stamp = f"-{today:%Y%m%d}" if today else ""
+    return os.path.join(FIXTURE_DIR, f"synthetic-{scale}-{seed}{stamp}.db")
+
+
+def parse_scale(scale: str) -> int:
+    return SCALES.get(scale.lower()) or int(scale)
+
+
+# 👇 Exécution directe : python -m utils.synthetic 100k [--seed 42] [--db chemin]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Données cliniques synthétiques")
+    parser.add_argument("scale", help="1k, 100k, 1m ou un nombre de patientes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="base cible (défaut : fixtures/)")
+    args = parser.parse_args()
+
+    path = args.db or fixture_path(args.scale, args.seed)
+    if os.path.exists(path):
+        if args.db:
+            parser.error(f"{path} existe déjà : choisir un fichier qui n'existe pas")
+        os.remove(path)
+    started = time.perf_counter()
+    report = generate(path, parse_scale(args.scale), args.seed)
+    for table, stats in report.items():
+        print(f"🧬 {table} : {stats['rows']:.0f} ligne(s) en {stats['seconds']} s")
+    print(f"✅ {path} généré en {time.perf_counter() - started:.1f} s")
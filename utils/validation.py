@@ -0,0 +1,271 @@
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DB_PATH = "data.db"
+
+# 📏 Bornes plausibles des valeurs numériques
+AGE_RANGE = (10, 65)
+WEEKS_RANGE = (0, 45)
+BMI_RANGE = (10.0, 80.0)
+
+# 🗓️ Formats de date acceptés à la saisie (stockés en ISO YYYY-MM-DD)
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d-%m-%Y", "%Y%m%d"]
+
+# 🚫 Réponses non numériques légitimes pour les semaines (stockées en NULL)
+WEEKS_NOT_APPLICABLE = {"postpartum", "non-pregnant", "never seen", "n/a", "na"}
+
+
+class ValidationError(ValueError):
+    """Enregistrement refusé : les erreurs sont indexées par colonne."""
+
+    def __init__(self, table: str, record: Dict[str, Any], errors: Dict[str, str]):
+        self.table = table
+        self.record = record
+        self.errors = errors
+        details = "; ".join(f"{col} : {msg}" for col, msg in errors.items())
+        super().__init__(f"{table} — {details}")
+
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+# 🧽 Convertisseurs : renvoient la valeur normalisée ou lèvent ValueError
+def to_iso_date(value: Any) -> Optional[str]:
+    if _blank(value):
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value).strip()[:10]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"date invalide « {value} »")
+
+
+def _to_number(value: Any, cast: Callable[[float], Any], bounds: Tuple) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = float(value)
+    else:
+        match = re.search(r"-?\d+(?:[.,]\d+)?", str(value))
+        if not match:
+            raise ValueError(f"nombre attendu, reçu « {value} »")
+        number = float(match.group().replace(",", "."))
+    low, high = bounds
+    if not low <= number <= high:
+        raise ValueError(f"{number:g} hors de l'intervalle [{low}, {high}]")
+    return cast(number)
+
+
+def to_age(value: Any) -> Optional[int]:
+    if _blank(value):
+        return None
+    return _to_number(value, lambda n: int(round(n)), AGE_RANGE)
+
+
+def to_weeks(value: Any) -> Optional[int]:
+    if _blank(value) or str(value).strip().lower() in WEEKS_NOT_APPLICABLE:
+        return None
+    # Les anciennes tranches ("<12 weeks", "12 to 20 weeks") ne sont pas un nombre
+    if re.search(r"[<>]|\bto\b|\d\s*-\s*\d", str(value)):
+        raise ValueError(f"nombre de semaines exact attendu, reçu « {value} »")
+    return _to_number(value, lambda n: int(n), WEEKS_RANGE)
+
+
+def to_bmi(value: Any) -> Optional[float]:
+    # 0 est la valeur par défaut du widget : « non mesuré »
+    if _blank(value) or value == 0:
+        return None
+    return _to_number(value, lambda n: round(n, 1), BMI_RANGE)
+
+
+def to_minutes(value: Any) -> Optional[int]:
+    if _blank(value):
+        return None
+    return _to_number(value, lambda n: int(n), (0, 24 * 60))
+
+
+# 🧾 Colonnes typées par table : (convertisseur, type SQL déclaré). Les deux
+# schémas (init_db.py et script des pôles) sont couverts ; les colonnes
+# absentes d'un enregistrement sont simplement ignorées.
+RULES: Dict[str, Dict[str, Tuple[Callable[[Any], Any], str]]] = {
+    "demographics": {
+        "dob": (to_iso_date, "TEXT"),
+        "date_naissance": (to_iso_date, "TEXT"),
+        "date_of_referral": (to_iso_date, "TEXT"),
+        "age": (to_age, "INTEGER"),
+        "weeks_at_first_appointment": (to_weeks, "INTEGER"),
+    },
+    "prenatal_care": {
+        "date_collection": (to_iso_date, "TEXT"),
+        "date_visite": (to_iso_date, "TEXT"),
+        "edd_date": (to_iso_date, "TEXT"),
+        "bmi": (to_bmi, "REAL"),
+        "patient_age": (to_age, "INTEGER"),
+        "semaines_gestation": (to_weeks, "INTEGER"),
+    },
+    "rendez_vous": {
+        "appointment_date": (to_iso_date, "TEXT"),
+        "date": (to_iso_date, "TEXT"),
+        "duration_minutes": (to_minutes, "INTEGER"),
+    },
+}
+
+
+# ✅ Normalise un enregistrement ; lève ValidationError si un champ est refusé
+def clean_record(table: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    cleaned = dict(record)
+    errors = {}
+    for column, (convert, _) in RULES.get(table, {}).items():
+        if column not in cleaned:
+            continue
+        try:
+            cleaned[column] = convert(cleaned[column])
+        except ValueError as e:
+            errors[column] = str(e)
+    if errors:
+        raise ValidationError(table, record, errors)
+    return cleaned
+
+
+# 🗃️ Quarantaine : les enregistrements refusés sont conservés pour correction
+def create_quarantine_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quarantine (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            errors TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """
+    )
+
+
+def quarantine(conn: sqlite3.Connection, error: ValidationError) -> None:
+    create_quarantine_table(conn)
+    conn.execute(
+        "INSERT INTO quarantine (table_name, payload, errors, created_at) "
+        "VALUES (?, ?, ?, ?)",
+        (
+            error.table,
+            json.dumps(error.record, default=str, ensure_ascii=False),
+            json.dumps(error.errors, ensure_ascii=False),
+            time.time(),
+        ),
+    )
+
+
+# 🚪 Point d'entrée des helpers d'insertion. Avec sa propre connexion, le
+# rejet est mis en quarantaine et validé immédiatement ; dans la transaction
+# d'un appelant, c'est à lui d'annuler puis d'appeler quarantine().
+def validate_for_insert(
+    conn: sqlite3.Connection, table: str, record: Dict[str, Any], own_conn: bool
+) -> Dict[str, Any]:
+    try:
+        return clean_record(table, record)
+    except ValidationError as e:
+        if own_conn:
+            quarantine(conn, e)
+            conn.commit()
+            conn.close()
+        raise
+
+
+def get_quarantine(conn: sqlite3.Connection) -> List[Tuple]:
+    create_quarantine_table(conn)
+    return conn.execute(
+        "SELECT id, table_name, payload, errors, created_at FROM quarantine "
+        "ORDER BY id DESC"
+    ).fetchall()
+
+
+# 🔁 Migration des données existantes : colonnes re-déclarées avec leur type
+# (sinon l'affinité TEXT reconvertit les entiers en texte), valeurs
+# normalisées ; une valeur refusée devient NULL et part en quarantaine.
+def migrate_table(conn: sqlite3.Connection, table: str) -> Tuple[int, int]:
+    rules = RULES[table]
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    if row is None:
+        return 0, 0
+    create_sql = row[0]
+    columns = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+    for column, (_, sql_type) in rules.items():
+        create_sql = re.sub(
+            rf"(\b{column}\s+)(TEXT|INTEGER|REAL|NUMERIC)\b",
+            rf"\g<1>{sql_type}",
+            create_sql,
+            count=1,
+        )
+    create_sql = re.sub(
+        rf"^CREATE TABLE\s+(IF NOT EXISTS\s+)?[\"']?{table}[\"']?",
+        f"CREATE TABLE {table}__typed",
+        create_sql.strip(),
+    )
+    dependents = [
+        r[0]
+        for r in conn.execute(
+            "SELECT sql FROM sqlite_master "
+            "WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+            (table,),
+        )
+    ]
+
+    column_list = ", ".join(columns)
+    placeholders = ", ".join("?" for _ in columns)
+    migrated = rejected = 0
+    conn.execute("BEGIN")
+    try:
+        create_quarantine_table(conn)
+        conn.execute(create_sql)
+        cursor = conn.execute(f"SELECT {column_list} FROM {table}")
+        for values in cursor.fetchall():
+            record = dict(zip(columns, values))
+            cleaned = dict(record)
+            bad = {}
+            for column, (convert, _) in rules.items():
+                if column in cleaned:
+                    try:
+                        cleaned[column] = convert(cleaned[column])
+                    except ValueError as e:
+                        bad[column] = str(e)
+                        cleaned[column] = None
+            if bad:
+                quarantine(conn, ValidationError(table, record, bad))
+                rejected += 1
+            conn.execute(
+                f"INSERT INTO {table}__typed ({column_list}) VALUES ({placeholders})",
+                [cleaned[c] for c in columns],
+            )
+            migrated += 1
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}__typed RENAME TO {table}")
+        for sql in dependents:
+            conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return migrated, rejected
+
+
+# 👇 Exécution directe : python -m utils.validation [chemin.db]
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = sqlite3.connect(path, isolation_level=None)
+    for table in RULES:
+        migrated, rejected = migrate_table(conn, table)
+        print(f"🧽 {table} : {migrated} ligne(s), {rejected} en quarantaine.")
+    conn.close()
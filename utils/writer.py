@@ -0,0 +1,251 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+DB_PATH = "data.db"
+
+# 📦 Écritures regroupées dans une même transaction (commit de groupe)
+MAX_BATCH = 256
+
+# ⏱️ Attente maximale d'un appelant avant d'abandonner
+WRITE_TIMEOUT = 30.0
+
+
+# 🧾 Résultat d'une écriture simple
+class WriteResult(NamedTuple):
+    lastrowid: Optional[int]
+    rowcount: int
+
+
+# ⏳ Délai d'attente dépassé : l'écriture reste dans la file et sera validée
+# (ou refusée) plus tard ; future donne son issue. Ce n'est pas un échec.
+class WritePending(TimeoutError):
+    def __init__(self, db_path: str, future: Future):
+        super().__init__(f"Écriture en attente dans la file de {db_path}")
+        self.future = future
+
+
+# ✍️ Écrivain unique par fichier SQLite. Les sessions déposent leurs
+# écritures dans une file ; un thread dédié les applique par lots, dans une
+# seule transaction (BEGIN IMMEDIATE … COMMIT), et répond à chaque appelant
+# par un Future. Chaque écriture a son SAVEPOINT : une écriture refusée
+# (contrainte, erreur SQL) est annulée seule et son appelant reçoit
+# l'exception, les autres du lot sont validées. La base passe en WAL : les
+# lectures, sur leurs propres connexions, ne bloquent pas l'écrivain.
+#
+# Les fonctions passées à transaction() reçoivent la connexion de
+# l'écrivain ; elles ne doivent ni valider (commit) ni annuler (rollback).
+#
+# Portée : l'écrivain est unique par fichier et par processus, pour les
+# écritures des sessions (utils/storage.py : Database, Notifications,
+# auth_secure, db.py ; midwives_Statistics.py), ainsi que pour perf, audit,
+# brouillons et curseurs du flux de changements. Restent sur leur propre
+# connexion, en WAL avec délai d'attente : les tâches (utils/jobs.py, dont
+# la réservation BEGIN IMMEDIATE est partagée entre processus) et leurs
+# modules (outbox, rappels, recherche…), le journal des requêtes (connexion
+# volontairement non journalisée) et les processus distincts
+# (python -m utils.jobs_cli worker), qui ont leur propre écrivain.
+class WriteQueue:
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.batches = 0
+        self.writes = 0
+        self.largest_batch = 0
+        self.last_commit_ms = 0.0
+        self._conn: Optional[sqlite3.Connection] = None
+        self.thread = threading.Thread(
+            target=self._run,
+            name=f"writer-{os.path.basename(db_path)}",
+            daemon=True,
+        )
+        self.thread.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.Error:
+            pass  # base occupée : le mode WAL sera pris à la prochaine ouverture
+        return conn
+
+    # 📥 Dépôt d'une écriture ; exécutée directement si l'appel vient de
+    # l'écrivain lui-même (une transaction qui en appelle une autre)
+    def transaction(self, work: Callable[[sqlite3.Connection], Any]) -> Future:
+        future: Future = Future()
+        if threading.current_thread() is self.thread:
+            future.set_result(work(self._conn))
+            return future
+        self.queue.put((work, future))
+        return future
+
+    def execute(self, query: str, params: Sequence = ()) -> Future:
+        def work(conn: sqlite3.Connection) -> WriteResult:
+            cursor = conn.execute(query, params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+
+        return self.transaction(work)
+
+    def executemany(self, query: str, rows: Iterable[Sequence]) -> Future:
+        rows = list(rows)
+
+        def work(conn: sqlite3.Connection) -> WriteResult:
+            cursor = conn.executemany(query, rows)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+
+        return self.transaction(work)
+
+    def _apply(self, batch: list) -> None:
+        conn = self._conn
+        done = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            for _, future in batch:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+        for work, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            conn.execute("SAVEPOINT write_item")
+            try:
+                result = work(conn)
+            except BaseException as e:
+                conn.execute("ROLLBACK TO write_item")
+                conn.execute("RELEASE write_item")
+                future.set_exception(e)
+                continue
+            conn.execute("RELEASE write_item")
+            done.append((future, result))
+        started = time.perf_counter()
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, _ in done:
+                future.set_exception(e)
+            return
+        self.last_commit_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.writes += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for future, result in done:
+            future.set_result(result)
+
+    def _run(self) -> None:
+        self._conn = self._connect()
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            # Tout ce qui s'est accumulé pendant le commit précédent part
+            # dans le même lot
+            batch = [item]
+            stop = False
+            while len(batch) < MAX_BATCH:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._apply(batch)
+            except Exception as e:
+                # Connexion dans un état inattendu : le lot entier échoue
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                break
+        self._conn.close()
+
+    # 🛑 Arrêt : les écritures déjà déposées sont appliquées avant la sortie
+    def close(self, timeout: float = 10.0) -> None:
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "db_path": self.db_path,
+            "pending": self.queue.qsize(),
+            "batches": self.batches,
+            "writes": self.writes,
+            "largest_batch": self.largest_batch,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+        }
+
+
+_writers: Dict[str, WriteQueue] = {}
+_writers_lock = threading.Lock()
+
+
+# ✅ Un écrivain par fichier et par processus
+def get_writer(db_path: str = DB_PATH) -> WriteQueue:
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or not writer.thread.is_alive():
+            writer = _writers[key] = WriteQueue(db_path)
+        return writer
+
+
+def _wait(future: Future, db_path: str, timeout: float) -> Any:
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        raise WritePending(db_path, future) from None
+
+
+# ✍️ Écritures bloquantes : l'appelant attend la validation de son lot ;
+# WritePending au-delà du délai (l'écriture reste dans la file)
+def write(
+    query: str,
+    params: Sequence = (),
+    db_path: str = DB_PATH,
+    timeout: float = WRITE_TIMEOUT,
+) -> WriteResult:
+    return _wait(get_writer(db_path).execute(query, params), db_path, timeout)
+
+
+def write_many(
+    query: str,
+    rows: Iterable[Sequence],
+    db_path: str = DB_PATH,
+    timeout: float = WRITE_TIMEOUT,
+) -> WriteResult:
+    return _wait(get_writer(db_path).executemany(query, rows), db_path, timeout)
+
+
+def write_transaction(
+    work: Callable[[sqlite3.Connection], Any],
+    db_path: str = DB_PATH,
+    timeout: float = WRITE_TIMEOUT,
+) -> Any:
+    return _wait(get_writer(db_path).transaction(work), db_path, timeout)
+
+
+# 📖 Connexion de lecture (WAL : ne bloque pas l'écrivain)
+def get_read_connection(db_path: str = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+def get_writer_stats() -> List[Dict[str, Any]]:
+    with _writers_lock:
+        return [writer.stats() for writer in _writers.values()]